@@ -8,6 +8,8 @@ from models.on_delegate_check import service as ondelegatecheck_service
 from models.concat import service as concat_service
 from models.macaroons import database as macaroon_database
 from models.macaroons import service as macaroon_service
+from models.columnar import database as columnar_database
+from models.sqlite import database as sqlite_database
 
 import tests.main as tests
 
@@ -67,3 +69,28 @@ if __name__ == "__main__":
     results = macaroon_tester.generate_report("reports/macaroon_model.json")
     # results = macaroon_tester.run_tests(verbose=False)
     macaroon_tester.print_test_results(results)
+
+    # The evidence based models on the SQLite store ---------
+    # Compare the latency of the SQLite backed database with the in-memory store
+    sqlite_models = {
+        "prev_party": prevparty_service.PrevPartyService,
+        "prev_delegation": prevdelegation_service.PrevDelegationService,
+        "all_prev_delegation": allprevdelegation_service.AllPrevDelegationsService,
+        "on_delegate_check": ondelegatecheck_service.OnDelegateCheckService,
+        "concat": concat_service.ConcatService,
+    }
+    for model_name, service_class in sqlite_models.items():
+        sqlite_tester = tests.DelegationModelTests(sqlite_database.Database, database.DatabaseBroker, service_class)
+        results = sqlite_tester.generate_report(f"reports/{model_name}_model_sqlite.json")
+        sqlite_tester.print_test_results(results)
+
+    # The evidence based models on the columnar store -------
+    for model_name, service_class in sqlite_models.items():
+        columnar_tester = tests.DelegationModelTests(columnar_database.Database, database.DatabaseBroker, service_class)
+        results = columnar_tester.generate_report(f"reports/{model_name}_model_columnar.json")
+        columnar_tester.print_test_results(results)
+
+    # The databases, independent of the delegation model ------
+    database_tester = tests.DatabaseTests()
+    results = database_tester.generate_report("reports/databases.json")
+    database_tester.print_test_results(results)
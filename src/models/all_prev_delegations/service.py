@@ -2,6 +2,7 @@ from ..base import service as base_service
 from typing import List
 from . import evidence as all_prev_delegation_evidence
 from ..base import evidence as base_evidence
+from ..base.lookups import LookupBatch
 
 
 class AllPrevDelegationsService(base_service.BaseService):
@@ -11,20 +12,10 @@ class AllPrevDelegationsService(base_service.BaseService):
         """
         Get the previous delegation for a party and object.
         """
-        for prev_db_name, evidence in self.db_broker.get_all_evidence_by_party(party_id):
-            # Build a mapping from object_id to a list of actions
-            object_actions = {}
-            for rule in evidence.rules:
-                for object_id in rule.object_ids:
-                    if object_id not in object_actions:
-                        object_actions[object_id] = list(rule.actions)
-                    else:
-                        object_actions[object_id].extend(rule.actions)
-
-            # Check if all object_ids are present and all actions are allowed for each object
-            if all(obj in object_actions for obj in object_ids) and all(
-                act in object_actions[obj] for obj in object_ids for act in actions
-            ):
+        for prev_db_name, batch in self.db_broker.get_all_evidence_batches_by_party(party_id):
+            # Select the evidence for which all object_ids are present and all actions are allowed for each object
+            at = self.db_broker.get_database(prev_db_name).clock()
+            for evidence in batch.select_all(object_ids, actions, at=at):
                 return prev_db_name, evidence
 
         return None, None
@@ -38,11 +29,7 @@ class AllPrevDelegationsService(base_service.BaseService):
         """
         Check if the evidence is for the search.
         """
-        for rule in evidence.rules:
-            if object_id in rule.object_ids and action in rule.actions:
-                return True
-
-        return False
+        return evidence.covers(object_id, action)
 
     def has_access(self, delegatee: str, data_owner: str, object: str, action: str, db_name: str, evidence) -> bool:
         """
@@ -57,7 +44,18 @@ class AllPrevDelegationsService(base_service.BaseService):
         Returns:
             True if the delegatee has access to the object, False otherwise.
         """
-        if evidence.identifier in self.db_broker.get_database(db_name).revocations:
+        if self.db_broker.coalesce:
+            # Check the evidence and all previous delegations for revocation with a single request per AR
+            batch = LookupBatch(self.db_broker)
+            batch.check_revoked(db_name, evidence.identifier)
+            for prev_db_name, prev_delegation in zip(evidence.prev_db_names, evidence.prev_delegations):
+                batch.check_revoked(prev_db_name, prev_delegation.identifier)
+            batch.flush()
+            is_revoked = batch.is_revoked
+        else:
+            is_revoked = self.db_broker.is_revoked
+
+        if is_revoked(db_name, evidence.identifier):
             return False
 
         if evidence.receiver != delegatee:  # Current evidence can not be used by the current party
@@ -70,7 +68,7 @@ class AllPrevDelegationsService(base_service.BaseService):
 
             found_revocation = False
             for prev_db_name, prev_delegation in zip(evidence.prev_db_names, evidence.prev_delegations):
-                if prev_delegation.identifier in self.db_broker.get_database(prev_db_name).revocations:
+                if is_revoked(prev_db_name, prev_delegation.identifier):
                     found_revocation = True
                     break
 
@@ -88,6 +86,89 @@ class AllPrevDelegationsService(base_service.BaseService):
 
         return False
 
+    def has_access_many(self, requests: List[tuple]) -> List[bool]:
+        """
+        Check multiple access requests at once.
+        Evidence based on the same delegations shares the prefix of its previous delegations, every prefix is only
+        verified once per data owner, object and action.
+
+        Params:
+            requests: a list of (delegatee, data_owner, object, action, db_name, evidence) tuples.
+
+        Returns:
+            A list with, for every request, True if the delegatee has access, in the order of the requests.
+        """
+        prefixes = {
+            # (db_name, identifier, data_owner, object, action): state after verifying the chain up to that delegation
+        }
+
+        results = []
+        for delegatee, data_owner, object, action, db_name, evidence in requests:
+            if (
+                self.db_broker.is_revoked(db_name, evidence.identifier)
+                or evidence.receiver != delegatee
+                or not self._is_evidence_for_search(evidence, object, action)
+            ):
+                results.append(False)
+            elif evidence.issuer == data_owner:
+                results.append(True)
+            else:
+                found_revocation, _, _, last_delegation = self._verify_prev_delegations(
+                    evidence, data_owner, object, action, prefixes
+                )
+                results.append(
+                    last_delegation is not None and last_delegation.receiver == evidence.issuer and not found_revocation
+                )
+
+        return results
+
+    def _verify_prev_delegations(self, evidence, data_owner: str, object: str, action: str, prefixes: dict) -> tuple:
+        """
+        Verify the previous delegations of evidence, continuing from the longest prefix that was verified before.
+        The prefix up to a delegation is identified by that delegation, as every delegation stores its own previous
+        delegations.
+
+        Params:
+            evidence: the evidence whose previous delegations are verified.
+            data_owner: the identifier of the data owner.
+            object: the identifier of the object.
+            action: the action to be performed on the object.
+            prefixes: the states of the previously verified prefixes, updated with the prefixes of this evidence.
+
+        Returns:
+            A (found_revocation, stopped, last_authorizes, last_delegation) tuple, with the last delegation that was
+            verified.
+        """
+        keys = [
+            (prev_db_name, prev_delegation.identifier, data_owner, object, action)
+            for prev_db_name, prev_delegation in zip(evidence.prev_db_names, evidence.prev_delegations)
+        ]
+
+        start = len(keys)
+        while start > 0 and keys[start - 1] not in prefixes:
+            start -= 1
+        state = prefixes[keys[start - 1]] if start > 0 else (False, False, None, None)
+
+        for position in range(start, len(keys)):
+            found_revocation, stopped, last_authorizes, _ = state
+            if stopped:
+                break
+
+            prev_db_name = evidence.prev_db_names[position]
+            prev_delegation = evidence.prev_delegations[position]
+            if self.db_broker.is_revoked(prev_db_name, prev_delegation.identifier):
+                state = (True, True, last_authorizes, prev_delegation)
+            elif not self._is_evidence_for_search(prev_delegation, object, action):
+                state = (False, False, last_authorizes, prev_delegation)
+            elif prev_delegation.issuer == data_owner or prev_delegation.issuer == last_authorizes:
+                state = (False, False, prev_delegation.receiver, prev_delegation)
+            else:
+                state = (False, True, last_authorizes, prev_delegation)  # Found invalid delegation link
+
+            prefixes[keys[position]] = state
+
+        return state
+
     def add_delegation(
         self,
         party1: str,
@@ -132,6 +213,43 @@ class AllPrevDelegationsService(base_service.BaseService):
         self.db_broker.get_database(database_name).add_evidence(evid)
         return evid
 
+    def add_delegations(self, delegations, database_name: str = None):
+        """
+        Add multiple delegations to the database, in a single batch.
+
+        Params:
+            delegations: a list of (party1, party2, objects, actions, expiry) tuples, optionally followed by
+                the evidence of the previous delegation.
+            database_name: the name of the database to add the delegations to.
+
+        Returns:
+            A list with the evidence of every delegation, in the order of the delegations.
+        """
+        db = self.db_broker.get_database(database_name)
+
+        evids = []
+        for identifier, (party1, party2, objects, actions, expiry, *evidence) in zip(
+            db.get_next_identifiers(len(delegations)), delegations
+        ):
+            prev_delegation = evidence[0] if evidence else None
+            evids.append(
+                all_prev_delegation_evidence.Evidence(
+                    identifier=identifier,
+                    issuer=party1,
+                    receiver=party2,
+                    rules=[base_evidence.Rule(object_ids=objects, actions=actions)],
+                    valid_from=0,
+                    valid_untill=expiry,
+                    db_name=database_name,
+                    prev_delegations=(prev_delegation.prev_delegations + [prev_delegation] if prev_delegation else []),
+                    prev_db_names=(
+                        prev_delegation.prev_db_names + [prev_delegation.db_name] if prev_delegation else []
+                    ),
+                )
+            )
+        db.add_evidence_many(evids)
+        return evids
+
     def revoke_delegation(self, delegation_id: int, database_name) -> bool:
         """
         Revoke a delegation in the database.
@@ -142,4 +260,13 @@ class AllPrevDelegationsService(base_service.BaseService):
         Returns:
             True if the revocation was successful, False otherwise.
         """
-        self.db_broker.get_database(database_name).revocations.append(delegation_id)
+        self.db_broker.get_database(database_name).revoke(delegation_id)
+
+    def revoke_delegations(self, delegation_ids: List[int], database_name):
+        """
+        Revoke multiple delegations in the database.
+
+        Params:
+            delegation_ids: the IDs of the delegations to be revoked.
+        """
+        self.db_broker.get_database(database_name).revoke_many(delegation_ids)
@@ -0,0 +1,209 @@
+import asyncio
+import random
+from typing import Dict, List, Tuple
+
+from . import evidence
+from .database import Database, DatabaseBroker
+
+
+class LatencyModel:
+    """
+    Model of the round-trip time to an AR, as a base latency with uniformly distributed jitter.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = None):
+        """
+        Initialize the latency model.
+
+        Params:
+            latency: the mean round-trip time in seconds.
+            jitter: the maximum deviation from the mean round-trip time in seconds.
+            seed: an optional seed, to draw the same sequence of round-trip times in every run.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+    def sample(self) -> float:
+        """
+        Draw a round-trip time.
+
+        Returns:
+            The round-trip time in seconds, never negative.
+        """
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+
+class AsyncDatabaseBroker:
+    """
+    Asynchronous variant of the DatabaseBroker, where every request to a database is a simulated network hop to the
+    AR holding it. Requests wait for a round-trip time drawn from the latency model of the AR, so independent
+    requests to different ARs can be awaited concurrently. The databases themselves are those of a DatabaseBroker,
+    the routes of that broker are assumed to be known locally.
+    """
+
+    def __init__(
+        self,
+        broker: DatabaseBroker,
+        latency: LatencyModel = None,
+        latencies: Dict[str, LatencyModel] = None,
+        concurrency: int = None,
+    ):
+        """
+        Initialize the AsyncDatabaseBroker.
+
+        Params:
+            broker: the broker holding the databases.
+            latency: the latency model of ARs without a latency model of their own, defaults to no latency.
+            latencies: an optional mapping from database name to the latency model of that AR.
+            concurrency: an optional maximum number of requests in flight, 1 simulates a synchronous client.
+        """
+        self.broker = broker
+        self.latency = latency or LatencyModel()
+        self.latencies = dict(latencies or {})
+        self.concurrency = concurrency
+        self.semaphore = None  # (event loop, semaphore limiting the requests in flight)
+        self.round_trips = 0
+
+    @property
+    def databases(self) -> Dict[str, Database]:
+        return self.broker.databases
+
+    def set_latency(self, db_name: str, latency: LatencyModel):
+        """
+        Set the latency model of an AR.
+
+        Params:
+            db_name: the name of the database held by the AR.
+            latency: the latency model of the AR.
+        """
+        self.latencies[db_name] = latency
+
+    async def call(self, db_name: str, method: str, *args, **kwargs):
+        """
+        Call a method of a database as a request to the AR holding it, waiting for a simulated round-trip time.
+
+        Params:
+            db_name: the name of the database.
+            method: the name of the method of the database.
+            args: the positional arguments of the method.
+            kwargs: the keyword arguments of the method.
+
+        Returns:
+            The result of the method, or None if the database does not exist.
+        """
+        round_trip_time = self.latencies.get(db_name, self.latency).sample()
+        if self.concurrency is None:
+            await asyncio.sleep(round_trip_time)
+        else:
+            # A semaphore is bound to the event loop it is used in, so create one per event loop
+            loop = asyncio.get_running_loop()
+            if self.semaphore is None or self.semaphore[0] is not loop:
+                self.semaphore = (loop, asyncio.Semaphore(self.concurrency))
+
+            async with self.semaphore[1]:
+                await asyncio.sleep(round_trip_time)
+        self.round_trips += 1
+
+        database = self.broker.get_database(db_name)
+        if database is None:
+            return None
+        return getattr(database, method)(*args, **kwargs)
+
+    async def get_database_entry(self, db_name: str, identifier: int):
+        """
+        Retrieve a specific entry from a database by its identifier.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence to retrieve.
+
+        Returns:
+            The evidence object if found, otherwise None.
+        """
+        return await self.call(db_name, "get_evidence", identifier)
+
+    async def get_evidence_by_party(self, db_name: str, party_id: str, at: float = None) -> List[evidence.Evidence]:
+        """
+        Retrieve all currently relevant evidence for a specific party from a specific database, see
+        Database.get_evidence_by_party.
+
+        Params:
+            db_name: the name of the database.
+            party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
+
+        Returns:
+            A list of the non-revoked evidence objects for the specified party.
+        """
+        return await self.call(db_name, "get_evidence_by_party", party_id, at=at) or []
+
+    async def get_all_evidence_by_party(self, party_id: str, at: float = None) -> List[Tuple[str, evidence.Evidence]]:
+        """
+        Retrieve all currently relevant evidence for a specific party across all databases, with concurrent requests
+        to the ARs holding evidence for the party.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
+
+        Returns:
+            A list of tuples, each containing the database name and the evidence object for the specified party.
+        """
+        db_names = self.broker.get_routes(party_id)
+        results = await asyncio.gather(*(self.get_evidence_by_party(db_name, party_id, at=at) for db_name in db_names))
+        return [(db_name, item) for db_name, evidences in zip(db_names, results) for item in evidences]
+
+    async def select_evidence_by_party(
+        self, db_name: str, party_id: str, object_ids: List[str], actions: List[str]
+    ) -> List[evidence.Evidence]:
+        """
+        Select the valid, non-revoked evidence of a party that permits all actions on all objects, evaluated by the
+        AR holding the database in a single request.
+
+        Params:
+            db_name: the name of the database.
+            party_id: the ID of the party whose evidence is to be selected.
+            object_ids: the identifiers of the objects.
+            actions: the actions to be performed on every object.
+
+        Returns:
+            A list of the evidence that permits the request.
+        """
+        return await self.call(db_name, "select_evidence_by_party", party_id, object_ids, actions) or []
+
+    async def get_all_selected_evidence_by_party(
+        self, party_id: str, object_ids: List[str], actions: List[str]
+    ) -> List[Tuple[str, evidence.Evidence]]:
+        """
+        Select the evidence of a party that permits all actions on all objects across all databases, with concurrent
+        requests to the ARs holding evidence for the party.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be selected.
+            object_ids: the identifiers of the objects.
+            actions: the actions to be performed on every object.
+
+        Returns:
+            A list of tuples, each containing the database name and the selected evidence.
+        """
+        db_names = self.broker.get_routes(party_id)
+        results = await asyncio.gather(
+            *(self.select_evidence_by_party(db_name, party_id, object_ids, actions) for db_name in db_names)
+        )
+        return [(db_name, item) for db_name, evidences in zip(db_names, results) for item in evidences]
+
+    async def is_revoked(self, db_name: str, identifier: int) -> bool:
+        """
+        Check if evidence is revoked in a database.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence.
+
+        Returns:
+            True if the evidence is revoked, False otherwise.
+        """
+        return bool(await self.call(db_name, "is_revoked", identifier))
@@ -0,0 +1,142 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Tuple
+
+
+class EvidenceCache:
+    """
+    Size-bounded LRU cache with an optional time-to-live, for evidence looked up through the DatabaseBroker.
+    Every entry depends on the evidence of one or more (database name, party) pairs, and is invalidated when evidence
+    for such a party is added to or revoked from that database.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Params:
+            max_size: the maximum number of entries, the least recently used entry is evicted beyond it.
+            ttl: an optional number of seconds after which an entry expires.
+            clock: a function returning the current time in seconds, used for the time-to-live.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+
+        self.entries = OrderedDict(
+            # key: (value, expiry time or None, dependencies)
+        )
+        self.dependents = {
+            # (db_name, party_id): set of keys of the entries depending on the evidence for the party
+        }
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key) -> Tuple[bool, object]:
+        """
+        Look up an entry, marking it as most recently used.
+
+        Params:
+            key: the key of the entry.
+
+        Returns:
+            A tuple with True and the cached value on a hit, or False and None on a miss.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        value, expiry, _ = entry
+        if expiry is not None and self.clock() >= expiry:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value, dependencies: Iterable[Tuple[str, str]]):
+        """
+        Add or replace an entry, evicting the least recently used entries beyond the maximum size.
+
+        Params:
+            key: the key of the entry.
+            value: the value to cache.
+            dependencies: the (db_name, party_id) pairs whose evidence the value is derived from.
+        """
+        if key in self.entries:
+            self._remove(key)
+
+        dependencies = tuple(dependencies)
+        expiry = None if self.ttl is None else self.clock() + self.ttl
+        self.entries[key] = (value, expiry, dependencies)
+        for dependency in dependencies:
+            self.dependents.setdefault(dependency, set()).add(key)
+
+        while len(self.entries) > self.max_size:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, _, dependencies = self.entries.pop(key)
+        for dependency in dependencies:
+            keys = self.dependents.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.dependents[dependency]
+
+    def invalidate(self, db_name: str, party_ids: Iterable[str]):
+        """
+        Remove the entries depending on the evidence for parties in a database.
+
+        Params:
+            db_name: the name of the database the evidence was added to or revoked from.
+            party_ids: the receivers of the added or revoked evidence.
+        """
+        for party_id in party_ids:
+            for key in list(self.dependents.get((db_name, party_id), ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self, db_name: str = None):
+        """
+        Remove all entries, or all entries depending on the evidence in a database.
+
+        Params:
+            db_name: the name of the database, defaults to all databases.
+        """
+        if db_name is None:
+            self.entries.clear()
+            self.dependents.clear()
+            return
+
+        for dependency in [dependency for dependency in self.dependents if dependency[0] == db_name]:
+            for key in list(self.dependents.get(dependency, ())):
+                self._remove(key)
+
+    def get_stats(self) -> dict:
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            A dict with the number of entries, hits, misses, evictions, expirations and invalidations.
+        """
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
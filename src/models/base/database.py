@@ -1,19 +1,349 @@
 import time
-from typing import List, Tuple
+from contextlib import contextmanager
+from functools import partial
+from itertools import count
+from typing import Callable, Dict, List, Tuple
 from . import evidence
+from .cache import EvidenceCache
+from .feed import RevocationSubscription
+from .index import ValidityIndex
+from .instrumentation import Instrumentation, uninstrument
+from .locking import ReadWriteLock, lock_methods
+from .lookups import LookupCounter
+from .persistence import LOG_ADD, LOG_REVOKE, EvidenceJournal
+from .vectorized import EvidenceBatch
+
+EVENT_ADD = "add"
+EVENT_REVOKE = "revoke"
+
+
+class RevocationStore:
+    """
+    Set backed store of revoked evidence identifiers, membership checks take constant time.
+    Every new revocation is also appended to a feed, and the epoch is the sequence number of the last revocation in
+    the feed. Caches can detect changes by comparing epochs, and catch up with only the new revocations using since.
+    The store is only changed through Database.revoke and revoke_many, which also update the indexes of the database
+    and notify its listeners, so it has no list-like append API.
+    """
+
+    def __init__(self, identifiers=()):
+        self.identifiers = set()
+        self.feed = [
+            # identifiers of the revoked evidence, in the order in which they were revoked
+        ]
+        self.epoch = 0
+        self.add_many(identifiers)
+
+    def add(self, identifier):
+        """
+        Add a revoked identifier to the store, see Database.revoke.
+
+        Params:
+            identifier: the identifier of the revoked evidence.
+        """
+        if identifier not in self.identifiers:
+            self.identifiers.add(identifier)
+            self.feed.append(identifier)
+            self.epoch += 1
+
+    def add_many(self, identifiers):
+        """
+        Add multiple revoked identifiers to the store, see Database.revoke_many.
+
+        Params:
+            identifiers: an iterable of identifiers of revoked evidence.
+        """
+        for identifier in identifiers:
+            self.add(identifier)
+
+    def since(self, sequence: int) -> list:
+        """
+        Get the revocations after a sequence number of the feed.
+
+        Params:
+            sequence: the sequence number, an earlier epoch of the store.
+
+        Returns:
+            A list of the identifiers revoked after the sequence number, in the order in which they were revoked.
+        """
+        return self.feed[sequence:]
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.identifiers
+
+    def __iter__(self):
+        return iter(self.feed)
+
+    def __len__(self) -> int:
+        return len(self.identifiers)
 
 
 class Database:
-    def __init__(self, name: str):
-        self.evidence = {
-            # id: Evidence object
+    # Methods holding the lock of a thread-safe database for reading, as they walk the indexes. Lookups of a single
+    # evidence or revocation are a single dict or set operation, which is atomic, so they do not take the lock. Stores
+    # that are not a plain dict publish new evidence atomically as well, or the lookups are added to these methods.
+    READ_LOCKED_METHODS = (
+        "get_parties",
+        "has_evidence_for_party",
+        "get_evidence_by_party",
+        "get_evidence_batch_by_party",
+        "get_evidence_at",
+        "select_evidence_by_party",
+        "get_revocations_since",
+    )
+    # Methods holding the lock of a thread-safe database for writing
+    WRITE_LOCKED_METHODS = (
+        "get_next_identifier",
+        "get_next_identifiers",
+        "add_evidence",
+        "add_evidence_many",
+        "revoke",
+        "revoke_many",
+        "snapshot",
+        "close",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        clock: Callable[[], float] = time.time,
+        log_directory: str = None,
+        snapshot_interval: int = None,
+        thread_safe: bool = False,
+    ):
+        """
+        Initialize the Database.
+
+        Params:
+            name: the name of the database.
+            clock: a function returning the current time in seconds, used to determine the validity of evidence.
+            log_directory: an optional directory to persist the added evidence and revocations to.
+                The database is restored from this directory if it contains a previous log or snapshot.
+            snapshot_interval: the number of logged operations after which a new snapshot is written automatically.
+            thread_safe: whether the database is used by multiple threads at once, see enable_locking.
+        """
+        self.evidence = self._new_evidence_store()
+        self.revocations = RevocationStore()
+        self.receiver_index = {
+            # receiver id: ValidityIndex over the evidence of the receiver
+        }
+        self.revoked_index = {
+            # receiver id: ValidityIndex over the revoked evidence of the receiver, for as-of queries
+        }
+        self.validity_index = ValidityIndex()  # Over all evidence, including revoked evidence, for historical audits
+        self.revocation_times = {
+            # id: time at which the evidence was revoked, by the clock of the database
+        }
+        self.batch_cache = {
+            # receiver id: EvidenceBatch over the non-revoked evidence of the receiver
         }
-        self.revocations = [
-            # the ids
+
+        self.listeners = [
+            # callable(database, event, receivers), notified after evidence is added or revoked
         ]
 
         self.id_counter = 0
         self.name = name
+        self.clock = clock
+        self.lock = None  # ReadWriteLock, if the database is thread-safe
+
+        self.journal = None
+        self.snapshot_interval = snapshot_interval
+        if log_directory is not None:
+            journal = EvidenceJournal(log_directory, name)
+            self._restore(journal)
+            self.journal = journal
+
+        if thread_safe:
+            self.enable_locking()
+
+    def _new_evidence_store(self):
+        """
+        Create the store for the evidence of the database, a mapping from identifier to evidence object.
+        Subclasses storing evidence in another format override this, so the store is also used when the database is
+        restored.
+
+        Returns:
+            An empty evidence store.
+        """
+        return {
+            # id: Evidence object
+        }
+
+    def _restore(self, journal: EvidenceJournal):
+        """
+        Restore the database from the snapshot and the log tail of a journal.
+        The snapshot is memory-mapped and its evidence is only unpickled when first retrieved, after which it is kept
+        in the evidence store of the database. The indexes are rebuilt from the metadata of the snapshot.
+
+        Params:
+            journal: the journal to restore from.
+        """
+        store, metadata = journal.load_snapshot(self.evidence)
+        if store is not None:
+            self.evidence = store
+            self.revocations.add_many(metadata["revocations"])
+            self.revocation_times.update(metadata["revocation_times"])
+            self.id_counter = metadata["id_counter"]
+
+            windows = {}
+            for identifier, receiver, valid_from, valid_untill in zip(
+                metadata["identifiers"], metadata["receivers"], metadata["valid_from"], metadata["valid_untill"]
+            ):
+                windows.setdefault(receiver, []).append((identifier, valid_from, valid_untill))
+
+            for receiver, receiver_windows in windows.items():
+                self.receiver_index.setdefault(receiver, ValidityIndex()).add_many(
+                    window for window in receiver_windows if window[0] not in self.revocations
+                )
+                revoked_windows = [window for window in receiver_windows if window[0] in self.revocations]
+                if revoked_windows:
+                    self.revoked_index.setdefault(receiver, ValidityIndex()).add_many(revoked_windows)
+            self.validity_index.add_many(window for receiver_windows in windows.values() for window in receiver_windows)
+
+        for operation, payload in journal.replay():
+            if operation == LOG_ADD and payload.identifier not in self.evidence:
+                self.add_evidence(payload)
+                if isinstance(payload.identifier, int):
+                    self.id_counter = max(self.id_counter, payload.identifier)
+            elif operation == LOG_REVOKE:
+                identifier, revoked_at = payload
+                self.revoke(identifier)
+                self.revocation_times[identifier] = revoked_at
+
+    def _log(self, operation: int, payload):
+        """
+        Append an operation to the journal, if the database is persisted, and write a snapshot when due.
+
+        Params:
+            operation: LOG_ADD or LOG_REVOKE.
+            payload: the evidence object for LOG_ADD, the (identifier, revocation time) tuple for LOG_REVOKE.
+        """
+        if self.journal is None:
+            return
+
+        self.journal.append(operation, payload)
+        if self.snapshot_interval and self.journal.pending >= self.snapshot_interval:
+            self.snapshot()
+
+    def _log_many(self, operation: int, payloads):
+        """
+        Append multiple operations of the same kind to the journal, if the database is persisted, with a single write.
+
+        Params:
+            operation: LOG_ADD or LOG_REVOKE.
+            payloads: the payloads of the operations, see _log.
+        """
+        if self.journal is None:
+            return
+
+        self.journal.append_many(operation, payloads)
+        if self.snapshot_interval and self.journal.pending >= self.snapshot_interval:
+            self.snapshot()
+
+    def snapshot(self):
+        """
+        Write a compact snapshot of the database to its log directory, and truncate the log.
+        """
+        if self.journal is None:
+            raise ValueError(f"Database {self.name} is not persisted, as no log directory was given.")
+
+        self.journal.write_snapshot(self.evidence, self.revocations, self.revocation_times, self.id_counter)
+
+    def close(self):
+        """
+        Close the journal of the database, if it is persisted.
+        """
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def add_listener(self, listener: Callable):
+        """
+        Register a listener that is notified after evidence is added to or revoked from the database.
+
+        Params:
+            listener: a callable taking the database, the event (EVENT_ADD or EVENT_REVOKE) and the set of
+                receivers of the added or revoked evidence.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        """
+        Unregister a listener, if it was registered.
+
+        Params:
+            listener: the listener to be removed.
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _notify(self, event: str, receivers):
+        """
+        Notify the listeners of added or revoked evidence, once the write lock of the database is released.
+
+        Params:
+            event: EVENT_ADD or EVENT_REVOKE.
+            receivers: the receivers of the added or revoked evidence.
+        """
+        if not receivers:
+            return
+
+        receivers = set(receivers)
+        if self.lock is not None:
+            self.lock.after_write(partial(self._deliver, event, receivers))
+        else:
+            self._deliver(event, receivers)
+
+    def _deliver(self, event: str, receivers: set):
+        for listener in list(self.listeners):
+            listener(self, event, receivers)
+
+    def enable_locking(self):
+        """
+        Make the database safe for concurrent access checks while evidence is added and revoked: many threads can
+        read at once, while a thread adding or revoking evidence has exclusive access. The listeners are notified
+        after the write lock is released. Must be called before the database is shared between threads.
+        """
+        if self.lock is None:
+            self.lock = ReadWriteLock()
+            lock_methods(self, self.lock, self.READ_LOCKED_METHODS, self.WRITE_LOCKED_METHODS)
+
+    def enable_instrumentation(self, instrumentation: Instrumentation):
+        """
+        Record the calls to the database, see Instrumentation.instrument.
+
+        Params:
+            instrumentation: the Instrumentation to record the calls in.
+        """
+        instrumentation.instrument(self)
+
+    def disable_instrumentation(self):
+        """
+        Stop recording the calls to the database.
+        """
+        uninstrument(self)
+
+    def get_parties(self) -> List[str]:
+        """
+        Retrieve all parties that have non-revoked evidence in the database.
+
+        Returns:
+            A list of party IDs.
+        """
+        return [party_id for party_id, index in self.receiver_index.items() if len(index)]
+
+    def has_evidence_for_party(self, party_id: str) -> bool:
+        """
+        Check if the database has non-revoked evidence for a party, regardless of its validity period.
+
+        Params:
+            party_id: the ID of the party.
+
+        Returns:
+            True if the database holds non-revoked evidence for the party, False otherwise.
+        """
+        return len(self.receiver_index.get(party_id, ())) > 0
 
     def add_parties(self, party_ids: List[str]):
         """
@@ -35,6 +365,20 @@ class Database:
         self.id_counter += 1
         return self.id_counter
 
+    def get_next_identifiers(self, count: int) -> range:
+        """
+        Allocate a block of identifiers for evidence.
+
+        Params:
+            count: the number of identifiers to allocate.
+
+        Returns:
+            A range of the allocated identifiers.
+        """
+        identifiers = range(self.id_counter + 1, self.id_counter + count + 1)
+        self.id_counter += count
+        return identifiers
+
     def add_evidence(self, evidence):
         """
         Add evidence to the database.
@@ -47,6 +391,38 @@ class Database:
             raise ValueError(f"Evidence with ID {identifier} already exists.")
 
         self.evidence[identifier] = evidence
+        self.receiver_index.setdefault(evidence.receiver, ValidityIndex()).add(
+            identifier, evidence.valid_from, evidence.valid_untill
+        )
+        self.validity_index.add(identifier, evidence.valid_from, evidence.valid_untill)
+        self.batch_cache.pop(evidence.receiver, None)
+        self._log(LOG_ADD, evidence)
+        self._notify(EVENT_ADD, [evidence.receiver])
+
+    def add_evidence_many(self, evidences: List[evidence.Evidence]):
+        """
+        Add multiple pieces of evidence to the database, updating the indexes once per batch.
+
+        Params:
+            evidences: the evidence objects to be added.
+        """
+        identifiers = set()
+        for item in evidences:
+            if item.identifier in self.evidence or item.identifier in identifiers:
+                raise ValueError(f"Evidence with ID {item.identifier} already exists.")
+            identifiers.add(item.identifier)
+
+        windows = {}
+        for item in evidences:
+            self.evidence[item.identifier] = item
+            windows.setdefault(item.receiver, []).append((item.identifier, item.valid_from, item.valid_untill))
+        self._log_many(LOG_ADD, evidences)
+
+        for receiver, receiver_windows in windows.items():
+            self.receiver_index.setdefault(receiver, ValidityIndex()).add_many(receiver_windows)
+            self.batch_cache.pop(receiver, None)
+        self.validity_index.add_many(window for receiver_windows in windows.values() for window in receiver_windows)
+        self._notify(EVENT_ADD, windows)
 
     def get_evidence(self, identifier: int):
         """
@@ -60,23 +436,159 @@ class Database:
         """
         return self.evidence.get(identifier, None)
 
-    def get_evidence_by_party(self, party_id: str) -> List[evidence.Evidence]:
+    def get_evidence_many(self, identifiers: List[int]) -> list:
+        """
+        Retrieve multiple pieces of evidence from the database.
+
+        Params:
+            identifiers: the IDs of the evidence to be retrieved.
+
+        Returns:
+            A list with, for every identifier, the evidence object if found, otherwise None.
+        """
+        return [self.get_evidence(identifier) for identifier in identifiers]
+
+    def get_evidence_by_party(self, party_id: str, at: float = None) -> List[evidence.Evidence]:
         """
         Retrieve all currently relevant evidence for a specific party.
-        Relevant evidence is defined as evidence that is valid at the current time.
+        Relevant evidence is defined as evidence that is valid at the current time and has not been revoked, so callers
+        do not need to check the revocations of this database themselves. For a time in the past, evidence revoked
+        after that time is included, like in get_evidence_at.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
+
+        Returns:
+            A list of the evidence objects for the specified party that were not revoked at the given time.
+        """
+        now = self.clock()
+        at = now if at is None else at
+
+        index = self.receiver_index.get(party_id)
+        identifiers = index.query(at) if index is not None else []
+
+        revoked = self.revoked_index.get(party_id)
+        if revoked is not None and at < now:
+            identifiers += [identifier for identifier in revoked.query(at) if not self.was_revoked(identifier, at)]
+        return [self.evidence[identifier] for identifier in identifiers]
+
+    def get_evidence_batch_by_party(self, party_id: str) -> EvidenceBatch:
+        """
+        Retrieve all non-revoked evidence for a specific party as a batch, for vectorized evaluation.
+        The batch is not filtered on validity, pass the time to the evaluation instead.
 
         Params:
             party_id: the ID of the party whose evidence is to be retrieved.
 
         Returns:
-            A list of evidence objects for the specified party.
+            An EvidenceBatch over the evidence for the specified party.
+        """
+        batch = self.batch_cache.get(party_id)
+        if batch is None:
+            index = self.receiver_index.get(party_id)
+            batch = EvidenceBatch([self.evidence[identifier] for identifier in index.windows] if index else [])
+            self.batch_cache[party_id] = batch
+        return batch
+
+    def get_evidence_at(self, at: float = None) -> List[evidence.Evidence]:
+        """
+        Retrieve all evidence that was valid and not yet revoked at a specific time, e.g. to audit who had access at
+        that time. Evidence revoked after that time is included.
+
+        Params:
+            at: the timestamp to retrieve the valid evidence for, defaults to now.
+
+        Returns:
+            A list of evidence objects valid at the given time.
         """
+        at = self.clock() if at is None else at
         return [
-            evidence
-            for evidence in self.evidence.values()
-            if evidence.receiver == party_id and evidence.valid_from <= time.time() <= evidence.valid_untill
+            self.evidence[identifier]
+            for identifier in self.validity_index.query(at)
+            if not self.was_revoked(identifier, at)
         ]
 
+    def was_revoked(self, evidence_id: int, at: float) -> bool:
+        """
+        Check if evidence was revoked at a specific time. Evidence revoked without a known time, like revocations
+        restored from a log without their time, counts as revoked at any time.
+
+        Params:
+            evidence_id: the ID of the evidence.
+            at: the timestamp to check the revocation at.
+
+        Returns:
+            True if the evidence was revoked at or before the given time, False otherwise.
+        """
+        if evidence_id not in self.revocations:
+            return False
+        revoked_at = self.revocation_times.get(evidence_id)
+        return revoked_at is None or revoked_at <= at
+
+    def select_evidence_by_party(
+        self, party_id: str, object_ids: List[str], actions: List[str], at: float = None
+    ) -> List[evidence.Evidence]:
+        """
+        Select the valid, non-revoked evidence of a party that permits all actions on all objects.
+        The evidence is checked against the revocations of this database only.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be selected.
+            object_ids: the identifiers of the objects.
+            actions: the actions to be performed on every object.
+            at: an optional timestamp to select the evidence that was valid at that time, defaults to now.
+
+        Returns:
+            A list of the evidence that permits the request.
+        """
+        batch = self.get_evidence_batch_by_party(party_id)
+        return batch.select_all(
+            object_ids,
+            actions,
+            revocations={db_name: self.revocations for db_name in batch.db_names},
+            at=self.clock() if at is None else at,
+        )
+
+    def get_revocations_since(self, sequence: int) -> Tuple[list, int]:
+        """
+        Poll the revocation feed of the database.
+
+        Params:
+            sequence: the sequence number returned by the previous poll, 0 to get all revocations.
+
+        Returns:
+            A tuple with the identifiers revoked after the sequence number, and the sequence number to poll from next.
+        """
+        return self.revocations.since(sequence), self.revocations.epoch
+
+    def is_revoked(self, evidence_id: int) -> bool:
+        """
+        Check if evidence is revoked.
+
+        Params:
+            evidence_id: the ID of the evidence.
+
+        Returns:
+            True if the evidence is revoked, False otherwise.
+        """
+        return evidence_id in self.revocations
+
+    def lookup(self, identifiers: List[int], revocation_ids: List[int] = ()) -> Tuple[list, set]:
+        """
+        Retrieve multiple pieces of evidence and check multiple pieces of evidence for revocation, in a single call.
+
+        Params:
+            identifiers: the IDs of the evidence to be retrieved.
+            revocation_ids: the IDs of the evidence to check for revocation.
+
+        Returns:
+            A tuple with a list of the evidence object or None for every identifier, and the set of revoked IDs.
+        """
+        return self.get_evidence_many(identifiers), {
+            evidence_id for evidence_id in revocation_ids if self.is_revoked(evidence_id)
+        }
+
     def revoke(self, evidence_id: int):
         """
         Revoke evidence by its ID.
@@ -84,7 +596,51 @@ class Database:
         Params:
             evidence_id: the ID of the evidence to be revoked.
         """
-        self.revocations.append(evidence_id)
+        if evidence_id not in self.revocations:
+            self.revocation_times[evidence_id] = self.clock()
+        self.revocations.add(evidence_id)
+        self._log(LOG_REVOKE, (evidence_id, self.revocation_times.get(evidence_id)))
+
+        # Revoked evidence is no longer relevant, so move it from the receiver index to the revoked index
+        # It stays in the validity index as well, for as-of queries before the revocation
+        evidence = self.evidence.get(evidence_id)
+        if evidence is not None and evidence.receiver in self.receiver_index:
+            self.receiver_index[evidence.receiver].remove(evidence_id)
+            self.revoked_index.setdefault(evidence.receiver, ValidityIndex()).add(
+                evidence_id, evidence.valid_from, evidence.valid_untill
+            )
+            self.batch_cache.pop(evidence.receiver, None)
+            self._notify(EVENT_REVOKE, [evidence.receiver])
+
+    def revoke_many(self, evidence_ids: List[int]):
+        """
+        Revoke multiple pieces of evidence by their IDs, updating the indexes once per batch.
+
+        Params:
+            evidence_ids: the IDs of the evidence to be revoked.
+        """
+        revoked_at = self.clock()
+        for evidence_id in evidence_ids:
+            if evidence_id not in self.revocations:
+                self.revocation_times[evidence_id] = revoked_at
+        self.revocations.add_many(evidence_ids)
+
+        revoked = {}
+        self._log_many(
+            LOG_REVOKE, [(evidence_id, self.revocation_times.get(evidence_id)) for evidence_id in evidence_ids]
+        )
+        for evidence_id in evidence_ids:
+            evidence = self.evidence.get(evidence_id)
+            if evidence is not None and evidence.receiver in self.receiver_index:
+                revoked.setdefault(evidence.receiver, []).append(
+                    (evidence_id, evidence.valid_from, evidence.valid_untill)
+                )
+
+        for receiver, windows in revoked.items():
+            self.receiver_index[receiver].remove_many(window[0] for window in windows)
+            self.revoked_index.setdefault(receiver, ValidityIndex()).add_many(windows)
+            self.batch_cache.pop(receiver, None)
+        self._notify(EVENT_REVOKE, revoked)
 
 
 class DatabaseBroker:
@@ -92,18 +648,129 @@ class DatabaseBroker:
     In reality, this system would likely be implemented using a DNS (like system) to route requests to the appropriate database.
     """
 
-    def __init__(self):
+    def __init__(self, cache: EvidenceCache = None, coalesce: bool = False):
+        """
+        Initialize the DatabaseBroker.
+
+        Params:
+            cache: an optional cache for the results of get_database_entry and get_evidence_by_party.
+                Cached results are invalidated when evidence for the same party is added to or revoked from the database.
+            coalesce: whether the services should collect the lookups of one resolution step and send them to every
+                AR as a single request, see LookupBatch.
+        """
+        self.cache = cache
+        self.coalesce = coalesce
+        self.instrumentation = None
+        self.counters = [
+            # LookupCounter objects of the active count_lookups blocks
+        ]
         self.databases = {}
+        self.routes = {
+            # party id: set of names of the databases holding non-revoked evidence for the party
+        }
+        self.route_listeners = {
+            # db_name: listener registered on the database to keep the routes up to date
+        }
+        self.positions = {
+            # db_name: registration position, to return evidence in the order in which the databases were added
+        }
+        self.registrations = count()
 
     def add_database(self, db_name: str, database: Database):
         """
         Add a database to the broker.
+        The routes of the database are indexed, and kept up to date as evidence is added and revoked.
+        A database registered under the same name before is replaced, including its routes.
 
         Params:
             db_name: the name of the database.
             database: the Database object to be added.
         """
+        if db_name in self.databases:
+            self._drop_routes(db_name)
+
         self.databases[db_name] = database
+        self.positions.setdefault(db_name, next(self.registrations))
+        if self.instrumentation is not None:
+            self.instrumentation.instrument(database, db_name)
+
+        listener = partial(self._update_routes, db_name)
+        database.add_listener(listener)
+        self.route_listeners[db_name] = listener
+        for party_id in database.get_parties():
+            self.routes.setdefault(party_id, set()).add(db_name)
+
+    def remove_database(self, db_name: str):
+        """
+        Remove a database from the broker, if it was added.
+
+        Params:
+            db_name: the name of the database.
+        """
+        if db_name in self.databases:
+            self._drop_routes(db_name)
+            del self.databases[db_name]
+            del self.positions[db_name]
+
+    def _drop_routes(self, db_name: str):
+        """
+        Stop routing to a database, removing its listener, its routes, its cached lookups and its instrumentation.
+
+        Params:
+            db_name: the name of the database.
+        """
+        self.databases[db_name].remove_listener(self.route_listeners.pop(db_name))
+        uninstrument(self.databases[db_name])
+        if self.cache is not None:
+            self.cache.clear(db_name)
+        for party_id in [party_id for party_id, db_names in self.routes.items() if db_name in db_names]:
+            self._remove_route(party_id, db_name)
+
+    def _remove_route(self, party_id: str, db_name: str):
+        """
+        Remove the route from a party to a database, if present.
+
+        Params:
+            party_id: the ID of the party.
+            db_name: the name of the database.
+        """
+        db_names = self.routes.get(party_id)
+        if db_names is not None:
+            db_names.discard(db_name)
+            if not db_names:
+                del self.routes[party_id]
+
+    def _update_routes(self, db_name: str, database: Database, event: str, receivers):
+        """
+        Update the routes after evidence was added to or revoked from a database, see Database.add_listener.
+        The cached lookups for the receivers in the database are invalidated as well.
+
+        Params:
+            db_name: the name under which the database was added.
+            database: the database the evidence was added to or revoked from.
+            event: EVENT_ADD or EVENT_REVOKE.
+            receivers: the receivers of the added or revoked evidence.
+        """
+        if self.cache is not None:
+            self.cache.invalidate(db_name, receivers)
+
+        for party_id in receivers:
+            if event == EVENT_ADD:
+                self.routes.setdefault(party_id, set()).add(db_name)
+            elif not database.has_evidence_for_party(party_id):
+                self._remove_route(party_id, db_name)
+
+    def get_routes(self, party_id: str) -> List[str]:
+        """
+        Retrieve the names of the databases holding non-revoked evidence for a party.
+
+        Params:
+            party_id: the ID of the party.
+
+        Returns:
+            A list of database names, in the order in which the databases were added.
+        """
+        return sorted(self.routes.get(party_id, ()), key=self.positions.__getitem__)
 
     def get_database(self, db_name: str) -> Database:
         """
@@ -117,6 +784,90 @@ class DatabaseBroker:
         """
         return self.databases.get(db_name, None)
 
+    def enable_instrumentation(self, instrumentation: Instrumentation = None) -> Instrumentation:
+        """
+        Record the calls to all databases of the broker, including the databases added later.
+        A broker that checks access itself also records the number of distinct ARs touched per access check.
+
+        Params:
+            instrumentation: the Instrumentation to record the calls in, defaults to a new one.
+
+        Returns:
+            The Instrumentation.
+        """
+        self.instrumentation = instrumentation or Instrumentation()
+        for db_name, database in self.databases.items():
+            self.instrumentation.instrument(database, db_name)
+        if hasattr(self, "has_access"):
+            self.instrumentation.instrument_access(self)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """
+        Stop recording the calls to the databases of the broker.
+        """
+        for database in self.databases.values():
+            uninstrument(database)
+        uninstrument(self)
+        self.instrumentation = None
+
+    @contextmanager
+    def count_lookups(self):
+        """
+        Count the round trips to the ARs and the entries fetched by the lookups of the broker within a with block.
+
+        Returns:
+            A context manager yielding the LookupCounter.
+        """
+        counter = LookupCounter()
+        self.counters.append(counter)
+        try:
+            yield counter
+        finally:
+            self.counters.remove(counter)
+
+    def _record(self, db_name: str, entries: int = 0):
+        """
+        Record a round trip to an AR in the active counters.
+
+        Params:
+            db_name: the name of the database held by the AR.
+            entries: the number of evidence entries received.
+        """
+        for counter in self.counters:
+            counter.record(db_name, entries)
+
+    def get_revocations_since(self, sequences: Dict[str, int]) -> Tuple[List[Tuple[str, int]], Dict[str, int]]:
+        """
+        Poll the revocation feeds of all databases at once.
+
+        Params:
+            sequences: a mapping from database name to the sequence number returned by the previous poll, databases
+                without a sequence number are polled from the start.
+
+        Returns:
+            A tuple with a list of (db_name, identifier) tuples of the new revocations, and a mapping from database
+            name to the sequence number to poll from next.
+        """
+        revocations = []
+        next_sequences = {}
+        for db_name, database in self.databases.items():
+            identifiers, next_sequences[db_name] = database.get_revocations_since(sequences.get(db_name, 0))
+            revocations.extend((db_name, identifier) for identifier in identifiers)
+        return revocations, next_sequences
+
+    def subscribe_revocations(self, from_start: bool = False) -> RevocationSubscription:
+        """
+        Subscribe to the revocations in all databases of the broker, including the databases added later.
+
+        Params:
+            from_start: whether the first poll returns the revocations made before subscribing as well.
+
+        Returns:
+            The RevocationSubscription.
+        """
+        return RevocationSubscription(self, from_start)
+
     def get_database_entry(self, db_name: str, identifier: int):
         """
         Retrieve a specific entry from a database by its identifier.
@@ -129,37 +880,168 @@ class DatabaseBroker:
             The evidence object if found, otherwise None.
         """
         database = self.get_database(db_name)
-        if database:
-            return database.get_evidence(identifier)
-        return None
+        if not database:
+            return None
+        if self.cache is None:
+            item = database.get_evidence(identifier)
+            self._record(db_name, 0 if item is None else 1)
+            return item
+
+        key = ("entry", db_name, identifier)
+        found, item = self.cache.get(key)
+        if not found:
+            item = database.get_evidence(identifier)
+            self._record(db_name, 0 if item is None else 1)
+            if item is None:
+                # Evidence may still be added under the identifier, so misses are not cached
+                return None
+            self.cache.put(key, item, [(db_name, item.receiver)])
+        return item
+
+    def lookup(self, db_name: str, identifiers: List[int], revocation_ids: List[int] = ()) -> Tuple[list, set]:
+        """
+        Retrieve multiple entries from a database and check multiple pieces of evidence for revocation, in a single
+        request to the AR. Entries found in the cache are not requested.
+
+        Params:
+            db_name: the name of the database.
+            identifiers: the IDs of the evidence to retrieve.
+            revocation_ids: the IDs of the evidence to check for revocation.
+
+        Returns:
+            A tuple with a list of the evidence object or None for every identifier, and the set of revoked IDs.
+        """
+        database = self.get_database(db_name)
+        if not database:
+            return [None] * len(identifiers), set()
+
+        entries = {}
+        if self.cache is not None:
+            for identifier in identifiers:
+                found, item = self.cache.get(("entry", db_name, identifier))
+                if found:
+                    entries[identifier] = item
+
+        missing = [identifier for identifier in dict.fromkeys(identifiers) if identifier not in entries]
+        if not missing and not revocation_ids:
+            return [entries[identifier] for identifier in identifiers], set()
+
+        fetched, revoked = database.lookup(missing, revocation_ids)
+        self._record(db_name, sum(item is not None for item in fetched))
+
+        for identifier, item in zip(missing, fetched):
+            entries[identifier] = item
+            if self.cache is not None and item is not None:
+                self.cache.put(("entry", db_name, identifier), item, [(db_name, item.receiver)])
+        return [entries[identifier] for identifier in identifiers], revoked
+
+    def get_entries(self, db_name: str, identifiers: List[int]) -> list:
+        """
+        Retrieve multiple entries from a database in a single request to the AR.
+
+        Params:
+            db_name: the name of the database.
+            identifiers: the IDs of the evidence to retrieve.
+
+        Returns:
+            A list with, for every identifier, the evidence object if found, otherwise None.
+        """
+        return self.lookup(db_name, identifiers)[0]
+
+    def is_revoked(self, db_name: str, identifier: int) -> bool:
+        """
+        Check if evidence is revoked in a database.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence.
+
+        Returns:
+            True if the evidence is revoked, False otherwise.
+        """
+        database = self.get_database(db_name)
+        if not database:
+            return False
+
+        self._record(db_name)
+        return database.is_revoked(identifier)
+
+    def get_evidence_by_party(self, db_name: str, party_id: str, at: float = None) -> List[evidence.Evidence]:
+        """
+        Retrieve all currently relevant evidence for a specific party from a specific database, see
+        Database.get_evidence_by_party.
+
+        Params:
+            db_name: the name of the database.
+            party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
+        Returns:
+            A list of the non-revoked evidence objects for the specified party.
+        """
+        database = self.get_database(db_name)
+        if not database:
+            return []
+        if self.cache is None:
+            evidences = database.get_evidence_by_party(party_id, at=at)
+            self._record(db_name, len(evidences))
+            return evidences
+
+        # Cache all non-revoked evidence for the party, so the validity can be evaluated at any time
+        key = ("party", db_name, party_id)
+        found, evidences = self.cache.get(key)
+        if not found:
+            evidences = list(database.get_evidence_batch_by_party(party_id).evidences)
+            self._record(db_name, len(evidences))
+            self.cache.put(key, evidences, [(db_name, party_id)])
+
+        at = database.clock() if at is None else at
+        return [item for item in evidences if item.valid_from <= at <= item.valid_untill]
 
-    def get_evidence_by_party(self, db_name: str, party_id: str) -> List[evidence.Evidence]:
+    def get_evidence_batch_by_party(self, db_name: str, party_id: str) -> EvidenceBatch:
         """
-        Retrieve all currently relevant evidence for a specific party from a specific database.
+        Retrieve all non-revoked evidence for a specific party from a specific database as a batch.
 
         Params:
             db_name: the name of the database.
             party_id: the ID of the party whose evidence is to be retrieved.
+
         Returns:
-            A list of evidence objects for the specified party.
+            An EvidenceBatch over the evidence for the specified party, empty if the database does not exist.
         """
         database = self.get_database(db_name)
-        if database:
-            return database.get_evidence_by_party(party_id)
-        return []
+        if not database:
+            return EvidenceBatch([])
+
+        batch = database.get_evidence_batch_by_party(party_id)
+        self._record(db_name, len(batch.evidences))
+        return batch
 
-    def get_all_evidence_by_party(self, party_id: str) -> List[Tuple[str, evidence.Evidence]]:
+    def get_all_evidence_by_party(self, party_id: str, at: float = None) -> List[Tuple[str, evidence.Evidence]]:
         """
         Retrieve all currently relevant evidence for a specific party across all databases.
 
         Params:
             party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
 
         Returns:
             A list of tuples, each containing the database name and the evidence object for the specified party.
         """
         all_evidence = []
-        for db_name, db in self.databases.items():
-            for ev in db.get_evidence_by_party(party_id):
+        for db_name in self.get_routes(party_id):
+            for ev in self.get_evidence_by_party(db_name, party_id, at=at):
                 all_evidence.append((db_name, ev))
         return all_evidence
+
+    def get_all_evidence_batches_by_party(self, party_id: str) -> List[Tuple[str, EvidenceBatch]]:
+        """
+        Retrieve all non-revoked evidence for a specific party across all databases, as a batch per database.
+        Only the databases holding evidence for the party are included.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be retrieved.
+
+        Returns:
+            A list of tuples, each containing the database name and the EvidenceBatch for the specified party.
+        """
+        return [(db_name, self.get_evidence_batch_by_party(db_name, party_id)) for db_name in self.get_routes(party_id)]
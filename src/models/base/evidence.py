@@ -1,4 +1,52 @@
 from typing import List
+from .interning import Interner
+
+# Shared action ids, so that the actions of compiled rules can be stored as a bitmask
+# The ids are shared by all databases in the process and never pruned, as compiled rules keep their masks. The masks
+# are integers of any size, but an EvidenceBatch only stores the first 64 ids in its columns: once 64 distinct actions
+# were interned in the process, requests for a later action are evaluated on the rules directly, see mask_all.
+ACTIONS = Interner()
+
+
+def action_mask(actions: List[str]) -> int:
+    """
+    Get the bitmask of a list of actions, as used by compiled rules.
+
+    Params:
+        actions: the actions to include in the mask.
+
+    Returns:
+        The bitmask of the actions.
+    """
+    mask = 0
+    for action in actions:
+        mask |= 1 << ACTIONS.intern(action)
+    return mask
+
+
+class CompiledRule:
+    """
+    Compiled form of a Rule, allowing constant time permission checks.
+    Objects are held in a frozenset, actions as a bitmask over the interned action ids.
+    """
+
+    def __init__(self, object_ids: List[str], actions: List[str]):
+        self.object_ids = frozenset(object_ids)
+        self.action_mask = action_mask(actions)
+
+    def covers(self, object_id: str, action: str) -> bool:
+        """
+        Check if the rule permits an action on an object.
+
+        Params:
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+
+        Returns:
+            True if the rule permits the action on the object, False otherwise.
+        """
+        action_id = ACTIONS.lookup(action)
+        return action_id is not None and (self.action_mask >> action_id) & 1 == 1 and object_id in self.object_ids
 
 
 class Rule:
@@ -15,6 +63,36 @@ class Rule:
         """
         self.object_ids = object_ids
         self.actions = actions
+        self._compiled = None
+
+    @property
+    def compiled(self) -> CompiledRule:
+        """
+        The compiled form of the rule, created on first use.
+        Rules are treated as immutable once they have been checked.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledRule(self.object_ids, self.actions)
+        return self._compiled
+
+    def covers(self, object_id: str, action: str) -> bool:
+        """
+        Check if the rule permits an action on an object.
+
+        Params:
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+
+        Returns:
+            True if the rule permits the action on the object, False otherwise.
+        """
+        return self.compiled.covers(object_id, action)
+
+    def __getstate__(self):
+        # The action ids of the compiled rule are only meaningful within this process
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        return state
 
 
 class Evidence:
@@ -52,3 +130,39 @@ class Evidence:
         self.receiver = receiver
         self.rules = rules
         self.db_name = db_name
+
+    def covers(self, object_id: str, action: str) -> bool:
+        """
+        Check if any of the rules of the evidence permits an action on an object.
+
+        Params:
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+
+        Returns:
+            True if the evidence permits the action on the object, False otherwise.
+        """
+        return any(rule.covers(object_id, action) for rule in self.rules)
+
+    def covers_all(self, object_ids: List[str], actions: List[str]) -> bool:
+        """
+        Check if the rules of the evidence together permit all actions on all objects.
+        The actions permitted on an object are combined over all rules containing that object.
+
+        Params:
+            object_ids: the identifiers of the objects.
+            actions: the actions to be performed on every object.
+
+        Returns:
+            True if every action is permitted on every object, False otherwise.
+        """
+        required = action_mask(actions)
+        for object_id in object_ids:
+            permitted = 0
+            for rule in self.rules:
+                compiled = rule.compiled
+                if object_id in compiled.object_ids:
+                    permitted |= compiled.action_mask
+            if required & ~permitted:
+                return False
+        return True
@@ -0,0 +1,48 @@
+from typing import List, Tuple
+
+
+class RevocationSubscription:
+    """
+    Subscription to the revocation feeds of all databases of a DatabaseBroker, see
+    DatabaseBroker.subscribe_revocations. Every poll only returns the revocations made since the previous poll,
+    so a cache can be invalidated in time proportional to the number of new revocations.
+    """
+
+    def __init__(self, broker, from_start: bool = False):
+        """
+        Initialize the subscription.
+
+        Params:
+            broker: the DatabaseBroker holding the databases.
+            from_start: whether the first poll returns the revocations made before subscribing as well.
+        """
+        self.broker = broker
+        self.positions = {
+            # db_name: (database, sequence number to poll from next)
+        }
+        if not from_start:
+            self.positions = {
+                db_name: (database, database.revocations.epoch) for db_name, database in broker.databases.items()
+            }
+
+    def poll(self) -> List[Tuple[str, int]]:
+        """
+        Get the revocations made since the previous poll. A database that was replaced under the same name is
+        polled from the start.
+
+        Returns:
+            A list of (db_name, identifier) tuples, in the order of the revocations within every database.
+        """
+        sequences = {
+            db_name: sequence
+            for db_name, (database, sequence) in self.positions.items()
+            if self.broker.databases.get(db_name) is database
+        }
+        revocations, sequences = self.broker.get_revocations_since(sequences)
+        self.positions = {
+            db_name: (self.broker.databases[db_name], sequence) for db_name, sequence in sequences.items()
+        }
+        return revocations
+
+    def __iter__(self):
+        return iter(self.poll())
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import List
+
+
+class ValidityIndex:
+    """
+    Index over the validity windows of evidence, using sorted arrays of start and end times.
+    A lookup only visits the evidence that has started or the evidence that has not yet expired
+    at the requested time, whichever of the two is smaller.
+    """
+
+    def __init__(self):
+        self.starts = [
+            # (valid_from, sequence, identifier), sorted
+        ]
+        self.ends = [
+            # (valid_untill, sequence, identifier), sorted
+        ]
+        self.windows = {
+            # identifier: (valid_from, valid_untill, sequence)
+        }
+        self.sequence = 0
+
+    def add(self, identifier, valid_from, valid_untill):
+        """
+        Add the validity window of a piece of evidence to the index.
+
+        Params:
+            identifier: the identifier of the evidence.
+            valid_from: the start time of the evidence validity period in seconds.
+            valid_untill: the end time of the evidence validity period in seconds.
+        """
+        if identifier in self.windows:
+            self.remove(identifier)
+
+        self.sequence += 1
+        self.windows[identifier] = (valid_from, valid_untill, self.sequence)
+        insort(self.starts, (valid_from, self.sequence, identifier))
+        insort(self.ends, (valid_untill, self.sequence, identifier))
+
+    def add_many(self, windows):
+        """
+        Add the validity windows of multiple pieces of evidence to the index, sorting the arrays only once.
+
+        Params:
+            windows: an iterable of (identifier, valid_from, valid_untill) tuples.
+        """
+        windows = {identifier: (valid_from, valid_untill) for identifier, valid_from, valid_untill in windows}
+
+        # Remove existing windows first, while the arrays are still sorted
+        for identifier in windows:
+            if identifier in self.windows:
+                self.remove(identifier)
+
+        for identifier, (valid_from, valid_untill) in windows.items():
+            self.sequence += 1
+            self.windows[identifier] = (valid_from, valid_untill, self.sequence)
+            self.starts.append((valid_from, self.sequence, identifier))
+            self.ends.append((valid_untill, self.sequence, identifier))
+
+        self.starts.sort()
+        self.ends.sort()
+
+    def remove(self, identifier):
+        """
+        Remove the validity window of a piece of evidence from the index, if present.
+
+        Params:
+            identifier: the identifier of the evidence.
+        """
+        window = self.windows.pop(identifier, None)
+        if window is None:
+            return
+
+        valid_from, valid_untill, sequence = window
+        del self.starts[bisect_left(self.starts, (valid_from, sequence, identifier))]
+        del self.ends[bisect_left(self.ends, (valid_untill, sequence, identifier))]
+
+    def remove_many(self, identifiers):
+        """
+        Remove the validity windows of multiple pieces of evidence from the index, rebuilding the arrays only once.
+
+        Params:
+            identifiers: an iterable of identifiers of the evidence.
+        """
+        removed = {identifier for identifier in identifiers if self.windows.pop(identifier, None) is not None}
+        if removed:
+            self.starts = [entry for entry in self.starts if entry[2] not in removed]
+            self.ends = [entry for entry in self.ends if entry[2] not in removed]
+
+    def query(self, at: float) -> List:
+        """
+        Retrieve the identifiers of the evidence that is valid at the given time.
+
+        Params:
+            at: the timestamp to check the validity at.
+
+        Returns:
+            A list of identifiers, in the order in which they were added.
+        """
+        started = bisect_right(self.starts, (at, float("inf")))
+        first_unexpired = bisect_left(self.ends, (at,))
+
+        if started <= len(self.ends) - first_unexpired:
+            matches = [entry for entry in self.starts[:started] if self.windows[entry[2]][1] >= at]
+        else:
+            matches = [entry for entry in self.ends[first_unexpired:] if self.windows[entry[2]][0] <= at]
+
+        matches.sort(key=lambda entry: entry[1])
+        return [entry[2] for entry in matches]
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.windows
+
+    def __len__(self) -> int:
+        return len(self.windows)
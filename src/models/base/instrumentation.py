@@ -0,0 +1,255 @@
+import json
+import time
+from functools import wraps
+
+# Methods of a database that are instrumented, with a function counting the evidence items in their result
+INSTRUMENTED_METHODS = {
+    "add_evidence": None,
+    "add_evidence_many": None,
+    "get_evidence": lambda result: 0 if result is None else 1,
+    "get_evidence_many": lambda result: sum(item is not None for item in result),
+    "get_evidence_by_party": len,
+    "get_evidence_batch_by_party": lambda result: len(result.evidences),
+    "get_evidence_at": len,
+    "select_evidence_by_party": len,
+    "lookup": lambda result: sum(item is not None for item in result[0]),
+    "is_revoked": None,
+    "revoke": None,
+    "revoke_many": None,
+    "get_parties": None,
+    "has_evidence_for_party": None,
+    # Oracle databases
+    "has_access": None,
+    "has_bridges_to": None,
+    "get_bridged_nodes": None,
+    "_reachable_in_graph": len,
+    "_build_recursive_graph": None,
+}
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with HDR-style buckets: every power of two is split into a fixed number of linear
+    sub-buckets, so the relative error of a recorded value is bounded while the number of buckets stays small.
+    """
+
+    def __init__(self, significant_bits: int = 3):
+        """
+        Initialize the histogram.
+
+        Params:
+            significant_bits: the number of bits of a value kept in its bucket, 3 bits bound the error to 12.5%.
+        """
+        self.significant_bits = significant_bits
+        self.buckets = {
+            # lower bound of the bucket in nanoseconds: number of values
+        }
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, nanoseconds: int):
+        """
+        Record a latency.
+
+        Params:
+            nanoseconds: the latency in nanoseconds.
+        """
+        shift = max(nanoseconds.bit_length() - self.significant_bits - 1, 0)
+        bucket = (nanoseconds >> shift) << shift
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+        self.count += 1
+        self.total += nanoseconds
+        self.min = nanoseconds if self.min is None else min(self.min, nanoseconds)
+        self.max = nanoseconds if self.max is None else max(self.max, nanoseconds)
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Get the lower bound of the bucket holding a percentile of the recorded latencies.
+
+        Params:
+            percentile: the percentile, between 0 and 100.
+
+        Returns:
+            The latency in nanoseconds, or 0 if nothing was recorded.
+        """
+        remaining = self.count * percentile / 100
+        for bucket in sorted(self.buckets):
+            remaining -= self.buckets[bucket]
+            if remaining <= 0:
+                return bucket
+        return self.max or 0
+
+    def as_dict(self) -> dict:
+        """
+        Get a summary of the histogram.
+
+        Returns:
+            A dict with the count, minimum, mean, percentiles and maximum in nanoseconds, and the buckets.
+        """
+        return {
+            "count": self.count,
+            "min": self.min or 0,
+            "mean": self.total // self.count if self.count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max or 0,
+            "buckets": {str(bucket): self.buckets[bucket] for bucket in sorted(self.buckets)},
+        }
+
+
+class Instrumentation:
+    """
+    Records the calls to instrumented databases: the number of calls and a latency histogram per method per database,
+    the number of evidence items retrieved, and the number of distinct ARs touched per access check.
+    Objects are instrumented by wrapping their methods on the instance, so objects without instrumentation do not pay
+    for it at all.
+    """
+
+    def __init__(self, clock=time.perf_counter_ns):
+        """
+        Initialize the instrumentation.
+
+        Params:
+            clock: a function returning the current time in nanoseconds.
+        """
+        self.clock = clock
+        self.calls = {
+            # db_name: {method: number of calls}
+        }
+        self.latencies = {
+            # db_name: {method: LatencyHistogram}
+        }
+        self.scanned = {
+            # db_name: number of evidence items retrieved
+        }
+        self.ars_per_check = {
+            # number of distinct ARs touched: number of access checks
+        }
+        self.touched = None  # Names of the databases touched by the current access check
+        self.depth = 0  # Depth of nested has_access calls
+
+    def instrument(self, database, db_name: str = None):
+        """
+        Instrument the methods of a database, see INSTRUMENTED_METHODS.
+
+        Params:
+            database: the database, or a proxy of a database.
+            db_name: the name to record the calls under, defaults to the name of the database.
+        """
+        db_name = db_name or database.name
+        uninstrument(database)
+        for method, count_items in INSTRUMENTED_METHODS.items():
+            if hasattr(database, method):
+                setattr(database, method, self._wrap(db_name, method, getattr(database, method), count_items))
+
+    def _wrap(self, db_name: str, method: str, function, count_items):
+        calls = self.calls.setdefault(db_name, {})
+        latencies = self.latencies.setdefault(db_name, {})
+        calls.setdefault(method, 0)
+        histogram = latencies.setdefault(method, LatencyHistogram())
+        self.scanned.setdefault(db_name, 0)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = self.clock()
+            result = function(*args, **kwargs)
+            histogram.record(self.clock() - start)
+
+            calls[method] += 1
+            if count_items is not None:
+                self.scanned[db_name] += count_items(result)
+            if self.touched is not None:
+                self.touched.add(db_name)
+            return result
+
+        wrapper.instrumented = True
+        return wrapper
+
+    def instrument_access(self, checker):
+        """
+        Instrument the has_access method of a service or broker, to record the number of distinct ARs touched per
+        access check. Recursive calls are counted as part of the outermost check.
+
+        Params:
+            checker: the object with the has_access method.
+        """
+        uninstrument(checker, ["has_access"])
+        function = checker.has_access
+
+        @wraps(function)
+        def has_access(*args, **kwargs):
+            if self.depth == 0:
+                self.touched = set()
+            self.depth += 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.depth -= 1
+                if self.depth == 0:
+                    touched = len(self.touched)
+                    self.ars_per_check[touched] = self.ars_per_check.get(touched, 0) + 1
+                    self.touched = None
+
+        has_access.instrumented = True
+        checker.has_access = has_access
+
+    def snapshot(self) -> dict:
+        """
+        Get the recorded values.
+
+        Returns:
+            A dict with, per database, the calls and latencies per method and the evidence items retrieved, and the
+            distribution of the number of distinct ARs touched per access check.
+        """
+        checks = sum(self.ars_per_check.values())
+        return {
+            "databases": {
+                db_name: {
+                    "scanned": self.scanned[db_name],
+                    "methods": {
+                        method: {"calls": calls, "latency_ns": self.latencies[db_name][method].as_dict()}
+                        for method, calls in methods.items()
+                        if calls
+                    },
+                }
+                for db_name, methods in self.calls.items()
+            },
+            "access_checks": {
+                "count": checks,
+                "mean_ars_touched": (
+                    sum(touched * count for touched, count in self.ars_per_check.items()) / checks if checks else 0
+                ),
+                "ars_touched": {str(touched): self.ars_per_check[touched] for touched in sorted(self.ars_per_check)},
+            },
+        }
+
+    def to_json(self) -> str:
+        """
+        Get the recorded values as JSON, see snapshot.
+
+        Returns:
+            The snapshot as a JSON string.
+        """
+        return json.dumps(self.snapshot(), indent=4)
+
+
+def uninstrument(instance, methods=None):
+    """
+    Remove the instrumentation from the methods of an object, restoring the methods of its class, or the locked
+    methods of a thread-safe object.
+
+    Params:
+        instance: the instrumented object.
+        methods: the names of the methods, defaults to all instrumented methods.
+    """
+    for method in methods or list(vars(instance)):
+        function = vars(instance).get(method)
+        if getattr(function, "instrumented", False):
+            if getattr(function.__wrapped__, "locked", False):
+                setattr(instance, method, function.__wrapped__)
+            else:
+                delattr(instance, method)
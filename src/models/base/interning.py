@@ -0,0 +1,69 @@
+from typing import Hashable, List
+
+
+class Interner:
+    """Maps values (e.g. party, object or action identifiers) to dense integer ids and back."""
+
+    def __init__(self):
+        self.ids = {
+            # value: integer id
+        }
+        self.values = [
+            # the values, indexed by their integer id
+        ]
+
+    def intern(self, value: Hashable) -> int:
+        """
+        Get the integer id of a value, assigning a new id if the value was not seen before.
+
+        Params:
+            value: the value to intern.
+
+        Returns:
+            The integer id of the value.
+        """
+        identifier = self.ids.get(value)
+        if identifier is None:
+            identifier = len(self.values)
+            self.ids[value] = identifier
+            self.values.append(value)
+        return identifier
+
+    def intern_many(self, values: List[Hashable]) -> List[int]:
+        """
+        Get the integer ids of multiple values, assigning new ids where needed.
+
+        Params:
+            values: the values to intern.
+
+        Returns:
+            A list with the integer id of every value.
+        """
+        return [self.intern(value) for value in values]
+
+    def lookup(self, value: Hashable) -> int:
+        """
+        Get the integer id of a value, without assigning a new one.
+
+        Params:
+            value: the value to look up.
+
+        Returns:
+            The integer id of the value, or None if the value was never interned.
+        """
+        return self.ids.get(value)
+
+    def value(self, identifier: int) -> Hashable:
+        """
+        Get the value belonging to an integer id.
+
+        Params:
+            identifier: the integer id.
+
+        Returns:
+            The value that was interned under the id.
+        """
+        return self.values[identifier]
+
+    def __len__(self) -> int:
+        return len(self.values)
@@ -0,0 +1,186 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterable
+
+
+class ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or a single writer. Waiting writers are preferred over new readers, so
+    writers are not starved under a constant read load.
+    The lock is reentrant: a reader may read again, and a writer may write or read again. A reader can not upgrade to
+    a writer, as two readers upgrading at once would deadlock.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())  # Guards the writer fields, readers only wait on it
+        self.waiting_writers = 0
+        self.writer = None  # Identifier of the thread holding the write lock
+        self.writes = 0  # Depth of the write lock of the writer
+        self.reads = {
+            # thread identifier: depth of the read lock of the thread
+        }
+        self.callbacks = [
+            # callables to call once the writer released the write lock
+        ]
+
+    def __getstate__(self):
+        # A copy of a lock starts unlocked
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    def acquire_read(self):
+        """
+        Acquire the lock for reading, waiting for the writer and the waiting writers.
+        Readers register themselves before checking for writers, and writers check for readers after announcing
+        themselves, so an uncontended read does not need to take the mutex of the condition.
+        """
+        ident = threading.get_ident()
+        depth = self.reads.get(ident, 0)
+        if depth or self.writer == ident:
+            # Nested reads must not wait for waiting writers, as those wait for this thread
+            self.reads[ident] = depth + 1
+            return
+
+        self.reads[ident] = 1
+        # Check for waiting writers first: a writer sets itself as the writer before it stops waiting
+        if not self.waiting_writers and self.writer is None:
+            return
+
+        # A writer is active or waiting, back off and wait for it
+        with self.condition:
+            del self.reads[ident]
+            self.condition.notify_all()
+            while self.writer is not None or self.waiting_writers:
+                self.condition.wait()
+            self.reads[ident] = 1
+
+    def release_read(self):
+        """
+        Release the lock for reading.
+        """
+        ident = threading.get_ident()
+        depth = self.reads[ident] - 1
+        if depth:
+            self.reads[ident] = depth
+            return
+
+        del self.reads[ident]
+        if self.waiting_writers and self.writer != ident:
+            with self.condition:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Acquire the lock for writing, waiting for the readers and the writer.
+        """
+        ident = threading.get_ident()
+        if self.writer == ident:
+            self.writes += 1
+            return
+        if ident in self.reads:
+            raise RuntimeError("A read lock can not be upgraded to a write lock.")
+
+        with self.condition:
+            self.waiting_writers += 1
+            try:
+                while self.writer is not None or self.reads:
+                    self.condition.wait()
+                # Set the writer while still waiting, so a reader always sees either the writer or a waiting writer
+                self.writer = ident
+                self.writes = 1
+            finally:
+                self.waiting_writers -= 1
+
+    def release_write(self):
+        """
+        Release the lock for writing, and call the callbacks registered with after_write once it is released.
+        """
+        self.writes -= 1
+        if self.writes:
+            return
+
+        callbacks, self.callbacks = self.callbacks, []
+        with self.condition:
+            self.writer = None
+            self.condition.notify_all()
+
+        for callback in callbacks:
+            callback()
+
+    @contextmanager
+    def read(self):
+        """
+        Hold the lock for reading within a with block.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """
+        Hold the lock for writing within a with block.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def is_writing(self) -> bool:
+        """
+        Check if the current thread holds the lock for writing.
+
+        Returns:
+            True if the current thread is the writer, False otherwise.
+        """
+        return self.writer == threading.get_ident()
+
+    def after_write(self, callback: Callable):
+        """
+        Call a callback once the current thread released the lock for writing, or right away if it is not writing.
+        Used to notify listeners without holding the lock, as listeners may read from other locked objects.
+
+        Params:
+            callback: a callable without arguments.
+        """
+        if self.is_writing():
+            self.callbacks.append(callback)
+        else:
+            callback()
+
+
+def _locked(acquire: Callable, release: Callable, function: Callable) -> Callable:
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        acquire()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            release()
+
+    wrapper.locked = True
+    wrapper.instrumented = False
+    return wrapper
+
+
+def lock_methods(instance, lock: ReadWriteLock, read_methods: Iterable[str], write_methods: Iterable[str]):
+    """
+    Wrap methods of an object to hold a lock, by wrapping them on the instance, so objects without a lock do not pay
+    for it at all.
+
+    Params:
+        instance: the object.
+        lock: the lock to hold.
+        read_methods: the names of the methods that only read the object, and hold the lock for reading.
+        write_methods: the names of the methods that change the object, and hold the lock for writing.
+    """
+    for method in read_methods:
+        setattr(instance, method, _locked(lock.acquire_read, lock.release_read, getattr(instance, method)))
+    for method in write_methods:
+        setattr(instance, method, _locked(lock.acquire_write, lock.release_write, getattr(instance, method)))
@@ -0,0 +1,122 @@
+class LookupCounter:
+    """
+    Counts the requests the DatabaseBroker sends to the ARs, see DatabaseBroker.count_lookups.
+    Every lookup the broker sends to an AR counts as one round trip, and every evidence it receives as one entry.
+    """
+
+    def __init__(self):
+        self.round_trips = 0
+        self.entries_fetched = 0
+        self.per_database = {
+            # db_name: {"round_trips": ..., "entries_fetched": ...}
+        }
+
+    def record(self, db_name: str, entries: int = 0):
+        """
+        Record a round trip to an AR.
+
+        Params:
+            db_name: the name of the database held by the AR.
+            entries: the number of evidence entries received.
+        """
+        self.round_trips += 1
+        self.entries_fetched += entries
+
+        counts = self.per_database.setdefault(db_name, {"round_trips": 0, "entries_fetched": 0})
+        counts["round_trips"] += 1
+        counts["entries_fetched"] += entries
+
+    def as_dict(self) -> dict:
+        """
+        Get the counts.
+
+        Returns:
+            A dict with the total number of round trips and entries fetched, and the counts per database.
+        """
+        return {
+            "round_trips": self.round_trips,
+            "entries_fetched": self.entries_fetched,
+            "per_database": {db_name: dict(counts) for db_name, counts in self.per_database.items()},
+        }
+
+
+class LookupBatch:
+    """
+    Collects the entry and revocation lookups of one resolution step, and sends them to every AR as a single
+    request with DatabaseBroker.lookup when flushed.
+    """
+
+    def __init__(self, broker):
+        """
+        Initialize the batch.
+
+        Params:
+            broker: the DatabaseBroker to send the lookups through.
+        """
+        self.broker = broker
+        self.pending = {
+            # db_name: (list of entry identifiers, list of identifiers to check for revocation)
+        }
+        self.entries = {
+            # (db_name, identifier): evidence or None
+        }
+        self.revoked = set(
+            # (db_name, identifier) of the revoked evidence
+        )
+
+    def get_entry(self, db_name: str, identifier: int):
+        """
+        Add the lookup of an entry to the batch.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence.
+        """
+        self.pending.setdefault(db_name, ([], []))[0].append(identifier)
+
+    def check_revoked(self, db_name: str, identifier: int):
+        """
+        Add a revocation check to the batch.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence.
+        """
+        self.pending.setdefault(db_name, ([], []))[1].append(identifier)
+
+    def flush(self):
+        """
+        Send the pending lookups, with a single request per AR.
+        """
+        for db_name, (identifiers, revocation_ids) in self.pending.items():
+            entries, revoked = self.broker.lookup(db_name, identifiers, revocation_ids)
+            for identifier, entry in zip(identifiers, entries):
+                self.entries[(db_name, identifier)] = entry
+            self.revoked.update((db_name, identifier) for identifier in revoked)
+        self.pending = {}
+
+    def entry(self, db_name: str, identifier: int):
+        """
+        Get the result of an entry lookup, after the batch was flushed.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence.
+
+        Returns:
+            The evidence object if found, otherwise None.
+        """
+        return self.entries.get((db_name, identifier))
+
+    def is_revoked(self, db_name: str, identifier: int) -> bool:
+        """
+        Get the result of a revocation check, after the batch was flushed.
+
+        Params:
+            db_name: the name of the database.
+            identifier: the ID of the evidence.
+
+        Returns:
+            True if the evidence is revoked, False otherwise.
+        """
+        return (db_name, identifier) in self.revoked
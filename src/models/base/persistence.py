@@ -0,0 +1,279 @@
+import mmap
+import os
+import pickle
+import struct
+import threading
+from array import array
+
+LOG_ADD = 1
+LOG_REVOKE = 2
+RECORD_HEADER = struct.Struct("<BI")  # operation, length of the pickled payload
+
+SNAPSHOT_MAGIC = b"DMSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQ")  # magic, length of the pickled metadata
+
+
+class SnapshotEvidenceStore:
+    """
+    Evidence store used in place of the evidence store of the database, when the database is restored from a snapshot.
+    The evidence of the snapshot stays in the memory-mapped file and is only unpickled when it is first retrieved.
+    From then on it is kept in the store of the database, like the evidence added after the snapshot, so every piece
+    of evidence is unpickled at most once.
+    """
+
+    def __init__(self, mapped: mmap.mmap = None, metadata: dict = None, data_offset: int = 0, store=None):
+        """
+        Initialize the store.
+
+        Params:
+            mapped: the memory-mapped snapshot file.
+            metadata: the metadata of the snapshot, with the identifier, receiver, validity and location per row.
+            data_offset: the position in the file where the pickled evidence starts.
+            store: the evidence store of the database, defaults to a dict.
+        """
+        self.mapped = mapped
+        self.data_offset = data_offset
+        self.metadata = metadata or {
+            "identifiers": [],
+            "receivers": [],
+            "valid_from": array("d"),
+            "valid_untill": array("d"),
+            "offsets": array("Q"),
+            "lengths": array("Q"),
+        }
+        self.rows = dict(zip(self.metadata["identifiers"], range(len(self.metadata["identifiers"]))))
+        self.store = {} if store is None else store  # Evidence added after the snapshot, or retrieved from it
+        self.loaded = 0  # Number of pieces of evidence of the snapshot in the store
+        self.lock = threading.Lock()  # Guards the unpickling, as concurrent readers may retrieve the same evidence
+
+    def raw(self, identifier) -> bytes:
+        """
+        Get the pickled form of a piece of evidence, without unpickling evidence from the snapshot.
+
+        Params:
+            identifier: the identifier of the evidence.
+
+        Returns:
+            The pickled evidence.
+        """
+        row = self.rows.get(identifier)
+        if row is None:
+            return pickle.dumps(self.store[identifier], protocol=pickle.HIGHEST_PROTOCOL)
+
+        offset = self.data_offset + self.metadata["offsets"][row]
+        return self.mapped[offset : offset + self.metadata["lengths"][row]]
+
+    def __setitem__(self, identifier, evidence):
+        if identifier in self:
+            raise ValueError(f"Evidence with ID {identifier} already exists.")
+        self.store[identifier] = evidence
+
+    def __getitem__(self, identifier):
+        if identifier not in self.store:
+            if identifier not in self.rows:
+                raise KeyError(identifier)
+            with self.lock:
+                if identifier not in self.store:
+                    self.store[identifier] = pickle.loads(self.raw(identifier))
+                    self.loaded += 1
+        return self.store[identifier]
+
+    def get(self, identifier, default=None):
+        if identifier not in self:
+            return default
+        return self[identifier]
+
+    def values(self):
+        for identifier in self:
+            yield self[identifier]
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.rows or identifier in self.store
+
+    def __iter__(self):
+        yield from self.metadata["identifiers"]
+        yield from (identifier for identifier in self.store if identifier not in self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self.store) - self.loaded
+
+
+class EvidenceJournal:
+    """
+    Persists the operations on a database to an append-only binary log, with periodic compact snapshots.
+    On a restart the snapshot is memory-mapped and only the tail of the log, written after the snapshot, is replayed.
+    """
+
+    def __init__(self, directory: str, name: str):
+        """
+        Initialize the journal, opening (or creating) its log file.
+
+        Params:
+            directory: the directory to store the log and snapshot in.
+            name: the name of the database, used for the file names.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, f"{name}.log")
+        self.snapshot_path = os.path.join(directory, f"{name}.snapshot")
+
+        self.log = open(self.log_path, "ab")
+        self.pending = 0  # Number of operations logged since the last snapshot
+        self.snapshot_file = None
+        self.mapped = None
+
+    def append(self, operation: int, payload):
+        """
+        Append an operation to the log.
+
+        Params:
+            operation: LOG_ADD or LOG_REVOKE.
+            payload: the evidence object for LOG_ADD, the (identifier, revocation time) tuple for LOG_REVOKE.
+        """
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        self.log.write(RECORD_HEADER.pack(operation, len(data)) + data)
+        self.log.flush()
+        self.pending += 1
+
+    def append_many(self, operation: int, payloads):
+        """
+        Append multiple operations of the same kind to the log, with a single write.
+
+        Params:
+            operation: LOG_ADD or LOG_REVOKE.
+            payloads: the payloads of the operations, see append.
+        """
+        records = []
+        for payload in payloads:
+            data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+            records.append(RECORD_HEADER.pack(operation, len(data)))
+            records.append(data)
+
+        self.log.write(b"".join(records))
+        self.log.flush()
+        self.pending += len(records) // 2
+
+    def replay(self):
+        """
+        Iterate over the operations in the log. A record that was only partially written, e.g. by a crash during an
+        append, is ignored and truncated once the log is replayed, so new records are appended after the last
+        complete record.
+
+        Returns:
+            An iterator of (operation, payload) tuples.
+        """
+        with open(self.log_path, "rb") as log:
+            data = log.read()
+
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            operation, length = RECORD_HEADER.unpack_from(data, position)
+            if position + RECORD_HEADER.size + length > len(data):
+                break
+
+            position += RECORD_HEADER.size
+            self.pending += 1
+            yield operation, pickle.loads(data[position : position + length])
+            position += length
+
+        if position < len(data):
+            self.log.truncate(position)
+            self.log.flush()
+
+    def load_snapshot(self, store=None):
+        """
+        Memory-map the snapshot, if it exists.
+
+        Params:
+            store: the evidence store of the database to keep the retrieved evidence in, see SnapshotEvidenceStore.
+
+        Returns:
+            A tuple with the SnapshotEvidenceStore and the snapshot metadata, or (None, None) without a snapshot.
+        """
+        if not os.path.exists(self.snapshot_path):
+            return None, None
+
+        if self.mapped is not None:
+            self.mapped.close()
+            self.snapshot_file.close()
+
+        self.snapshot_file = open(self.snapshot_path, "rb")
+        self.mapped = mmap.mmap(self.snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, metadata_length = SNAPSHOT_HEADER.unpack_from(self.mapped, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"File {self.snapshot_path} is not a snapshot.")
+
+        data_offset = SNAPSHOT_HEADER.size + metadata_length
+        metadata = pickle.loads(self.mapped[SNAPSHOT_HEADER.size : data_offset])
+        return SnapshotEvidenceStore(self.mapped, metadata, data_offset, store), metadata
+
+    def write_snapshot(self, evidence, revocations, revocation_times: dict, id_counter: int):
+        """
+        Write a compact snapshot of the database and truncate the log.
+        The snapshot is written to a temporary file first, so a crash never leaves a partial snapshot.
+
+        Params:
+            evidence: the evidence store of the database.
+            revocations: the revoked identifiers.
+            revocation_times: the time of every revocation with a known time, by identifier.
+            id_counter: the current identifier counter of the database.
+        """
+        metadata = {
+            "identifiers": [],
+            "receivers": [],
+            "valid_from": array("d"),
+            "valid_untill": array("d"),
+            "offsets": array("Q"),
+            "lengths": array("Q"),
+            "revocations": list(revocations),
+            "revocation_times": dict(revocation_times),
+            "id_counter": id_counter,
+        }
+        blobs = []
+        offset = 0
+        for identifier in evidence:
+            if isinstance(evidence, SnapshotEvidenceStore) and identifier in evidence.rows:
+                # Copy evidence from the previous snapshot without unpickling it
+                row = evidence.rows[identifier]
+                receiver = evidence.metadata["receivers"][row]
+                valid_from = evidence.metadata["valid_from"][row]
+                valid_untill = evidence.metadata["valid_untill"][row]
+                blob = evidence.raw(identifier)
+            else:
+                item = evidence[identifier]
+                receiver, valid_from, valid_untill = item.receiver, item.valid_from, item.valid_untill
+                blob = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+
+            metadata["identifiers"].append(identifier)
+            metadata["receivers"].append(receiver)
+            metadata["valid_from"].append(valid_from)
+            metadata["valid_untill"].append(valid_untill)
+            metadata["offsets"].append(offset)
+            metadata["lengths"].append(len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+
+        header = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "wb") as snapshot:
+            snapshot.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(header)))
+            snapshot.write(header)
+            for blob in blobs:
+                snapshot.write(blob)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+
+        self.log.truncate(0)
+        self.log.flush()
+        self.pending = 0
+
+    def close(self):
+        """
+        Close the log and the memory-mapped snapshot.
+        """
+        self.log.close()
+        if self.mapped is not None:
+            self.mapped.close()
+            self.snapshot_file.close()
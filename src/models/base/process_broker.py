@@ -0,0 +1,115 @@
+import multiprocessing
+import threading
+from typing import List, Tuple
+
+from .database import Database
+from .remote import RemoteDatabase, RemoteDatabaseBroker, RequestHandler
+
+
+def serve(connection, database: Database):
+    """
+    Serve the requests for a database in a worker process, until the connection is closed.
+
+    Params:
+        connection: the worker end of the pipe to the broker process.
+        database: the database owned by the worker.
+    """
+    handler = RequestHandler(database)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        connection.send(handler.handle(request))
+
+
+class DatabaseProxy(RemoteDatabase):
+    """
+    Stand-in for a Database that lives in a worker process, forwarding every call over a pipe.
+    The proxy can be added to a DatabaseBroker and used by the services in place of the database.
+    """
+
+    def __init__(self, name: str, database: Database):
+        """
+        Initialize the proxy, starting a worker process that owns the database.
+
+        Params:
+            name: the name of the database.
+            database: the database to move to the worker process.
+        """
+        super().__init__(name, database.clock)
+
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve, args=(worker_connection, database), daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+        self.lock = threading.Lock()  # One round trip at a time per pipe
+
+    def submit(self, requests: List[Tuple[str, object]]) -> int:
+        """
+        Send requests to the worker, holding the lock of the proxy until they are collected.
+
+        Params:
+            requests: a list of (kind, payload) requests, see RemoteDatabase.submit.
+
+        Returns:
+            The number of requests, as the ticket to collect the responses with.
+        """
+        self.lock.acquire()
+        try:
+            for request in requests:
+                self.connection.send(request)
+        except BaseException:
+            self.lock.release()
+            raise
+        self.round_trips += 1
+        return len(requests)
+
+    def collect(self, ticket: int) -> list:
+        """
+        Receive the responses to the submitted requests, and release the lock of the proxy.
+
+        Params:
+            ticket: the ticket returned by submit.
+
+        Returns:
+            The responses in the order of the requests.
+        """
+        try:
+            return [self.connection.recv() for _ in range(ticket)]
+        finally:
+            self.lock.release()
+
+    def close(self):
+        """
+        Stop the worker process.
+        """
+        with self.lock:
+            if self.process.is_alive():
+                self.connection.send(None)
+            self.process.join()
+            self.connection.close()
+
+
+class ProcessDatabaseBroker(RemoteDatabaseBroker):
+    """
+    Database broker where every database lives in its own worker process, simulating one AR per process.
+    The databases are replaced by proxies forwarding their calls over pipes. Requests to different ARs are sent
+    before any response is awaited, so the workers handle them in parallel.
+    """
+
+    def connect(self, db_name: str, database: Database) -> DatabaseProxy:
+        """
+        Move a database to a new worker process.
+
+        Params:
+            db_name: the name of the database.
+            database: the database to move.
+
+        Returns:
+            The DatabaseProxy to reach the database with.
+        """
+        return DatabaseProxy(db_name, database)
@@ -0,0 +1,442 @@
+from functools import partial, reduce
+from typing import Callable, Dict, List, Tuple
+
+from . import evidence
+from .database import Database, DatabaseBroker
+
+# Methods of the Database that a RemoteDatabase forwards to the AR holding the database
+FORWARDED_METHODS = {
+    "add_evidence",
+    "add_evidence_many",
+    "add_parties",
+    "get_evidence",
+    "get_evidence_at",
+    "get_evidence_batch_by_party",
+    "get_evidence_by_party",
+    "get_evidence_many",
+    "get_next_identifier",
+    "get_next_identifiers",
+    "get_parties",
+    "get_revocations_since",
+    "has_evidence_for_party",
+    "is_revoked",
+    "lookup",
+    "revoke",
+    "revoke_many",
+    "select_evidence_by_party",
+}
+
+
+class RequestHandler:
+    """
+    Handles the requests for a database on the side of the AR holding it, independent of the transport.
+    Every response contains the events the database emitted while handling the request, so the listeners of the
+    RemoteDatabase can be notified on the side of the broker.
+    """
+
+    def __init__(self, database: Database):
+        """
+        Initialize the handler.
+
+        Params:
+            database: the database to handle the requests for.
+        """
+        self.database = database
+        self.events = []
+        database.add_listener(lambda _, event, receivers: self.events.append((event, receivers)))
+        self.services = {
+            # service class: service instance evaluating access checks against the database
+        }
+
+    def handle(self, request: Tuple[str, object]) -> tuple:
+        """
+        Handle a request.
+
+        Params:
+            request: a (kind, payload) tuple, see RemoteDatabase.submit.
+
+        Returns:
+            A (success, result or exception, events) tuple.
+        """
+        try:
+            response = (True, self._handle(*request), self.events)
+        except Exception as error:
+            response = (False, error, self.events)
+        self.events = []
+        return response
+
+    def _handle(self, kind: str, payload):
+        if kind == "call":
+            method, args, kwargs = payload
+            return reduce(getattr, method.split("."), self.database)(*args, **kwargs)
+        if kind == "get":
+            return reduce(getattr, payload.split("."), self.database)
+        if kind == "list":
+            return list(reduce(getattr, payload.split("."), self.database))
+        if kind == "batch":
+            return [self._handle("call", call) for call in payload]
+        if kind == "evaluate":
+            service_class, requests = payload
+            if service_class not in self.services:
+                broker = DatabaseBroker()
+                broker.add_database(self.database.name, self.database)
+                self.services[service_class] = service_class(type(self.database), broker)
+            return self.services[service_class].has_access_many(requests)
+        raise ValueError(f"Unknown request {kind}.")
+
+
+class RemoteRevocationStore:
+    """
+    Read-only view on the revocation store of a remote database, with the API of the RevocationStore.
+    Revocations are made through the revoke and revoke_many methods of the remote database.
+    """
+
+    def __init__(self, remote: "RemoteDatabase"):
+        self.remote = remote
+
+    @property
+    def epoch(self) -> int:
+        return self.remote.get("revocations.epoch")
+
+    def since(self, sequence: int) -> list:
+        return self.remote.call("revocations.since", sequence)
+
+    def __contains__(self, identifier) -> bool:
+        return self.remote.call("is_revoked", identifier)
+
+    def __iter__(self):
+        return iter(self.remote.request("list", "revocations"))
+
+    def __len__(self) -> int:
+        return self.remote.call("revocations.__len__")
+
+
+class RemoteDatabase:
+    """
+    Stand-in for a Database held by another AR, forwarding every call to it. It can be added to a DatabaseBroker and
+    used by the services in place of the database. Subclasses implement the transport with submit and collect.
+    """
+
+    def __init__(self, name: str, clock: Callable):
+        """
+        Initialize the remote database.
+
+        Params:
+            name: the name of the database.
+            clock: the clock of the database.
+        """
+        self.name = name
+        self.clock = clock
+        self.revocations = RemoteRevocationStore(self)
+        self.listeners = []
+        self.round_trips = 0
+
+    def __getattr__(self, name: str):
+        if name in FORWARDED_METHODS:
+            return partial(self.call, name)
+        raise AttributeError(f"{type(self).__name__} has no attribute {name}")
+
+    def submit(self, requests: List[Tuple[str, object]]):
+        """
+        Send requests to the AR in a single round trip, without waiting for the responses.
+        Every submit must be followed by a collect of its ticket.
+
+        Params:
+            requests: a list of (kind, payload) requests, the kind is "call", "get", "list", "batch" or "evaluate".
+
+        Returns:
+            A ticket to collect the responses with.
+        """
+        raise NotImplementedError
+
+    def collect(self, ticket) -> list:
+        """
+        Wait for the responses to submitted requests.
+
+        Params:
+            ticket: the ticket returned by submit.
+
+        Returns:
+            The responses in the order of the requests, to be passed to complete.
+        """
+        raise NotImplementedError
+
+    def complete(self, response):
+        """
+        Notify the listeners of the events in a response, and unpack its result.
+        Listeners may send requests to the AR themselves, so this must be called after the responses are collected.
+
+        Params:
+            response: a response returned by collect.
+
+        Returns:
+            The result of the request.
+        """
+        success, result, events = response
+        for event, receivers in events:
+            for listener in list(self.listeners):
+                listener(self, event, receivers)
+
+        if not success:
+            raise result
+        return result
+
+    def complete_all(self, responses: list) -> list:
+        """
+        Complete multiple responses, notifying the listeners of the events of all of them before raising the error
+        of the first failed request, if any.
+
+        Params:
+            responses: the responses returned by collect.
+
+        Returns:
+            The results of the requests.
+        """
+        results, error = [], None
+        for response in responses:
+            try:
+                results.append(self.complete(response))
+            except Exception as exception:
+                error = error or exception
+                results.append(None)
+        if error is not None:
+            raise error
+        return results
+
+    def request(self, kind: str, payload):
+        """
+        Send a request to the AR and wait for its result.
+
+        Params:
+            kind: the kind of request, see submit.
+            payload: the payload of the request.
+
+        Returns:
+            The result of the request.
+        """
+        return self.complete(self.collect(self.submit([(kind, payload)]))[0])
+
+    def pipeline(self, requests: List[Tuple[str, object]]) -> list:
+        """
+        Send multiple requests to the AR in a single round trip, and wait for their results.
+
+        Params:
+            requests: a list of (kind, payload) requests, see submit.
+
+        Returns:
+            The results of the requests, in the order of the requests.
+        """
+        return self.complete_all(self.collect(self.submit(list(requests))))
+
+    def call(self, method: str, *args, **kwargs):
+        """
+        Call a method of the database on the AR.
+
+        Params:
+            method: the name of the method, attributes of the database can be traversed with dots.
+            args: the positional arguments of the method.
+            kwargs: the keyword arguments of the method.
+
+        Returns:
+            The result of the method.
+        """
+        return self.request("call", (method, args, kwargs))
+
+    def get(self, attribute: str):
+        """
+        Get an attribute of the database on the AR.
+
+        Params:
+            attribute: the name of the attribute, attributes can be traversed with dots.
+
+        Returns:
+            The value of the attribute.
+        """
+        return self.request("get", attribute)
+
+    def batch(self, calls: List[Tuple[str, tuple, dict]]) -> list:
+        """
+        Call multiple methods of the database on the AR, in a single round trip.
+
+        Params:
+            calls: a list of (method, args, kwargs) tuples.
+
+        Returns:
+            A list with the result of every call, in the order of the calls.
+        """
+        return self.request("batch", list(calls))
+
+    def add_listener(self, listener: Callable):
+        """
+        Register a listener, see Database.add_listener. It is notified when the response to a request arrives.
+
+        Params:
+            listener: the listener to be added.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        """
+        Unregister a listener, if it was registered.
+
+        Params:
+            listener: the listener to be removed.
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def close(self):
+        """
+        Release the resources of the transport.
+        """
+
+
+class RemoteDatabaseBroker(DatabaseBroker):
+    """
+    Database broker where every database is held by a separate AR and reached through a RemoteDatabase.
+    Requests to different ARs are sent before any response is awaited, so the ARs handle them in parallel.
+    Subclasses implement connect to move a database to an AR.
+    """
+
+    def connect(self, db_name: str, database: Database) -> RemoteDatabase:
+        """
+        Move a database to an AR.
+
+        Params:
+            db_name: the name of the database.
+            database: the database to move.
+
+        Returns:
+            The RemoteDatabase to reach the database with.
+        """
+        raise NotImplementedError
+
+    def add_database(self, db_name: str, database: Database):
+        """
+        Add a database to the broker, moving it to a new AR.
+        A database added under the same name before is replaced, and its AR is stopped.
+
+        Params:
+            db_name: the name of the database.
+            database: the Database object to be added.
+        """
+        previous = self.databases.get(db_name)
+        if not isinstance(database, RemoteDatabase):
+            database = self.connect(db_name, database)
+
+        super().add_database(db_name, database)
+        if previous is not None and previous is not database:
+            previous.close()
+
+    def remove_database(self, db_name: str):
+        """
+        Remove a database from the broker, stopping its AR.
+
+        Params:
+            db_name: the name of the database.
+        """
+        remote = self.databases.get(db_name)
+        super().remove_database(db_name)
+        if remote is not None:
+            remote.close()
+
+    def close(self):
+        """
+        Stop the ARs of all databases.
+        """
+        for db_name in list(self.databases):
+            self.remove_database(db_name)
+
+    def fan_out(self, requests: Dict[str, Tuple[str, object]]) -> Dict[str, object]:
+        """
+        Send one request to each of multiple ARs, and only then wait for the responses.
+
+        Params:
+            requests: a mapping from database name to a (kind, payload) request, see RemoteDatabase.submit.
+
+        Returns:
+            A mapping from database name to the result of its request.
+        """
+        remotes = {db_name: self.databases[db_name] for db_name in requests}
+        tickets = {}
+        try:
+            for db_name, remote in remotes.items():
+                tickets[db_name] = remote.submit([requests[db_name]])
+        finally:
+            responses = {db_name: remotes[db_name].collect(ticket)[0] for db_name, ticket in tickets.items()}
+
+        return {db_name: remotes[db_name].complete(response) for db_name, response in responses.items()}
+
+    def batch(self, calls: Dict[str, List[Tuple[str, tuple, dict]]]) -> Dict[str, list]:
+        """
+        Call multiple methods on multiple databases, with a single round trip per AR.
+
+        Params:
+            calls: a mapping from database name to a list of (method, args, kwargs) tuples.
+
+        Returns:
+            A mapping from database name to the list with the result of every call, in the order of the calls.
+        """
+        return self.fan_out({db_name: ("batch", list(db_calls)) for db_name, db_calls in calls.items()})
+
+    def revoke(self, db_name: str, evidence_id: int):
+        """
+        Revoke evidence in a database.
+
+        Params:
+            db_name: the name of the database.
+            evidence_id: the ID of the evidence to revoke.
+        """
+        self.databases[db_name].revoke(evidence_id)
+
+    def get_all_evidence_by_party(self, party_id: str, at: float = None) -> List[Tuple[str, evidence.Evidence]]:
+        """
+        Retrieve all currently relevant evidence for a specific party across all databases, querying the ARs
+        holding evidence for the party in parallel.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
+
+        Returns:
+            A list of tuples, each containing the database name and the evidence object for the specified party.
+        """
+        results = self.fan_out(
+            {
+                db_name: ("call", ("get_evidence_by_party", (party_id,), {"at": at}))
+                for db_name in self.get_routes(party_id)
+            }
+        )
+        for db_name, evidences in results.items():
+            self._record(db_name, len(evidences))
+        return [(db_name, item) for db_name, evidences in results.items() for item in evidences]
+
+    def evaluate_many(self, service_class, requests: List[tuple]) -> List[bool]:
+        """
+        Evaluate access requests on the ARs, each AR checking the requests for its own database with a local instance
+        of the service. The requests are grouped per database and evaluated in parallel.
+        Only evidence chains that are stored within a single database can be checked this way.
+
+        Params:
+            service_class: the service class implementing the access checks.
+            requests: a list of (delegatee, data_owner, object, action, db_name, evidence) tuples.
+
+        Returns:
+            A list with, for every request, True if the delegatee has access, in the order of the requests.
+        """
+        groups = {}
+        for position, request in enumerate(requests):
+            groups.setdefault(request[4], []).append(position)
+
+        results = self.fan_out(
+            {
+                db_name: ("evaluate", (service_class, [requests[position] for position in positions]))
+                for db_name, positions in groups.items()
+            }
+        )
+
+        answers = [False] * len(requests)
+        for db_name, positions in groups.items():
+            for position, answer in zip(positions, results[db_name]):
+                answers[position] = answer
+        return answers
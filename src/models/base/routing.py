@@ -0,0 +1,303 @@
+import hashlib
+import heapq
+from bisect import bisect_right
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List
+
+from .database import Database, DatabaseBroker
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys to nodes. Every node is placed on the ring at a number of virtual positions,
+    and a key belongs to the node at the first position after the hash of the key. Adding or removing a node only
+    moves the keys between that node and its neighbours on the ring.
+    """
+
+    def __init__(self, virtual_nodes: int = 64):
+        """
+        Initialize the ring.
+
+        Params:
+            virtual_nodes: the number of positions of every node on the ring, more positions spread the keys more evenly.
+        """
+        self.virtual_nodes = virtual_nodes
+        self.positions = [
+            # (hash, node), sorted
+        ]
+        self.hashes = []  # The hashes of the positions, to bisect on
+        self.nodes = set()
+
+    @staticmethod
+    def hash(key: str) -> int:
+        """
+        Hash a key to a position on the ring, stable across processes.
+
+        Params:
+            key: the key.
+
+        Returns:
+            The position, as a 64-bit integer.
+        """
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def add_nodes(self, nodes: Iterable[str]):
+        """
+        Add nodes to the ring, merging their positions into the ring at once.
+
+        Params:
+            nodes: the names of the nodes.
+        """
+        nodes = [node for node in dict.fromkeys(nodes) if node not in self.nodes]
+        added = sorted((self.hash(f"{node}#{i}"), node) for node in nodes for i in range(self.virtual_nodes))
+
+        self.positions = list(heapq.merge(self.positions, added))
+        self.hashes = [position for position, _ in self.positions]
+        self.nodes.update(nodes)
+
+    def add_node(self, node: str):
+        """
+        Add a node to the ring.
+
+        Params:
+            node: the name of the node.
+        """
+        self.add_nodes([node])
+
+    def remove_node(self, node: str):
+        """
+        Remove a node from the ring, if present.
+
+        Params:
+            node: the name of the node.
+        """
+        if node not in self.nodes:
+            return
+
+        self.nodes.remove(node)
+        self.positions = [position for position in self.positions if position[1] != node]
+        self.hashes = [position for position, _ in self.positions]
+
+    def get_node(self, key: str) -> str:
+        """
+        Get the node a key belongs to.
+
+        Params:
+            key: the key.
+
+        Returns:
+            The name of the node, or None if the ring is empty.
+        """
+        if not self.positions:
+            return None
+
+        index = bisect_right(self.hashes, self.hash(key))
+        return self.positions[index % len(self.positions)][1]
+
+    def __contains__(self, node: str) -> bool:
+        return node in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+class ARNode:
+    """
+    In-process stand-in for an AR node, holding the databases and the route entries placed on it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.databases = {
+            # db_name: Database object placed on the node
+        }
+        self.routes = {
+            # party id: set of names of the databases holding evidence for the party
+        }
+
+
+class RouteTable(MutableMapping):
+    """
+    Routes of a ConsistentHashBroker, partitioned over the AR nodes: the routes of a party are stored on the node the
+    party belongs to on the hash ring.
+    """
+
+    def __init__(self, broker: "ConsistentHashBroker"):
+        self.broker = broker
+
+    def __getitem__(self, party_id: str):
+        node = self.broker.get_party_node(party_id)
+        if node is None:
+            raise KeyError(party_id)
+        return node.routes[party_id]
+
+    def __setitem__(self, party_id: str, db_names):
+        node = self.broker.get_party_node(party_id)
+        if node is None:
+            raise ValueError("No AR nodes to store the routes on.")
+        node.routes[party_id] = db_names
+
+    def __delitem__(self, party_id: str):
+        node = self.broker.get_party_node(party_id)
+        if node is None:
+            raise KeyError(party_id)
+        del node.routes[party_id]
+
+    def __iter__(self):
+        for node in list(self.broker.nodes.values()):
+            yield from list(node.routes)
+
+    def __len__(self) -> int:
+        return sum(len(node.routes) for node in self.broker.nodes.values())
+
+
+class ConsistentHashBroker(DatabaseBroker):
+    """
+    Database broker that places the databases and the routes of the parties on AR nodes with consistent hashing,
+    instead of a single directory. Every node is an in-process ARNode, and nodes can be added and removed while the
+    broker is in use, moving only the databases and routes that change owner.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 64, **kwargs):
+        """
+        Initialize the ConsistentHashBroker.
+
+        Params:
+            nodes: the names of the initial AR nodes.
+            virtual_nodes: the number of positions of every node on the hash ring.
+            kwargs: the arguments of the DatabaseBroker.
+        """
+        super().__init__(**kwargs)
+        self.ring = HashRing(virtual_nodes)
+        self.nodes = {
+            # node name: ARNode
+        }
+        self.routes = RouteTable(self)
+        self.add_nodes(nodes)
+
+    def get_database_node(self, db_name: str) -> ARNode:
+        """
+        Get the AR node a database is placed on.
+
+        Params:
+            db_name: the name of the database.
+
+        Returns:
+            The ARNode, or None if there are no nodes.
+        """
+        return self.nodes.get(self.ring.get_node(db_name))
+
+    def get_party_node(self, party_id: str) -> ARNode:
+        """
+        Get the AR node the routes of a party are stored on.
+
+        Params:
+            party_id: the ID of the party.
+
+        Returns:
+            The ARNode, or None if there are no nodes.
+        """
+        return self.nodes.get(self.ring.get_node(party_id))
+
+    def add_database(self, db_name: str, database: Database):
+        """
+        Add a database to the broker, placing it on the AR node it belongs to.
+
+        Params:
+            db_name: the name of the database.
+            database: the Database object to be added.
+        """
+        node = self.get_database_node(db_name)
+        if node is None:
+            raise ValueError("No AR nodes to place the database on.")
+
+        super().add_database(db_name, database)
+        node.databases[db_name] = database
+
+    def remove_database(self, db_name: str):
+        """
+        Remove a database from the broker and from its AR node, if it was added.
+
+        Params:
+            db_name: the name of the database.
+        """
+        if db_name in self.databases:
+            self.get_database_node(db_name).databases.pop(db_name, None)
+        super().remove_database(db_name)
+
+    def add_nodes(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Add AR nodes, moving the databases and routes that now belong to them.
+
+        Params:
+            names: the names of the nodes.
+
+        Returns:
+            The number of databases and routes that were moved.
+        """
+        names = [name for name in names if name not in self.nodes]
+        for name in names:
+            self.nodes[name] = ARNode(name)
+        self.ring.add_nodes(names)
+
+        # Keys can only move from the existing nodes to the new nodes
+        return self._rebalance([node for name, node in self.nodes.items() if name not in names])
+
+    def add_node(self, name: str) -> Dict[str, int]:
+        """
+        Add an AR node, see add_nodes.
+
+        Params:
+            name: the name of the node.
+
+        Returns:
+            The number of databases and routes that were moved.
+        """
+        return self.add_nodes([name])
+
+    def remove_node(self, name: str) -> Dict[str, int]:
+        """
+        Remove an AR node, moving its databases and routes to the nodes they now belong to.
+        The last node can not be removed while it holds databases or routes.
+
+        Params:
+            name: the name of the node.
+
+        Returns:
+            The number of databases and routes that were moved.
+        """
+        node = self.nodes.get(name)
+        if node is None:
+            return {"databases": 0, "routes": 0}
+        if len(self.nodes) == 1 and (node.databases or node.routes):
+            raise ValueError(f"Can not remove the last AR node {name}, as it is not empty.")
+
+        self.ring.remove_node(name)
+        del self.nodes[name]
+        return self._rebalance([node])
+
+    def _rebalance(self, nodes: List[ARNode]) -> Dict[str, int]:
+        """
+        Move the databases and routes of nodes that no longer belong to them to their new nodes.
+
+        Params:
+            nodes: the nodes that may hold keys of other nodes.
+
+        Returns:
+            The number of databases and routes that were moved.
+        """
+        moved = {"databases": 0, "routes": 0}
+        for node in nodes:
+            for db_name in list(node.databases):
+                owner = self.get_database_node(db_name)
+                if owner is not node:
+                    owner.databases[db_name] = node.databases.pop(db_name)
+                    moved["databases"] += 1
+
+            for party_id in list(node.routes):
+                owner = self.get_party_node(party_id)
+                if owner is not node:
+                    owner.routes[party_id] = node.routes.pop(party_id)
+                    moved["routes"] += 1
+
+        return moved
@@ -38,6 +38,48 @@ class BaseService:
         """
         raise NotImplementedError("Not implemented yet!")
 
+    def has_access_many(self, requests: List[tuple]) -> List[bool]:
+        """
+        Check multiple access requests at once.
+        Models can override this to share the verification of evidence chains or graph searches between requests.
+
+        Params:
+            requests: a list of (delegatee, data_owner, object, action, db_name, evidence) tuples, with the
+                arguments of has_access.
+
+        Returns:
+            A list with, for every request, True if the delegatee has access, in the order of the requests.
+        """
+        return [self.has_access(*request) for request in requests]
+
+    async def has_access_async(
+        self,
+        delegatee: str,
+        data_owner: str,
+        object: str,
+        action: str,
+        db_name: str,
+        evidence: evidence.Evidence,
+        broker,
+    ) -> bool:
+        """
+        Check if a delegatee has access to an object, with every lookup being a request to the AR holding the
+        database. Models implementing this issue independent lookups to different ARs concurrently.
+
+        Params:
+            delegatee: the identifier of the delegatee.
+            data_owner: the identifier of the data owner.
+            object: the identifier of the object.
+            action: the action to be performed on the object.
+            db_name: the name of the database of the evidence.
+            evidence: the evidence presented by the delegatee.
+            broker: the AsyncDatabaseBroker to send the lookups through.
+
+        Returns:
+            True if the delegatee has access to the object, False otherwise.
+        """
+        raise NotImplementedError("Not implemented yet!")
+
     def add_delegation(
         self,
         party1: str,
@@ -65,6 +107,24 @@ class BaseService:
         """
         raise NotImplementedError()
 
+    def add_delegations(self, delegations: List[tuple], database_key: str) -> List[evidence.Evidence]:
+        """
+        Add multiple delegations to the database.
+        Models can override this to amortise database lookups, identifier allocation and index maintenance.
+
+        Params:
+            delegations: a list of (party1, party2, objects, actions, expiry) tuples, optionally followed by
+                the Evidence object the delegation is based on.
+            database_key: the name of the database to add the delegations to.
+
+        Returns:
+            A list with the evidence of every added delegation, in the order of the delegations.
+        """
+        return [
+            self.add_delegation(party1, party2, objects, actions, expiry, database_key, *evidence)
+            for party1, party2, objects, actions, expiry, *evidence in delegations
+        ]
+
     def revoke_delegation(self, delegation_id: int, database_key: str):
         """
         Revoke a delegation in the database.
@@ -74,6 +134,20 @@ class BaseService:
         """
         raise NotImplementedError()
 
+    def revoke_delegations(self, delegation_ids: List[int], database_key: str) -> list:
+        """
+        Revoke multiple delegations in the database.
+        Models can override this to amortise database lookups and index maintenance.
+
+        Params:
+            delegation_ids: the IDs of the delegations to be revoked.
+            database_key: the name of the database to revoke the delegations in.
+
+        Returns:
+            A list with the result of every revocation in the order of the delegation IDs, for models that report one.
+        """
+        return [self.revoke_delegation(delegation_id, database_key) for delegation_id in delegation_ids]
+
     def add_parties(self, party_ids: List[str], database_key: str):
         """
         Add multiple parties to the database.
@@ -0,0 +1,322 @@
+import asyncio
+import pickle
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from .database import Database
+from .remote import RemoteDatabase, RemoteDatabaseBroker, RequestHandler
+
+# Every frame is its length as an unsigned 32-bit integer, followed by the pickled request or response
+FRAME_HEADER = struct.Struct("!I")
+
+
+def encode_frame(message) -> bytes:
+    """
+    Encode a message as a frame.
+
+    Params:
+        message: the message, any picklable object.
+
+    Returns:
+        The frame.
+    """
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return FRAME_HEADER.pack(len(data)) + data
+
+
+class ARServer:
+    """
+    Local stand-in for an AR, serving the requests for a database over TCP on an asyncio event loop in a background
+    thread. Requests on one connection are handled in order, so a client can pipeline them, and the requests of all
+    connections are handled one at a time by the event loop.
+    Messages are pickled, so the server must only be reachable by trusted clients, like on localhost.
+    """
+
+    def __init__(self, database: Database, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the server.
+
+        Params:
+            database: the database to serve.
+            host: the host to listen on.
+            port: the port to listen on, 0 to pick a free port.
+        """
+        self.database = database
+        self.host = host
+        self.port = port
+        self.handler = RequestHandler(database)
+        self.address = None
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.connections = {
+            # task handling a connection: its writer
+        }
+        self.ready = threading.Event()
+
+    def start(self) -> Tuple[str, int]:
+        """
+        Start the server in a background thread.
+
+        Returns:
+            The (host, port) address the server listens on.
+        """
+        self.thread = threading.Thread(target=self._run, name=f"ARServer-{self.database.name}", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.address is None:
+            raise ConnectionError(f"The AR server for {self.database.name} failed to start.")
+        return self.address
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+            self.address = self.server.sockets[0].getsockname()[:2]
+        finally:
+            self.ready.set()
+
+        if self.server is not None:
+            self.loop.run_forever()
+        self.loop.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                request = pickle.loads(await reader.readexactly(length))
+                writer.write(encode_frame(self.handler.handle(request)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        # Closing the connections ends their handlers at the next read
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def stop(self):
+        """
+        Stop the server, closing all connections.
+        """
+        if self.thread is None:
+            return
+        if self.server is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+
+class ConnectionPool:
+    """
+    Pool of persistent TCP connections to an AR server. A connection is used by one caller at a time, and new
+    connections are opened on demand up to the size of the pool.
+    """
+
+    def __init__(self, address: Tuple[str, int], size: int = 4, timeout: float = 30):
+        """
+        Initialize the pool, without opening any connection.
+
+        Params:
+            address: the (host, port) address of the server.
+            size: the maximum number of open connections.
+            timeout: the number of seconds to wait for a response.
+        """
+        self.address = address
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> Tuple[socket.socket, object]:
+        """
+        Take a connection from the pool, opening a new one if all are in use and the pool is not full, or waiting for
+        one to be released otherwise.
+
+        Returns:
+            A (socket, buffered reader) tuple.
+        """
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            open_new = self.opened < self.size
+            if open_new:
+                self.opened += 1
+        if not open_new:
+            return self.idle.get()
+
+        try:
+            connection = socket.create_connection(self.address, timeout=self.timeout)
+        except OSError:
+            with self.lock:
+                self.opened -= 1
+            raise
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection, connection.makefile("rb")
+
+    def release(self, connection: Tuple[socket.socket, object]):
+        """
+        Return a connection to the pool.
+
+        Params:
+            connection: the connection returned by acquire.
+        """
+        self.idle.put(connection)
+
+    def discard(self, connection: Tuple[socket.socket, object]):
+        """
+        Close a connection that can not be reused, like after an error halfway through a response.
+
+        Params:
+            connection: the connection returned by acquire.
+        """
+        sock, reader = connection
+        reader.close()
+        sock.close()
+        with self.lock:
+            self.opened -= 1
+
+    def close(self):
+        """
+        Close the idle connections.
+        """
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class SocketDatabaseClient(RemoteDatabase):
+    """
+    Stand-in for a Database served by an ARServer, forwarding every call over pooled TCP connections.
+    Requests submitted together are pipelined: they are written to one connection at once, and the responses are
+    read in order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        address: Tuple[str, int],
+        clock: Callable = time.time,
+        pool_size: int = 4,
+        server: ARServer = None,
+    ):
+        """
+        Initialize the client.
+
+        Params:
+            name: the name of the database.
+            address: the (host, port) address of the server.
+            clock: the clock of the database.
+            pool_size: the maximum number of open connections to the server.
+            server: the server to stop when the client is closed, if the client owns it.
+        """
+        super().__init__(name, clock)
+        self.pool = ConnectionPool(address, pool_size)
+        self.server = server
+
+    def submit(self, requests: List[Tuple[str, object]]) -> tuple:
+        """
+        Write requests to a connection of the pool, holding the connection until they are collected.
+
+        Params:
+            requests: a list of (kind, payload) requests, see RemoteDatabase.submit.
+
+        Returns:
+            A (connection, number of requests) tuple, as the ticket to collect the responses with.
+        """
+        connection = self.pool.acquire()
+        try:
+            connection[0].sendall(b"".join(encode_frame(request) for request in requests))
+        except BaseException:
+            self.pool.discard(connection)
+            raise
+        self.round_trips += 1
+        return connection, len(requests)
+
+    def collect(self, ticket: tuple) -> list:
+        """
+        Read the responses to the submitted requests, and return the connection to the pool.
+
+        Params:
+            ticket: the ticket returned by submit.
+
+        Returns:
+            The responses in the order of the requests.
+        """
+        connection, count = ticket
+        reader = connection[1]
+        try:
+            responses = []
+            for _ in range(count):
+                header = reader.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    raise ConnectionError(f"The AR server for {self.name} closed the connection.")
+                (length,) = FRAME_HEADER.unpack(header)
+                responses.append(pickle.loads(reader.read(length)))
+        except BaseException:
+            self.pool.discard(connection)
+            raise
+        self.pool.release(connection)
+        return responses
+
+    def close(self):
+        """
+        Close the connections, and stop the server if the client owns it.
+        """
+        self.pool.close()
+        if self.server is not None:
+            self.server.stop()
+
+
+class SocketDatabaseBroker(RemoteDatabaseBroker):
+    """
+    Database broker where every database is served by its own local ARServer, so every call pays the cost of
+    serialization and a real socket round trip. The databases are replaced by SocketDatabaseClients.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", pool_size: int = 4, **kwargs):
+        """
+        Initialize the SocketDatabaseBroker.
+
+        Params:
+            host: the host the servers listen on.
+            pool_size: the maximum number of open connections per server.
+            kwargs: the arguments of the DatabaseBroker.
+        """
+        super().__init__(**kwargs)
+        self.host = host
+        self.pool_size = pool_size
+
+    def connect(self, db_name: str, database: Database) -> SocketDatabaseClient:
+        """
+        Start a server for a database.
+
+        Params:
+            db_name: the name of the database.
+            database: the database to serve.
+
+        Returns:
+            The SocketDatabaseClient to reach the database with.
+        """
+        server = ARServer(database, self.host)
+        address = server.start()
+        return SocketDatabaseClient(db_name, address, database.clock, self.pool_size, server)
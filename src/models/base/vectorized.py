@@ -0,0 +1,206 @@
+import numpy as np
+from typing import Dict, List
+
+from . import evidence as base_evidence
+
+# Batches smaller than this are evaluated in plain Python, as the NumPy overhead would dominate
+VECTORIZE_THRESHOLD = 64
+
+
+class EvidenceBatch:
+    """
+    Batch of evidences that can be evaluated against a permission in a single vectorized pass.
+    The rules are flattened into one row per (evidence, object) pair, sorted by object, holding the
+    bitmask of the permitted actions. The arrays are built on the first vectorized evaluation.
+    """
+
+    def __init__(self, evidences: List[base_evidence.Evidence]):
+        self.evidences = list(evidences)
+        self.db_names = {evidence.db_name for evidence in self.evidences}
+        self._arrays = None
+        self._revoked = None  # ({db_name: (revocation store, epoch)}, mask)
+        self._positions = None  # {(db_name, identifier): positions of the evidence in the batch}
+
+    def _build_arrays(self):
+        object_codes = {}
+        rows = []  # (object code, evidence index, action mask)
+        for index, evidence in enumerate(self.evidences):
+            for rule in evidence.rules:
+                compiled = rule.compiled
+                for object_id in compiled.object_ids:
+                    code = object_codes.setdefault(object_id, len(object_codes))
+                    # Only the first 64 action ids fit in the mask column, see mask_all for larger ids
+                    rows.append((code, index, compiled.action_mask & 0xFFFFFFFFFFFFFFFF))
+        rows.sort()
+
+        self._arrays = {
+            "object_codes": object_codes,
+            "row_objects": np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            "row_evidence": np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)),
+            "row_actions": np.fromiter((row[2] for row in rows), dtype=np.uint64, count=len(rows)),
+            "valid_from": np.fromiter((e.valid_from for e in self.evidences), dtype=np.float64),
+            "valid_untill": np.fromiter((e.valid_untill for e in self.evidences), dtype=np.float64),
+        }
+
+    def _permitted_actions(self, object_id: str) -> np.ndarray:
+        """
+        Get the combined bitmask of the actions every evidence permits on an object.
+
+        Params:
+            object_id: the identifier of the object.
+
+        Returns:
+            An array with the permitted action mask per evidence.
+        """
+        arrays = self._arrays
+        permitted = np.zeros(len(self.evidences), dtype=np.uint64)
+
+        code = arrays["object_codes"].get(object_id)
+        if code is None:
+            return permitted
+
+        start, end = np.searchsorted(arrays["row_objects"], [code, code + 1])
+        np.bitwise_or.at(permitted, arrays["row_evidence"][start:end], arrays["row_actions"][start:end])
+        return permitted
+
+    def _revoked_mask(self, revocations: Dict) -> np.ndarray:
+        """
+        Get a mask of the revoked evidences. The mask is cached, and when the epoch of a revocation store changed, only
+        the revocations made since the cached epoch are applied to it.
+
+        Params:
+            revocations: a mapping from database name to the revocation store of that database, evidence of a database
+                missing from the mapping is not revoked.
+
+        Returns:
+            A boolean array, True for every revoked evidence.
+        """
+        if self._revoked is not None and self._revoked[0].keys() == revocations.keys():
+            stores, mask = self._revoked
+            for name, store in revocations.items():
+                cached_store, epoch = stores[name]
+                if cached_store is not store or store.epoch < epoch or not hasattr(store, "since"):
+                    break  # The store was replaced, recompute the mask
+                if store.epoch == epoch:
+                    continue
+
+                if self._positions is None:
+                    self._positions = {}
+                    for index, evidence in enumerate(self.evidences):
+                        self._positions.setdefault((evidence.db_name, evidence.identifier), []).append(index)
+                for identifier in store.since(epoch):
+                    mask[self._positions.get((name, identifier), [])] = True
+                stores[name] = (store, store.epoch)
+            else:
+                return mask
+
+        mask = np.fromiter(
+            (evidence.identifier in revocations.get(evidence.db_name, ()) for evidence in self.evidences),
+            dtype=bool,
+            count=len(self.evidences),
+        )
+        self._revoked = ({name: (store, store.epoch) for name, store in revocations.items()}, mask)
+        return mask
+
+    def mask_all(self, object_ids: List[str], actions: List[str], revocations: Dict = None, at: float = None):
+        """
+        Evaluate which evidences permit all actions on all objects, in a single vectorized pass.
+
+        Params:
+            object_ids: the identifiers of the objects.
+            actions: the actions to be performed on every object.
+            revocations: an optional mapping from database name to revocation store, to exclude revoked evidence.
+                Evidence of a database missing from the mapping is not revoked.
+            at: an optional timestamp, to exclude evidence that is not valid at that time.
+
+        Returns:
+            A boolean array, True for every evidence that permits the request.
+        """
+        if self._arrays is None:
+            self._build_arrays()
+
+        required = base_evidence.action_mask(actions)
+        if required >> 64:
+            # The action ids do not fit in the mask columns, fall back to evaluating the rules directly
+            mask = np.fromiter(
+                (evidence.covers_all(object_ids, actions) for evidence in self.evidences),
+                dtype=bool,
+                count=len(self.evidences),
+            )
+        else:
+            required = np.uint64(required)
+            mask = np.ones(len(self.evidences), dtype=bool)
+            for object_id in object_ids:
+                mask &= (self._permitted_actions(object_id) & required) == required
+
+        if at is not None:
+            mask &= (self._arrays["valid_from"] <= at) & (at <= self._arrays["valid_untill"])
+        if revocations is not None:
+            mask &= ~self._revoked_mask(revocations)
+        return mask
+
+    def mask(self, object_id: str, action: str, revocations: Dict = None, at: float = None):
+        """
+        Evaluate which evidences permit an action on an object, in a single vectorized pass.
+
+        Params:
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+            revocations: an optional mapping from database name to revocation store, to exclude revoked evidence.
+                Evidence of a database missing from the mapping is not revoked.
+            at: an optional timestamp, to exclude evidence that is not valid at that time.
+
+        Returns:
+            A boolean array, True for every evidence that permits the request.
+        """
+        return self.mask_all([object_id], [action], revocations=revocations, at=at)
+
+    def select_all(
+        self, object_ids: List[str], actions: List[str], revocations: Dict = None, at: float = None
+    ) -> List[base_evidence.Evidence]:
+        """
+        Select the evidences that permit all actions on all objects.
+        Small batches are evaluated in plain Python, larger batches are vectorized.
+
+        Params:
+            object_ids: the identifiers of the objects.
+            actions: the actions to be performed on every object.
+            revocations: an optional mapping from database name to revocation store, to exclude revoked evidence.
+                Evidence of a database missing from the mapping is not revoked.
+            at: an optional timestamp, to exclude evidence that is not valid at that time.
+
+        Returns:
+            A list of the evidences that permit the request, in the order of the batch.
+        """
+        if len(self.evidences) < VECTORIZE_THRESHOLD:
+            return [
+                evidence
+                for evidence in self.evidences
+                if (at is None or evidence.valid_from <= at <= evidence.valid_untill)
+                and (revocations is None or evidence.identifier not in revocations.get(evidence.db_name, ()))
+                and evidence.covers_all(object_ids, actions)
+            ]
+
+        mask = self.mask_all(object_ids, actions, revocations=revocations, at=at)
+        return [self.evidences[index] for index in np.flatnonzero(mask)]
+
+    def select(
+        self, object_id: str, action: str, revocations: Dict = None, at: float = None
+    ) -> List[base_evidence.Evidence]:
+        """
+        Select the evidences that permit an action on an object.
+
+        Params:
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+            revocations: an optional mapping from database name to revocation store, to exclude revoked evidence.
+                Evidence of a database missing from the mapping is not revoked.
+            at: an optional timestamp, to exclude evidence that is not valid at that time.
+
+        Returns:
+            A list of the evidences that permit the request, in the order of the batch.
+        """
+        return self.select_all([object_id], [action], revocations=revocations, at=at)
+
+    def __len__(self) -> int:
+        return len(self.evidences)
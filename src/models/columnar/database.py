@@ -0,0 +1,159 @@
+from array import array
+
+from ..base import database
+from ..base import evidence as base_evidence
+from ..base.interning import Interner
+
+# Attributes stored in the columns, any other attribute of an evidence object is stored as an extra
+COLUMN_ATTRIBUTES = {"identifier", "issuer", "receiver", "rules", "valid_from", "valid_untill", "db_name"}
+
+
+class ColumnarEvidenceStore:
+    """
+    Struct-of-arrays store for evidence, used in place of the identifier -> Evidence dict of the base database.
+    Parties, objects, actions and database names are interned to integer ids, and all fields are kept in
+    typed arrays. Evidence objects are only materialized when they are retrieved.
+    """
+
+    def __init__(self):
+        self.rows = {
+            # identifier: row number
+        }
+        self.identifiers = []
+
+        self.parties = Interner()
+        self.objects = Interner()
+        self.actions = Interner()
+        self.names = Interner()  # Database names
+        self.classes = Interner()  # Evidence classes
+
+        # One entry per row
+        self.issuers = array("l")
+        self.receivers = array("l")
+        self.valid_froms = array("d")
+        self.valid_untills = array("d")
+        self.db_names = array("l")
+        self.kinds = array("l")
+        self.rule_offsets = array("l", [0])
+
+        # One entry per rule
+        self.object_offsets = array("l", [0])
+        self.action_offsets = array("l", [0])
+
+        # One entry per object or action of a rule
+        self.rule_objects = array("l")
+        self.rule_actions = array("l")
+
+        self.extras = {
+            # row number: dict with the attributes not stored in the columns, only for rows that have them
+        }
+        self.compiled_rules = {
+            # (interned object ids, interned actions) of a rule: CompiledRule shared by all rules with these values
+        }
+
+    def __setitem__(self, identifier, evidence: base_evidence.Evidence):
+        if identifier in self.rows:
+            raise ValueError(f"Evidence with ID {identifier} already exists.")
+
+        row = len(self.identifiers)
+        self.identifiers.append(identifier)
+
+        self.issuers.append(self.parties.intern(evidence.issuer))
+        self.receivers.append(self.parties.intern(evidence.receiver))
+        self.valid_froms.append(evidence.valid_from)
+        self.valid_untills.append(evidence.valid_untill)
+        self.db_names.append(self.names.intern(evidence.db_name))
+        self.kinds.append(self.classes.intern(type(evidence)))
+
+        for rule in evidence.rules:
+            self.rule_objects.extend(self.objects.intern_many(rule.object_ids))
+            self.rule_actions.extend(self.actions.intern_many(rule.actions))
+            self.object_offsets.append(len(self.rule_objects))
+            self.action_offsets.append(len(self.rule_actions))
+        self.rule_offsets.append(len(self.object_offsets) - 1)
+
+        extras = {key: value for key, value in vars(evidence).items() if key not in COLUMN_ATTRIBUTES}
+        if extras:
+            self.extras[row] = extras
+
+        # Publish the row once all its columns are written, so lookups without the lock never see a partial row
+        self.rows[identifier] = row
+
+    def _materialize(self, row: int) -> base_evidence.Evidence:
+        """
+        Build an evidence object from the columns of a row.
+
+        Params:
+            row: the row number of the evidence.
+
+        Returns:
+            A new evidence object of the same class as the stored evidence.
+        """
+        rules = []
+        for rule in range(self.rule_offsets[row], self.rule_offsets[row + 1]):
+            object_ids = self.rule_objects[self.object_offsets[rule] : self.object_offsets[rule + 1]]
+            actions = self.rule_actions[self.action_offsets[rule] : self.action_offsets[rule + 1]]
+            materialized = base_evidence.Rule(
+                object_ids=[self.objects.value(object_id) for object_id in object_ids],
+                actions=[self.actions.value(action) for action in actions],
+            )
+
+            # Rules are immutable once added, so the compiled form is reused instead of compiling it on every retrieval
+            key = (object_ids.tobytes(), actions.tobytes())
+            compiled = self.compiled_rules.get(key)
+            if compiled is None:
+                self.compiled_rules[key] = materialized.compiled
+            else:
+                materialized._compiled = compiled
+            rules.append(materialized)
+
+        # Bypass __init__, as the evidence subclasses do not share a constructor signature
+        evidence_class = self.classes.value(self.kinds[row])
+        evidence = evidence_class.__new__(evidence_class)
+        evidence.identifier = self.identifiers[row]
+        evidence.valid_from = self.valid_froms[row]
+        evidence.valid_untill = self.valid_untills[row]
+        evidence.issuer = self.parties.value(self.issuers[row])
+        evidence.receiver = self.parties.value(self.receivers[row])
+        evidence.rules = rules
+        evidence.db_name = self.names.value(self.db_names[row])
+        evidence.__dict__.update(self.extras.get(row, {}))
+        return evidence
+
+    def __getitem__(self, identifier) -> base_evidence.Evidence:
+        return self._materialize(self.rows[identifier])
+
+    def get(self, identifier, default=None) -> base_evidence.Evidence:
+        row = self.rows.get(identifier)
+        if row is None:
+            return default
+        return self._materialize(row)
+
+    def values(self):
+        for row in range(len(self.identifiers)):
+            yield self._materialize(row)
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.rows
+
+    def __iter__(self):
+        return iter(self.identifiers)
+
+    def __len__(self) -> int:
+        return len(self.identifiers)
+
+
+class Database(database.Database):
+    """
+    Database storing its evidence in a columnar, interned format to reduce the memory used per delegation.
+    Inherits from the base Database class, evidence is materialized lazily when it is retrieved.
+    """
+
+    def _new_evidence_store(self) -> ColumnarEvidenceStore:
+        """
+        Create the columnar store for the evidence of the database.
+
+        Returns:
+            An empty ColumnarEvidenceStore.
+        """
+        return ColumnarEvidenceStore()
@@ -50,6 +50,35 @@ class ConcatService(base_service.BaseService):
 
         return evid
 
+    def add_delegations(self, delegations, database_key: str) -> List[ConcatEvidence]:
+        """
+        Add multiple delegations, allocating their identifiers as a single block.
+
+        Params:
+            delegations: a list of (party1, party2, objects, actions, expiry) tuples, optionally followed by
+                the Evidence object the delegation is based on.
+            database_key: the name of the database to allocate the identifiers in.
+
+        Returns:
+            A list with the evidence of every delegation, in the order of the delegations.
+        """
+        identifiers = self.db_broker.get_database(database_key).get_next_identifiers(len(delegations))
+
+        # Does not need to be added to the database, as this evidence can be standalone.
+        return [
+            ConcatEvidence(
+                identifier=identifier,
+                issuer=party1,
+                receiver=party2,
+                rules=[Rule(object_ids=objects, actions=actions)],
+                valid_from=0,
+                valid_untill=expiry,
+                db_name=database_key,
+                prev_evidence=evidence[0] if evidence else None,
+            )
+            for identifier, (party1, party2, objects, actions, expiry, *evidence) in zip(identifiers, delegations)
+        ]
+
     def revoke_delegation(self, delegation_id: int, database_key: str):
         """
         Revoke a delegation in the database.
@@ -57,7 +86,16 @@ class ConcatService(base_service.BaseService):
         Params:
             delegation_id: the ID of the delegation to be revoked.
         """
-        self.db_broker.get_database(database_key).revocations.append(delegation_id)
+        self.db_broker.get_database(database_key).revoke(delegation_id)
+
+    def revoke_delegations(self, delegation_ids: List[int], database_key: str):
+        """
+        Revoke multiple delegations in the database.
+
+        Params:
+            delegation_ids: the IDs of the delegations to be revoked.
+        """
+        self.db_broker.get_database(database_key).revoke_many(delegation_ids)
 
     def evidence_is_revoked(self, evidence: ConcatEvidence, db_name: str) -> bool:
         """
@@ -70,11 +108,11 @@ class ConcatService(base_service.BaseService):
         Returns:
             True if the evidence is revoked, False otherwise.
         """
-        return evidence.identifier in self.db_broker.get_database(db_name).revocations
+        return self.db_broker.is_revoked(db_name, evidence.identifier)
 
     def has_access(self, delegatee, data_owner, object, action, db_name, evidence):
         def is_relevant_evidence(evidence):
-            return any(object in rule.object_ids and action in rule.actions for rule in evidence.rules)
+            return evidence.covers(object, action)
 
         if not is_relevant_evidence(evidence):
             return False
@@ -99,3 +137,55 @@ class ConcatService(base_service.BaseService):
             return False
 
         return True
+
+    def has_access_many(self, requests: List[tuple]) -> List[bool]:
+        """
+        Check multiple access requests at once.
+        Chains that share a prefix, e.g. delegations based on the same evidence, only verify that prefix once.
+
+        Params:
+            requests: a list of (delegatee, data_owner, object, action, db_name, evidence) tuples.
+
+        Returns:
+            A list with, for every request, True if the delegatee has access, in the order of the requests.
+        """
+        chain_roots = {
+            # (db_name, identifier, object, action): issuer of the root of the chain, None if the chain is invalid
+        }
+        return [
+            evidence.receiver == delegatee and self._chain_root(evidence, object, action, chain_roots) == data_owner
+            for delegatee, data_owner, object, action, _, evidence in requests
+        ]
+
+    def _chain_root(self, evidence: ConcatEvidence, object: str, action: str, chain_roots: dict):
+        """
+        Verify a chain of evidence for an object and action, reusing the results of previously verified chains.
+
+        Params:
+            evidence: the last evidence of the chain.
+            object: the identifier of the object.
+            action: the action to be performed on the object.
+            chain_roots: the results of the previously verified chains, updated with the links of this chain.
+
+        Returns:
+            The issuer of the first evidence of the chain, or None if a link does not cover the request or is revoked.
+        """
+        keys = []
+        root = None
+        while evidence is not None:
+            key = (evidence.db_name, evidence.identifier, object, action)
+            if key in chain_roots:
+                root = chain_roots[key]
+                break
+
+            keys.append(key)
+            if not evidence.covers(object, action) or self.evidence_is_revoked(evidence, evidence.db_name):
+                break
+
+            if evidence.prev_evidence is None:
+                root = evidence.issuer
+            evidence = evidence.prev_evidence
+
+        for key in keys:
+            chain_roots[key] = root
+        return root
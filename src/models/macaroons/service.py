@@ -52,7 +52,7 @@ class Service(service.BaseService):
             # Check for revocation caveats
             if x.startswith("revocation_id:"):
                 _, db_name, identifier = x.split(":")
-                if identifier in self.db_broker.get_database(db_name).revocations:
+                if self.db_broker.is_revoked(db_name, identifier):
                     return False
                 return True
 
@@ -104,7 +104,43 @@ class Service(service.BaseService):
         Returns:
             Macaroon: The evidence object representing the delegation.
         """
+        return self._create_delegation(
+            self.db_broker.get_database(database_key), party2, objects, actions, database_key, evidence
+        )
 
+    def add_delegations(self, delegations: list, database_key: str) -> list:
+        """
+        Add multiple delegations, looking up the database only once.
+
+        Params:
+            delegations: a list of (party1, party2, objects, actions, expiry) tuples, optionally followed by
+                the evidence the delegation is based on.
+            database_key: the name of the database to add the delegations to.
+
+        Returns:
+            A list with the evidence of every delegation, in the order of the delegations.
+        """
+        db = self.db_broker.get_database(database_key)
+        return [
+            self._create_delegation(db, party2, objects, actions, database_key, evidence[0] if evidence else None)
+            for _, party2, objects, actions, _, *evidence in delegations
+        ]
+
+    def _create_delegation(self, db, party2: str, objects: list, actions: list, database_key: str, evidence=None):
+        """
+        Create the macaroon for a delegation, minting a new root macaroon if the delegation is not based on evidence.
+
+        Params:
+            db: the database to store the key of a new root macaroon in.
+            party2: the ID of the delegatee.
+            objects: a list of objects being delegated.
+            actions: a list of actions that can be performed on the objects.
+            database_key: the name of the database.
+            evidence: optional evidence related to the delegation.
+
+        Returns:
+            The evidence object representing the delegation.
+        """
         if not evidence:
             key = str(uuid.uuid4())
             evidence = Macaroon(
@@ -112,7 +148,7 @@ class Service(service.BaseService):
                 location=database_key,
                 key=key,
             )
-            self.db_broker.get_database(database_key).set_key(evidence.identifier, key)
+            db.set_key(evidence.identifier, key)
         else:
             evidence = evidence.macaroon
 
@@ -139,4 +175,17 @@ class Service(service.BaseService):
         if not db:
             raise ValueError(f"Database {database_key} not found.")
 
-        db.revocations.append(delegation_id)
+        db.revoke(delegation_id)
+
+    def revoke_delegations(self, delegation_ids: list, database_key: str):
+        """
+        Revoke multiple delegations in the database.
+
+        Params:
+            delegation_ids: the IDs of the delegations to be revoked.
+        """
+        db = self.db_broker.get_database(database_key)
+        if not db:
+            raise ValueError(f"Database {database_key} not found.")
+
+        db.revoke_many(delegation_ids)
@@ -29,16 +29,35 @@ class OnDelegateCheckService(base_service.BaseService):
     def has_access(self, delegatee, data_owner, object, action, db_name, evidence):
         # Note: the data_owner parameter is not used, as no traversal is done
 
-        if evidence.identifier in self.db_broker.get_database(db_name).revocations:
+        if self.db_broker.is_revoked(db_name, evidence.identifier):
             return False
         if evidence.receiver != delegatee:
             return False
 
-        for rule in evidence.rules:
-            if object in rule.object_ids and action in rule.actions:
-                return True
-
-        return False
+        return evidence.covers(object, action)
 
     def revoke_delegation(self, delegation_id: int, db_name: str):
-        self.db_broker.get_database(db_name).revocations.append(delegation_id)
+        self.db_broker.get_database(db_name).revoke(delegation_id)
+
+    def add_delegations(self, delegations, database_name: str):
+        db = self.db_broker.get_database(database_name)
+
+        evids = [
+            base_evidence.Evidence(
+                identifier=identifier,
+                issuer=party1,
+                receiver=party2,
+                rules=[base_evidence.Rule(object_ids=objects, actions=actions)],
+                valid_from=0,
+                valid_untill=expiry,
+                db_name=database_name,
+            )
+            for identifier, (party1, party2, objects, actions, expiry, *_) in zip(
+                db.get_next_identifiers(len(delegations)), delegations
+            )
+        ]
+        db.add_evidence_many(evids)
+        return evids
+
+    def revoke_delegations(self, delegation_ids, db_name: str):
+        self.db_broker.get_database(db_name).revoke_many(delegation_ids)
@@ -22,6 +22,24 @@ class Database(BaseDatabase.Database):
     Inherits from the base Database class.
     """
 
+    READ_LOCKED_METHODS = BaseDatabase.Database.READ_LOCKED_METHODS + (
+        "visualize_graph",
+        "has_access",
+        "has_bridges_to",
+        "get_bridged_nodes",
+        "_reachable_in_graph",
+        "_build_recursive_graph",
+        "get_reachability_stats",
+    )
+    WRITE_LOCKED_METHODS = BaseDatabase.Database.WRITE_LOCKED_METHODS + (
+        "add_node",
+        "add_parties",
+        "add_edge",
+        "add_edges",
+        "remove_edge",
+        "remove_edges",
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -29,6 +47,22 @@ class Database(BaseDatabase.Database):
         self.outgoing_bridges = {
             # node -> list[Bridge]
         }
+        self.incoming_bridges = {
+            # node -> list[Bridge] pointing at the node
+        }
+        self.permitted_bridges = {
+            # (node, object, action) -> list[Bridge] pointing at the node and delegating the action on the object
+        }
+        self.edges = {
+            # ID -> (u, v, key) of the edge in the graph, or the Bridge
+        }
+        self.permitted = {
+            # (object, action) -> {u: {v: set of IDs of the edges from u to v delegating the action on the object}}
+        }
+        self.reachability = {
+            # (object, action) -> {owner: set of parties with a valid path from the owner in the graph}
+        }
+        self.reachability_stats = {"hits": 0, "misses": 0, "updates": 0, "invalidations": 0}
 
     def visualize_graph(self, filename: str):
         """
@@ -50,6 +84,170 @@ class Database(BaseDatabase.Database):
         plt.savefig(filename)
         plt.close()
 
+    def _index_edge(self, u, v, identifier: int, objects: List[str], rights: List[str]):
+        """
+        Add an edge to the adjacency lists of every (object, action) it delegates, and extend the cached reachable
+        parties of the owners that reach the delegator.
+
+        Params:
+            u: the delegator.
+            v: the delegatee.
+            identifier: the ID of the edge.
+            objects: the objects of the edge.
+            rights: the actions of the edge.
+        """
+        for resource in set(objects or ()):
+            for action in set(rights or ()):
+                adjacency = self.permitted.setdefault((resource, action), {})
+                adjacency.setdefault(u, {}).setdefault(v, set()).add(identifier)
+
+                for reachable in self.reachability.get((resource, action), {}).values():
+                    if u in reachable and v not in reachable:
+                        self._extend_reachable(reachable, v, adjacency)
+                        self.reachability_stats["updates"] += 1
+
+    def _unindex_edge(self, u, v, identifier: int, objects: List[str], rights: List[str]):
+        """
+        Remove an edge from the adjacency lists of every (object, action) it delegates, see _index_edge.
+        Unless a parallel edge still delegates the (object, action), the cached reachable parties of the owners that
+        reach the delegator are invalidated, as the edge may have been on their paths.
+        """
+        for resource in set(objects or ()):
+            for action in set(rights or ()):
+                adjacency = self.permitted[(resource, action)]
+                identifiers = adjacency[u][v]
+                identifiers.discard(identifier)
+                if not self._has_valid_edge(identifiers):
+                    self._invalidate_reachable(resource, action, u)
+                if not identifiers:
+                    del adjacency[u][v]
+                    if not adjacency[u]:
+                        del adjacency[u]
+                        if not adjacency:
+                            del self.permitted[(resource, action)]
+
+    def _extend_reachable(self, reachable: set, party_id, adjacency: dict):
+        """
+        Add a newly reachable party and the parties reachable from it to a set of reachable parties.
+
+        Params:
+            reachable: the set of reachable parties, extended in place.
+            party_id: the newly reachable party.
+            adjacency: the adjacency lists of the (object, action) of the set.
+        """
+        reachable.add(party_id)
+        queue = deque([party_id])
+        while queue:
+            u = queue.popleft()
+            for v, identifiers in adjacency.get(u, {}).items():
+                if v not in reachable and self._has_valid_edge(identifiers):
+                    reachable.add(v)
+                    queue.append(v)
+
+    def _invalidate_reachable(self, resource, action, party_id):
+        """
+        Drop the cached reachable parties for an (object, action) of the owners that reach a party.
+
+        Params:
+            resource: the object.
+            action: the action.
+            party_id: the party.
+        """
+        owners = self.reachability.get((resource, action), {})
+        for owner_id in [owner_id for owner_id, reachable in owners.items() if party_id in reachable]:
+            del owners[owner_id]
+            self.reachability_stats["invalidations"] += 1
+
+    def get_reachability_stats(self) -> dict:
+        """
+        Get the size and the counters of the reachability cache.
+
+        Returns:
+            A dict with the number of cached owners per (object, action), the total number of cached parties, and
+            the number of hits, misses, incremental updates and invalidations.
+        """
+        return {
+            "entries": sum(len(owners) for owners in self.reachability.values()),
+            "parties": sum(len(reachable) for owners in self.reachability.values() for reachable in owners.values()),
+            **self.reachability_stats,
+        }
+
+    def revoke(self, evidence_id: int):
+        """
+        Revoke an edge by its ID, and invalidate the cached reachable parties that may depend on it.
+
+        Params:
+            evidence_id: the ID of the edge.
+        """
+        super().revoke(evidence_id)
+        self._invalidate_revoked(evidence_id)
+
+    def revoke_many(self, evidence_ids: List[int]):
+        """
+        Revoke multiple edges by their IDs, and invalidate the cached reachable parties that may depend on them.
+
+        Params:
+            evidence_ids: the IDs of the edges.
+        """
+        super().revoke_many(evidence_ids)
+        for evidence_id in evidence_ids:
+            self._invalidate_revoked(evidence_id)
+
+    def _invalidate_revoked(self, identifier: int):
+        """
+        Invalidate the cached reachable parties of the owners that reach the delegator of a revoked edge, for every
+        (object, action) the edge delegates that no parallel edge still delegates, see _unindex_edge.
+
+        Params:
+            identifier: the ID of the revoked edge.
+        """
+        location = self.edges.get(identifier)
+        if not isinstance(location, tuple):
+            # Bridges and unknown IDs are not on any path within the graph
+            return
+
+        u, v, key = location
+        data = self.graph.edges[u, v, key]
+        for resource in set(data["objects"] or ()):
+            for action in set(data["rights"] or ()):
+                if not self._has_valid_edge(self.permitted[(resource, action)][u][v]):
+                    self._invalidate_reachable(resource, action, u)
+
+    def _add_bridge(self, bridge: Bridge):
+        """
+        Add a bridge, indexing it by its source, by its target, and by its target per (object, action) it delegates.
+
+        Params:
+            bridge: the bridge.
+        """
+        self.edges[bridge.id] = bridge
+        self.outgoing_bridges.setdefault(bridge.from_node, []).append(bridge)
+        self.incoming_bridges.setdefault(bridge.to_node, []).append(bridge)
+        for resource in set(bridge.objects or ()):
+            for action in set(bridge.rights or ()):
+                self.permitted_bridges.setdefault((bridge.to_node, resource, action), []).append(bridge)
+
+    def _remove_bridge(self, bridge: Bridge):
+        """
+        Remove a bridge from all indexes, see _add_bridge.
+
+        Params:
+            bridge: the bridge.
+        """
+        del self.edges[bridge.id]
+        self.outgoing_bridges[bridge.from_node].remove(bridge)
+        self._remove_indexed_bridge(self.incoming_bridges, bridge.to_node, bridge)
+        for resource in set(bridge.objects or ()):
+            for action in set(bridge.rights or ()):
+                self._remove_indexed_bridge(self.permitted_bridges, (bridge.to_node, resource, action), bridge)
+
+    @staticmethod
+    def _remove_indexed_bridge(index: dict, key, bridge: Bridge):
+        bridges = index[key]
+        bridges.remove(bridge)
+        if not bridges:
+            del index[key]
+
     def add_node(self, node):
         self.graph.add_node(node)
 
@@ -64,80 +262,254 @@ class Database(BaseDatabase.Database):
         identifier = self.get_next_identifier()
 
         if not self.graph.has_node(v):  # Create a bridge
-            self.outgoing_bridges[u] = self.outgoing_bridges.get(u, [])
-            self.outgoing_bridges[u].append(Bridge(identifier, u, v, objects, rights))
+            self._add_bridge(Bridge(identifier, u, v, objects, rights))
             return oracle_evidence.Evidence(identifier, db_name=db_name)
 
         # Add an edge in the local graph
-        self.graph.add_edge(u, v, id=identifier, objects=objects, rights=rights or [])
+        self._add_graph_edge(u, v, identifier, objects, rights)
         return oracle_evidence.Evidence(identifier, db_name=db_name)
 
-    def _in_graph_path_valid(self, owner_id, party_id, resource, action):
-        paths = list(nx.all_simple_paths(self.graph, source=owner_id, target=party_id))
-        for path in paths:
-            valid_path = True
-            for i in range(len(path) - 1):
-                u, v = path[i], path[i + 1]
-                edge_data = self.graph.get_edge_data(u, v)
-
-                if edge_data is None:
-                    valid_path = False
-                    break
-                edge_data = edge_data[0]
+    def add_edges(self, edges, db_name: str):
+        """
+        Add multiple edges (or bridges) at once, allocating their identifiers as a single block.
 
-                if edge_data.get("id") is None:
-                    valid_path = False
-                    break
-                if edge_data.get("id") in self.revocations:
-                    valid_path = False
-                    break
-                if resource not in edge_data.get("objects", []) or action not in edge_data.get("rights", []):
-                    valid_path = False
-                    break
+        Params:
+            edges: a list of (u, v, objects, rights) tuples.
+            db_name: the name of this database.
 
-            if valid_path:
-                return True
+        Returns:
+            A list with the evidence of every edge, in the order of the edges.
+        """
+        for u, *_ in edges:
+            if not self.graph.has_node(u):
+                raise ValueError(f"Node '{u}' does not exist in the graph.")
+
+        evidences = []
+        for identifier, (u, v, objects, rights) in zip(self.get_next_identifiers(len(edges)), edges):
+            if not self.graph.has_node(v):  # Create a bridge
+                self._add_bridge(Bridge(identifier, u, v, objects, rights))
+            else:
+                self._add_graph_edge(u, v, identifier, objects, rights)
+            evidences.append(oracle_evidence.Evidence(identifier, db_name=db_name))
+
+        return evidences
+
+    def _add_graph_edge(self, u, v, identifier: int, objects: List[str], rights: List[str]):
+        """
+        Add an edge to the graph, and index it by its ID and by the (object, action) pairs it delegates.
+
+        Params:
+            u: the delegator.
+            v: the delegatee.
+            identifier: the ID of the edge.
+            objects: the objects of the edge.
+            rights: the actions of the edge.
+        """
+        # add_edge is cheaper than add_edges_from on a MultiDiGraph, which looks up the edge keys of every pair
+        key = self.graph.add_edge(u, v, id=identifier, objects=objects, rights=rights or [])
+        self.edges[identifier] = (u, v, key)
+        self._index_edge(u, v, identifier, objects, rights)
+
+    def remove_edge(self, edge_id: int) -> bool:
+        """
+        Remove an edge (or bridge) by its ID.
+
+        Params:
+            edge_id: the ID of the edge.
+
+        Returns:
+            True if the edge was removed, False if it was not found.
+        """
+        return self._remove_edge(edge_id)
+
+    def _remove_edge(self, edge_id: int) -> bool:
+        location = self.edges.get(edge_id)
+        if location is None:
+            return False
 
+        if isinstance(location, Bridge):
+            self._remove_bridge(location)
+            return True
+
+        u, v, key = location
+        data = self.graph.edges[u, v, key]
+        self.graph.remove_edge(u, v, key)
+        del self.edges[edge_id]
+        self._unindex_edge(u, v, edge_id, data["objects"], data["rights"])
+        return True
+
+    def remove_edges(self, edge_ids: List[int]) -> List[bool]:
+        """
+        Remove multiple edges (or bridges) by their IDs.
+
+        Params:
+            edge_ids: the IDs of the edges.
+
+        Returns:
+            A list with, for every edge, True if it was removed, False if it was not found.
+        """
+        removed = {edge_id for edge_id in dict.fromkeys(edge_ids) if self._remove_edge(edge_id)}
+        return [edge_id in removed for edge_id in edge_ids]
+
+    def _has_valid_edge(self, identifiers: set) -> bool:
+        """
+        Check if any of the parallel edges delegating an (object, action) between two parties is not revoked.
+
+        Params:
+            identifiers: the IDs of the edges, see permitted.
+
+        Returns:
+            True if the delegation can be followed, False otherwise.
+        """
+        for identifier in identifiers:
+            if identifier not in self.revocations:
+                return True
         return False
 
-    def _build_recursive_graph(self, party_id, resource, action, visited=None):
-        """Recursively build a graph using the graph, to find all root parties that can access the resource with the action."""
-        if visited is None:
-            visited = set()
-        if party_id in visited:
-            return []
+    def _in_graph_path_valid(self, owner_id, party_id, resource, action):
+        """
+        Check if there is a valid path from the owner to a party in the current graph, with a breadth-first search
+        that only follows the delegations of the action on the resource that are not revoked, and stops as soon as
+        the party is reached. The search walks the adjacency lists of the (resource, action) only, so edges that do not
+        delegate it are never touched, and every party is visited at most once.
 
-        visited.add(party_id)
-        roots = []
+        Params:
+            owner_id: the identifier of the owner.
+            party_id: the identifier of the party.
+            resource: the resource to be accessed.
+            action: the action to be performed on the resource.
 
-        if self.graph.has_node(party_id):
-            for u in self.graph.predecessors(party_id):
-                edge_data_list = self.graph.get_edge_data(u, party_id)
-                if not edge_data_list:
+        Returns:
+            True if there is a valid path, False otherwise.
+        """
+        if not self.graph.has_node(owner_id) or not self.graph.has_node(party_id):
+            return False
+        if owner_id == party_id:
+            return True
+
+        adjacency = self.permitted.get((resource, action), {})
+        visited = {owner_id}
+        queue = deque([owner_id])
+        while queue:
+            u = queue.popleft()
+            for v, identifiers in adjacency.get(u, {}).items():
+                if v in visited or not self._has_valid_edge(identifiers):
                     continue
+                if v == party_id:
+                    return True
 
-                valid_edge = all(
-                    edge.get("id") not in self.revocations
-                    and resource in edge.get("objects", [])
-                    and action in edge.get("rights", [])
-                    for edge in edge_data_list.values()
-                )
-                if not valid_edge:
+                visited.add(v)
+                queue.append(v)
+
+        return False
+
+    def _reachable_in_graph(self, owner_id, resource, action):
+        """
+        Get all parties that have a valid path from the owner in the current graph. The parties are cached per owner
+        and (object, action), extended when edges are added and invalidated when edges are removed or revoked, see
+        _index_edge and _unindex_edge.
+
+        Params:
+            owner_id: the identifier of the owner.
+            resource: the resource to be accessed.
+            action: the action to be performed on the resource.
+
+        Returns:
+            The set of reachable parties, including the owner itself if it is in the graph. The set is shared with the
+            cache and must not be changed.
+        """
+        owners = self.reachability.get((resource, action))
+        reachable = owners.get(owner_id) if owners else None
+        if reachable is not None:
+            self.reachability_stats["hits"] += 1
+            return reachable
+
+        self.reachability_stats["misses"] += 1
+        reachable = self._search_reachable(owner_id, resource, action)
+        if reachable:
+            self.reachability.setdefault((resource, action), {})[owner_id] = reachable
+        return reachable
+
+    def _search_reachable(self, owner_id, resource, action):
+        """
+        Find all parties that have a valid path from the owner in the current graph, with a single search.
+        A path is valid under the same conditions as in _in_graph_path_valid.
+
+        Params:
+            owner_id: the identifier of the owner.
+            resource: the resource to be accessed.
+            action: the action to be performed on the resource.
+
+        Returns:
+            The set of reachable parties, including the owner itself if it is in the graph.
+        """
+        if not self.graph.has_node(owner_id):
+            return set()
+
+        adjacency = self.permitted.get((resource, action), {})
+        reachable = {owner_id}
+        queue = deque([owner_id])
+        while queue:
+            u = queue.popleft()
+            for v, identifiers in adjacency.get(u, {}).items():
+                if v in reachable or not self._has_valid_edge(identifiers):
                     continue
 
-                roots.extend(self._build_recursive_graph(u, resource, action, visited))
+                reachable.add(v)
+                queue.append(v)
 
-        for bridge_source, bridges in self.outgoing_bridges.items():
-            if bridge_source == party_id:
-                continue
-            for bridge in bridges:
-                if bridge.to_node == party_id and resource in bridge.objects and action in bridge.rights:
-                    roots.extend(self._build_recursive_graph(bridge_source, resource, action, visited))
+        return reachable
 
-        if not roots:
-            roots.append(party_id)
+    def _delegators(self, party_id, resource, action):
+        """
+        Iterate over the parties a party can have received the action on the resource from: the delegators with a
+        valid edge in the graph, followed by the parties bridged to it from other databases.
 
-        return roots
+        Params:
+            party_id: the identifier of the party.
+            resource: the resource to be accessed.
+            action: the action to be performed on the resource.
+
+        Returns:
+            An iterator of party identifiers, in the order in which they are searched.
+        """
+        if self.graph.has_node(party_id):
+            # A delegator can be followed when any of its parallel edges delegates the action, as in the searches
+            adjacency = self.permitted.get((resource, action), {})
+            for u in self.graph.predecessors(party_id):
+                identifiers = adjacency.get(u, {}).get(party_id)
+                if identifiers and self._has_valid_edge(identifiers):
+                    yield u
+
+        for bridge in self.permitted_bridges.get((party_id, resource, action), ()):
+            if bridge.from_node != party_id:
+                yield bridge.from_node
+
+    def _build_recursive_graph(self, party_id, resource, action):
+        """
+        Build a graph back from a party, to find all root parties that can access the resource with the action.
+        A party is a root when none of its delegators leads to a root that was not found before. The graph is walked
+        depth-first with an explicit stack, so the length of a delegation chain is not bounded by the recursion limit.
+        """
+        visited = {party_id}
+        stack = [
+            # (party, iterator over its delegators, roots found through them)
+            (party_id, self._delegators(party_id, resource, action), [])
+        ]
+        while True:
+            node, delegators, roots = stack[-1]
+            for u in delegators:
+                if u not in visited:
+                    visited.add(u)
+                    stack.append((u, self._delegators(u, resource, action), []))
+                    break
+            else:
+                stack.pop()
+                if not roots:
+                    roots.append(node)
+                if not stack:
+                    return roots
+                stack[-1][2].extend(roots)
 
     def has_access(self, party_id: str, owner_id: str, resource: str, action: str):
         """Need to find a path from owner_id to party_id.
@@ -148,24 +520,27 @@ class Database(BaseDatabase.Database):
         """
 
         # Check if there is a path in the current graph (single AR)
-        nodes_in_graph = self.graph.has_node(owner_id) and self.graph.has_node(party_id)
-        if nodes_in_graph and nx.has_path(self.graph, owner_id, party_id):
-            if self._in_graph_path_valid(owner_id, party_id, resource, action):
-                return True
+        if party_id in self._reachable_in_graph(owner_id, resource, action):
+            return True
 
         # No complete path found, utilize bridges
         return self._build_recursive_graph(party_id, resource, action)
 
     def has_bridges_to(self, node):
-        """Check if there are any outgoing bridges from the given node."""
-        for source, bridges in self.outgoing_bridges.items():
-            if source == node:
-                continue
-            for bridge in bridges:
-                if bridge.to_node == node:
-                    return True
+        """Check if there are any bridges from another node to the given node."""
+        return any(bridge.from_node != node for bridge in self.incoming_bridges.get(node, ()))
 
-        return False
+    def get_bridged_nodes(self, nodes) -> set:
+        """
+        Check which of the given nodes have incoming bridges from another node.
+
+        Params:
+            nodes: the nodes to check.
+
+        Returns:
+            The set of the nodes with incoming bridges, see has_bridges_to.
+        """
+        return {node for node in set(nodes) if self.has_bridges_to(node)}
 
 
 class DatabaseBroker(BaseDatabase.DatabaseBroker):
@@ -182,28 +557,135 @@ class DatabaseBroker(BaseDatabase.DatabaseBroker):
             from_node, to_node, objects, rights=actions, db_name=from_db, evidence=evidence
         )
 
+    def add_links(self, from_db, links):
+        """
+        Add multiple links to a database at once.
+
+        Params:
+            from_db: the name of the database to add the links to.
+            links: a list of (from_node, to_node, objects, actions) tuples.
+
+        Returns:
+            A list with the evidence of every link, in the order of the links.
+        """
+        if from_db not in self.databases:
+            raise ValueError(f"Source DB {from_db} not registered.")
+
+        return self.databases[from_db].add_edges(links, db_name=from_db)
+
     def has_access(self, party_id: str, owner_id: str, resource: str, action: str, db_name: str, evidence) -> bool:
         """Check if a party has access to a resource with a specific action."""
+        return self._has_access(party_id, owner_id, resource, action, db_name, evidence, set())
+
+    def _has_access(self, party_id, owner_id, resource, action, db_name, evidence, visited: set) -> bool:
+        """
+        Check if a party has access within a database, or through the bridges to its roots, see has_access.
+        A party is searched at most once per database, so cycles of bridges between databases end the search.
+
+        Params:
+            visited: the (db_name, party_id) pairs searched before in the same access check.
+        """
+        if (db_name, party_id) in visited:
+            return False
+        visited.add((db_name, party_id))
+
         db = self.databases.get(db_name)
         access_or_roots = db.has_access(party_id, owner_id, resource, action)
+        self._record(db_name)
 
         if access_or_roots is True:
             return True
 
-        for root in access_or_roots:
+        return self._has_access_through_roots(access_or_roots, owner_id, resource, action, evidence, visited)
+
+    def has_access_many(self, requests) -> List[bool]:
+        """
+        Check multiple access requests at once.
+        The parties reachable within a database are found with a single search per owner, resource and action,
+        requests that can not be answered within the database fall back to the bridges.
+
+        Params:
+            requests: a list of (party_id, owner_id, resource, action, db_name, evidence) tuples.
+
+        Returns:
+            A list with, for every request, True if the party has access, in the order of the requests.
+        """
+        reachable = {
+            # (db_name, owner_id, resource, action): set of parties with a valid path from the owner
+        }
+        results = {
+            # (party_id, owner_id, resource, action, db_name): result of the request
+        }
+
+        for party_id, owner_id, resource, action, db_name, evidence in requests:
+            key = (party_id, owner_id, resource, action, db_name)
+            if key in results:
+                continue
+
+            db = self.databases.get(db_name)
+            search = (db_name, owner_id, resource, action)
+            if search not in reachable:
+                reachable[search] = db._reachable_in_graph(owner_id, resource, action)
+                self._record(db_name)
+
+            if party_id in reachable[search]:
+                results[key] = True
+            else:
+                roots = db._build_recursive_graph(party_id, resource, action)
+                self._record(db_name)
+                results[key] = self._has_access_through_roots(
+                    roots, owner_id, resource, action, evidence, {(db_name, party_id)}
+                )
+
+        return [results[tuple(request[:5])] for request in requests]
+
+    def _has_access_through_roots(
+        self, roots, owner_id: str, resource: str, action: str, evidence, visited: set
+    ) -> bool:
+        """
+        Check if any of the root parties of a database, which have no valid incoming edges, has access through a
+        bridge from another database. With a coalescing broker, the bridges to all roots are looked up in every
+        database at once.
+
+        Params:
+            roots: the root parties found by _build_recursive_graph.
+            owner_id: the identifier of the owner.
+            resource: the resource to be accessed.
+            action: the action to be performed on the resource.
+            evidence: the evidence of the request.
+            visited: the (db_name, party_id) pairs searched before in the same access check, see _has_access.
+
+        Returns:
+            True if one of the roots is the owner or has access through a bridge, False otherwise.
+        """
+        for root in roots:
             if root == owner_id:
                 return True
 
         for db in self.databases.values():
-            for root in access_or_roots:
-                if db.has_bridges_to(root):
-                    found = self.has_access(
+            if self.coalesce:
+                # Look up the bridges to all roots with a single request to the AR
+                bridged = db.get_bridged_nodes(roots)
+                self._record(db.name)
+            else:
+                bridged = None
+
+            for root in roots:
+                if bridged is None:
+                    has_bridges = db.has_bridges_to(root)
+                    self._record(db.name)
+                else:
+                    has_bridges = root in bridged
+
+                if has_bridges:
+                    found = self._has_access(
                         party_id=root,
                         owner_id=owner_id,
                         resource=resource,
                         action=action,
                         db_name=db.name,
                         evidence=evidence,
+                        visited=visited,
                     )
                     if found:
                         return True
@@ -1,3 +1,5 @@
+import asyncio
+
 from ..base import service as BaseService
 from typing import List
 
@@ -40,6 +42,23 @@ class OracleService(BaseService.BaseService):
             evidence=evidence,
         )
 
+    def add_delegations(self, delegations, db_name: str) -> List:
+        """
+        Add multiple delegations to the database at once.
+
+        Params:
+            delegations: a list of (party1, party2, objects, actions, expiry) tuples, optionally followed by
+                the evidence the delegation is based on.
+            db_name: the name of the database to add the delegations to.
+
+        Returns:
+            A list with the evidence of every delegation, in the order of the delegations.
+        """
+        return self.db_broker.add_links(
+            db_name,
+            [(party1, party2, objects, actions) for party1, party2, objects, actions, *_ in delegations],
+        )
+
     def add_parties(self, party_ids: List[str], db_name: str):
         """
         Add multiple parties to the database.
@@ -54,6 +73,63 @@ class OracleService(BaseService.BaseService):
         """Check if a party has access to a resource with a specific action."""
         return self.db_broker.has_access(party_id, owner_id, resource, action, db_name, evidence)
 
+    async def has_access_async(
+        self, party_id: str, owner_id: str, resource: str, action: str, db_name: str, evidence, broker, visited=None
+    ) -> bool:
+        """
+        Check if a party has access to a resource like has_access, with every lookup being a request to an AR.
+        The bridge lookups for all roots in all databases are sent to their ARs concurrently, as are the searches
+        continuing from the bridged roots. Every party is searched at most once per database, so cycles of bridges
+        between databases end the search.
+
+        Params:
+            party_id: the party requesting access.
+            owner_id: the identifier of the owner.
+            resource: the resource to be accessed.
+            action: the action to be performed on the resource.
+            db_name: the name of the database to start the search in.
+            evidence: the evidence presented by the party.
+            broker: the AsyncDatabaseBroker to send the lookups through.
+            visited: a set of the (database name, party) pairs already searched.
+
+        Returns:
+            True if the party has access to the resource, False otherwise.
+        """
+        if visited is None:
+            visited = set()
+
+        if (db_name, party_id) in visited:
+            return False
+        visited.add((db_name, party_id))
+
+        access_or_roots = await broker.call(db_name, "has_access", party_id, owner_id, resource, action)
+        if access_or_roots is True or owner_id in access_or_roots:
+            return True
+
+        lookups = [(name, root) for name in broker.databases for root in access_or_roots]
+        has_bridges = await asyncio.gather(*(broker.call(name, "has_bridges_to", root) for name, root in lookups))
+
+        found = await asyncio.gather(
+            *(
+                self.has_access_async(root, owner_id, resource, action, name, evidence, broker, visited)
+                for (name, root), bridged in zip(lookups, has_bridges)
+                if bridged
+            )
+        )
+        return any(found)
+
+    def has_access_many(self, requests: List[tuple]) -> List[bool]:
+        """
+        Check multiple access requests at once, sharing the graph search per owner, resource and action.
+
+        Params:
+            requests: a list of (party_id, owner_id, resource, action, db_name, evidence) tuples.
+
+        Returns:
+            A list with, for every request, True if the party has access, in the order of the requests.
+        """
+        return self.db_broker.has_access_many(requests)
+
     def revoke_delegation(self, edge_id: int, database_name) -> bool:
         """
         Revoke a delegation by edge ID.
@@ -64,17 +140,16 @@ class OracleService(BaseService.BaseService):
         Returns:
             True if the revocation was successful, False otherwise.
         """
-        db = self.db_broker.get_database(database_name)
+        return self.db_broker.get_database(database_name).remove_edge(edge_id)
 
-        for u, v, data in db.graph.edges(data=True):
-            if data["id"] == edge_id:
-                db.graph.remove_edge(u, v)
-                return True
+    def revoke_delegations(self, edge_ids: List[int], database_name) -> List[bool]:
+        """
+        Revoke multiple delegations by their edge IDs, in a single pass over the edges and bridges.
 
-        # If we reach here, the edge was not found, look in outgoing bridges
-        for bridge in db.outgoing_bridges.get(edge_id, []):
-            if bridge.id == edge_id:
-                db.outgoing_bridges[bridge.from_node].remove(bridge)
-                return True
+        Params:
+            edge_ids: the IDs of the edges to revoke.
 
-        return False
+        Returns:
+            A list with, for every edge, True if the revocation was successful, False otherwise.
+        """
+        return self.db_broker.get_database(database_name).remove_edges(edge_ids)
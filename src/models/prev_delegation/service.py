@@ -1,6 +1,9 @@
+import asyncio
+
 from ..base import service as base_service
 from . import evidence as prev_delegation_evidence
 from ..base import evidence as base_evidence
+from ..base.lookups import LookupBatch
 from typing import List
 
 
@@ -9,20 +12,10 @@ class PrevDelegationService(base_service.BaseService):
         """
         Get the previous delegation for a party and object.
         """
-        for db_name, evidence in self.db_broker.get_all_evidence_by_party(party_id):
-            # Build a mapping from object_id to a list of actions
-            object_actions = {}
-            for rule in evidence.rules:
-                for object_id in rule.object_ids:
-                    if object_id not in object_actions:
-                        object_actions[object_id] = list(rule.actions)
-                    else:
-                        object_actions[object_id].extend(rule.actions)
-
-            # Check if all object_ids are present and all actions are allowed for each object
-            if all(obj in object_actions for obj in object_ids) and all(
-                act in object_actions[obj] for obj in object_ids for act in actions
-            ):
+        for db_name, batch in self.db_broker.get_all_evidence_batches_by_party(party_id):
+            # Select the evidence for which all object_ids are present and all actions are allowed for each object
+            at = self.db_broker.get_database(db_name).clock()
+            for evidence in batch.select_all(object_ids, actions, at=at):
                 return db_name, evidence
 
         return None, None
@@ -49,6 +42,30 @@ class PrevDelegationService(base_service.BaseService):
         self.db_broker.get_database(database_name).add_evidence(evid)
         return evid
 
+    def add_delegations(self, delegations, database_name: str):
+        db = self.db_broker.get_database(database_name)
+
+        evids = []
+        for identifier, (party1, party2, objects, actions, expiry, *evidence) in zip(
+            db.get_next_identifiers(len(delegations)), delegations
+        ):
+            prev_delegation = evidence[0] if evidence else None
+            evids.append(
+                prev_delegation_evidence.Evidence(
+                    identifier=identifier,
+                    issuer=party1,
+                    receiver=party2,
+                    rules=[base_evidence.Rule(object_ids=objects, actions=actions)],
+                    valid_from=0,
+                    valid_untill=expiry,
+                    db_name=database_name,
+                    prev_delegation=prev_delegation,
+                    prev_db_name=prev_delegation.db_name if prev_delegation else database_name,
+                )
+            )
+        db.add_evidence_many(evids)
+        return evids
+
     def party_has_access_to_object(self, party_id: str, object_id: str, action: str) -> bool:
         """
         Check if a party has access to an object based on the evidence in the database.
@@ -79,11 +96,7 @@ class PrevDelegationService(base_service.BaseService):
         """
         Check if the evidence is for the search.
         """
-        for rule in evidence.rules:
-            if object_id in rule.object_ids and action in rule.actions and evidence.receiver == party_id:
-                return True
-
-        return False
+        return evidence.receiver == party_id and evidence.covers(object_id, action)
 
     def has_recursive_access(
         self,
@@ -126,10 +139,13 @@ class PrevDelegationService(base_service.BaseService):
         """
         Check if a party has recursive access to an object.
         """
+        if self.db_broker.coalesce:
+            return self._has_access_coalesced(current_party, data_owner, object, action, db_name, evidence)
+
         # evidences = self.db_broker.get_all_evidence_by_party(current_party)
 
         # for db_name, evidence in evidences:
-        if evidence.identifier in self.db_broker.get_database(db_name).revocations:
+        if self.db_broker.is_revoked(db_name, evidence.identifier):
             return False
 
         if self._is_evidence_for_search(evidence, current_party, object, action):
@@ -137,14 +153,129 @@ class PrevDelegationService(base_service.BaseService):
                 return True
 
             # Recursively check if the issuer has access
-            prev_evidence = self.db_broker.get_database(evidence.prev_db_name).get_evidence(
-                evidence.prev_delegation.identifier
+            prev_evidence = self.db_broker.get_database_entry(
+                evidence.prev_db_name, evidence.prev_delegation.identifier
             )
             if self.has_access(evidence.issuer, data_owner, object, action, evidence.prev_db_name, prev_evidence):
                 return True
 
         return False
 
+    async def has_access_async(
+        self,
+        current_party: str,
+        data_owner: str,
+        object: str,
+        action: str,
+        db_name: str,
+        evidence: base_evidence.Evidence,
+        broker,
+    ) -> bool:
+        """
+        Check if a party has recursive access to an object like has_access, with every lookup being a request to an AR.
+        The evidence carries its chain of previous delegations, so the stored copies and the revocation status of all
+        links are requested from their ARs concurrently, after which the chain is checked locally.
+
+        Params:
+            current_party: the party requesting access.
+            data_owner: the identifier of the data owner.
+            object: the identifier of the object.
+            action: the action to be performed on the object.
+            db_name: the name of the database of the evidence.
+            evidence: the evidence presented by the party.
+            broker: the AsyncDatabaseBroker to send the lookups through.
+
+        Returns:
+            True if the party has access to the object, False otherwise.
+        """
+        links = self._chain_links(data_owner, db_name, evidence)
+        results = await asyncio.gather(
+            *(broker.is_revoked(link_db_name, link.identifier) for link_db_name, link in links),
+            *(broker.get_database_entry(link_db_name, link.identifier) for link_db_name, link in links[1:]),
+        )
+        revoked, stored = results[: len(links)], [evidence] + results[len(links) :]
+        return self._check_chain(current_party, data_owner, object, action, revoked, stored)
+
+    def _has_access_coalesced(
+        self,
+        current_party: str,
+        data_owner: str,
+        object: str,
+        action: str,
+        db_name: str,
+        evidence: base_evidence.Evidence,
+    ) -> bool:
+        """
+        Check if a party has recursive access to an object like has_access, collecting the lookups of the stored
+        copies and the revocation status of all links of the chain into a single request per AR.
+
+        Params:
+            current_party: the party requesting access.
+            data_owner: the identifier of the data owner.
+            object: the identifier of the object.
+            action: the action to be performed on the object.
+            db_name: the name of the database of the evidence.
+            evidence: the evidence presented by the party.
+
+        Returns:
+            True if the party has access to the object, False otherwise.
+        """
+        links = self._chain_links(data_owner, db_name, evidence)
+
+        batch = LookupBatch(self.db_broker)
+        for position, (link_db_name, link) in enumerate(links):
+            batch.check_revoked(link_db_name, link.identifier)
+            if position > 0:
+                batch.get_entry(link_db_name, link.identifier)
+        batch.flush()
+
+        revoked = [batch.is_revoked(link_db_name, link.identifier) for link_db_name, link in links]
+        stored = [evidence] + [batch.entry(link_db_name, link.identifier) for link_db_name, link in links[1:]]
+        return self._check_chain(current_party, data_owner, object, action, revoked, stored)
+
+    def _chain_links(self, data_owner: str, db_name: str, evidence: base_evidence.Evidence) -> list:
+        """
+        Follow the previous delegations carried by the evidence, up to the data owner.
+
+        Params:
+            data_owner: the identifier of the data owner.
+            db_name: the name of the database of the evidence.
+            evidence: the evidence presented by the party.
+
+        Returns:
+            A list of (db_name, evidence) tuples, starting with the presented evidence.
+        """
+        links = [(db_name, evidence)]
+        while links[-1][1].prev_delegation is not None and links[-1][1].issuer != data_owner:
+            links.append((links[-1][1].prev_db_name, links[-1][1].prev_delegation))
+        return links
+
+    def _check_chain(self, current_party: str, data_owner: str, object: str, action: str, revoked, stored) -> bool:
+        """
+        Check a chain of delegations, of which the stored copies and revocation status were looked up.
+
+        Params:
+            current_party: the party requesting access.
+            data_owner: the identifier of the data owner.
+            object: the identifier of the object.
+            action: the action to be performed on the object.
+            revoked: for every link of the chain, True if it is revoked.
+            stored: for every link of the chain, the stored evidence or None.
+
+        Returns:
+            True if the party has access to the object, False otherwise.
+        """
+        for link_revoked, link in zip(revoked, stored):
+            if link is None or link_revoked or not self._is_evidence_for_search(link, current_party, object, action):
+                return False
+
+            if link.issuer == data_owner:
+                return True
+
+            current_party = link.issuer
+
+        return False
+
     def revoke_delegation(self, delegation_id: int, database_name) -> bool:
         """
         Revoke a delegation in the database.
@@ -160,3 +291,19 @@ class PrevDelegationService(base_service.BaseService):
             self.db_broker.get_database(database_name).revoke(delegation_id)
             return True
         return False
+
+    def revoke_delegations(self, delegation_ids: List[int], database_name) -> List[bool]:
+        """
+        Revoke multiple delegations in the database.
+
+        Params:
+            delegation_ids: the IDs of the delegations to be revoked.
+
+        Returns:
+            A list with, for every delegation, True if the revocation was successful, False otherwise.
+        """
+        db = self.db_broker.get_database(database_name)
+
+        results = [db.get_evidence(delegation_id) is not None for delegation_id in delegation_ids]
+        db.revoke_many([delegation_id for delegation_id, found in zip(delegation_ids, results) if found])
+        return results
@@ -1,3 +1,5 @@
+import asyncio
+
 from .evidence import Evidence
 from ..base import service
 from ..base import evidence as base_evidence
@@ -25,6 +27,27 @@ class PrevPartyService(service.BaseService):
         db.add_evidence(evid)
         return evid
 
+    def add_delegations(self, delegations, database_name):
+        db = self.db_broker.get_database(database_name)
+
+        evids = [
+            Evidence(
+                identifier=identifier,
+                issuer=party1,
+                receiver=party2,
+                rules=[base_evidence.Rule(object_ids=objects, actions=actions)],
+                valid_from=0,
+                valid_untill=expiry,
+                db_name=database_name,
+                prev_db_name=evidence[0].db_name if evidence and evidence[0] else None,
+            )
+            for identifier, (party1, party2, objects, actions, expiry, *evidence) in zip(
+                db.get_next_identifiers(len(delegations)), delegations
+            )
+        ]
+        db.add_evidence_many(evids)
+        return evids
+
     def revoke_delegation(self, delegation_id, database_name):
         """
         Revoke a delegation by its ID.
@@ -70,7 +93,7 @@ class PrevPartyService(service.BaseService):
         if visited is None:
             visited = set()
 
-        if evidence and evidence.identifier in self.db_broker.get_database(db_name).revocations:
+        if evidence and self.db_broker.is_revoked(db_name, evidence.identifier):
             # If the evidence is revoked, no need to check further
             return False
 
@@ -80,25 +103,228 @@ class PrevPartyService(service.BaseService):
 
         visited.add(current_party)
 
-        evidences = self.db_broker.get_database(db_name).get_evidence_by_party(current_party)
-        if evidence.prev_db_name:
-            evidences.extend(self.db_broker.get_database(evidence.prev_db_name).get_evidence_by_party(current_party))
+        db_names = [db_name]
+        if evidence is not None and evidence.prev_db_name:
+            db_names.append(evidence.prev_db_name)
 
         # Check if the current party has direct access to the object
         # for db_name, evidence in self.db_broker.get_all_evidence_by_party(current_party):
-        for evidence in evidences:
-            for rule in evidence.rules:
-                if evidence.identifier in self.db_broker.get_database(evidence.db_name).revocations:
-                    continue
+        for lookup_db_name in db_names:
+            database = self.db_broker.get_database(lookup_db_name)
+            batch = self.db_broker.get_evidence_batch_by_party(lookup_db_name, current_party)
+            revocations = self._get_revocations(batch)
 
-                if object_id in rule.object_ids and action in rule.actions:
-                    if evidence.issuer == data_owner:
-                        return True
+            # Select the valid, non-revoked evidence for the object and action in a single pass
+            for evidence in batch.select(object_id, action, revocations=revocations, at=database.clock()):
+                if evidence.issuer == data_owner:
+                    return True
+
+                # Recursively check if the issuer has access
+                if self.has_access(
+                    evidence.issuer, data_owner, object_id, action, evidence.prev_db_name, evidence, visited
+                ):
+                    return True
 
-                    # Recursively check if the issuer has access
-                    if self.has_access(
-                        evidence.issuer, data_owner, object_id, action, evidence.prev_db_name, evidence, visited
-                    ):
+        return False
+
+    async def has_access_async(
+        self,
+        current_party: str,
+        data_owner: str,
+        object_id: str,
+        action: str,
+        db_name: str,
+        evidence: Evidence,
+        broker,
+    ) -> bool:
+        """
+        Check if a party has access to an object like has_access, with every lookup being a request to an AR.
+        The parties are searched by their distance to the delegatee, the lookups of all parties at the same distance
+        (and the revocation checks of the evidence leading to them) are sent to their ARs concurrently.
+
+        Params:
+            current_party: the party requesting access.
+            data_owner: the identifier of the data owner.
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+            db_name: the name of the database of the evidence.
+            evidence: the evidence presented by the party.
+            broker: the AsyncDatabaseBroker to send the lookups through.
+
+        Returns:
+            True if a path exists from the party to the data owner with the required access, False otherwise.
+        """
+
+        async def lookup(party, lookup_db_name, via):
+            if via is None:
+                return await broker.select_evidence_by_party(lookup_db_name, party, [object_id], [action])
+
+            selected, revoked = await asyncio.gather(
+                broker.select_evidence_by_party(lookup_db_name, party, [object_id], [action]),
+                broker.is_revoked(lookup_db_name, via.identifier),
+            )
+            return None if revoked else selected
+
+        if evidence and await broker.is_revoked(db_name, evidence.identifier):
+            return False
+
+        visited = set()
+        frontier = [(current_party, db_name, None)]
+        if evidence is not None and evidence.prev_db_name:
+            frontier.append((current_party, evidence.prev_db_name, None))
+
+        while frontier:
+            selections = await asyncio.gather(*(lookup(*entry) for entry in frontier))
+
+            candidates = {}
+            for (party, _, _), selected in zip(frontier, selections):
+                if selected is not None:
+                    visited.add(party)
+
+            for selected in selections:
+                for item in selected or []:
+                    if item.issuer == data_owner:
                         return True
 
+                    if item.prev_db_name is not None and item.issuer not in visited:
+                        candidates.setdefault((item.issuer, item.prev_db_name, item.identifier), item)
+
+            frontier = [(party, lookup_db_name, item) for (party, lookup_db_name, _), item in candidates.items()]
+
+        return False
+
+    def has_access_many(self, requests) -> list:
+        """
+        Check multiple access requests at once.
+        The requests for the same data owner, object and action share a single search from the delegatees back to the
+        data owner: a party (and the databases holding its evidence) is only searched once per batch.
+
+        Params:
+            requests: a list of (delegatee, data_owner, object_id, action, db_name, evidence) tuples.
+
+        Returns:
+            A list with, for every request, True if the delegatee has access, in the order of the requests.
+        """
+        searches = {
+            # (data_owner, object_id, action): {(party, database names): True if the party reaches the data owner}
+        }
+
+        results = []
+        for current_party, data_owner, object_id, action, db_name, evidence in requests:
+            if evidence and self.db_broker.is_revoked(db_name, evidence.identifier):
+                results.append(False)
+                continue
+
+            db_names = (
+                (db_name, evidence.prev_db_name) if evidence is not None and evidence.prev_db_name else (db_name,)
+            )
+            reached = searches.setdefault((data_owner, object_id, action), {})
+
+            explored = []
+            result = self._reaches_owner(current_party, data_owner, object_id, action, db_names, reached, explored)
+            if not result:
+                # The search was exhaustive, so none of the explored parties can reach the data owner
+                reached.update((state, False) for state in explored)
+            results.append(result)
+
+        return results
+
+    def _get_revocations(self, batch) -> dict:
+        """
+        Get the revocation stores of the databases holding the evidence of a batch. Databases that are not registered
+        are skipped, so their evidence is not revoked, like in is_revoked of the DatabaseBroker.
+
+        Params:
+            batch: the EvidenceBatch.
+
+        Returns:
+            A mapping from database name to revocation store, see EvidenceBatch.select.
+        """
+        databases = {name: self.db_broker.get_database(name) for name in batch.db_names}
+        return {name: database.revocations for name, database in databases.items() if database is not None}
+
+    def _reaches_owner(
+        self,
+        current_party: str,
+        data_owner: str,
+        object_id: str,
+        action: str,
+        db_names: tuple,
+        reached: dict,
+        explored: list,
+        visited=None,
+    ) -> bool:
+        """
+        Search for a path from a party back to the data owner, like has_access, reusing the results of earlier searches.
+
+        Params:
+            current_party: the current party being checked.
+            data_owner: the identifier of the data owner.
+            object_id: the identifier of the object.
+            action: the action to be performed on the object.
+            db_names: the names of the databases to search the evidence of the current party in.
+            reached: the results of earlier searches for the same data owner, object and action.
+            explored: the (party, database names) states explored by the current search.
+            visited: a set of visited parties to avoid cycles.
+
+        Returns:
+            True if a path exists from the current party to the data owner, False otherwise.
+        """
+        state = (current_party, db_names)
+        if state in reached:
+            return reached[state]
+
+        if visited is None:
+            visited = set()
+
+        # Avoid cycles
+        if current_party in visited:
+            return False
+
+        visited.add(current_party)
+        explored.append(state)
+
+        for db_name in db_names:
+            database = self.db_broker.get_database(db_name)
+            batch = self.db_broker.get_evidence_batch_by_party(db_name, current_party)
+            revocations = self._get_revocations(batch)
+
+            for evidence in batch.select(object_id, action, revocations=revocations, at=database.clock()):
+                if evidence.issuer == data_owner:
+                    reached[state] = True
+                    return True
+
+                prev_database = self.db_broker.get_database(evidence.prev_db_name)
+                if prev_database is None or self.db_broker.is_revoked(evidence.prev_db_name, evidence.identifier):
+                    continue
+
+                if self._reaches_owner(
+                    evidence.issuer,
+                    data_owner,
+                    object_id,
+                    action,
+                    (evidence.prev_db_name,),
+                    reached,
+                    explored,
+                    visited,
+                ):
+                    reached[state] = True
+                    return True
+
         return False
+
+    def revoke_delegations(self, delegation_ids, database_name):
+        """
+        Revoke multiple delegations by their IDs.
+
+        Params:
+            delegation_ids: the IDs of the delegations to be revoked.
+
+        Returns:
+            A list with, for every delegation, True if the revocation was successful, False otherwise.
+        """
+        db = self.db_broker.get_database(database_name)
+
+        results = [db.get_evidence(delegation_id) is not None for delegation_id in delegation_ids]
+        db.revoke_many([delegation_id for delegation_id, found in zip(delegation_ids, results) if found])
+        return results
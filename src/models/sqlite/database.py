@@ -0,0 +1,598 @@
+import importlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple
+
+from ..base import database
+from ..base import evidence as base_evidence
+from ..base.vectorized import EvidenceBatch
+
+# Attributes stored in the evidence and rules tables, any other attribute is pickled into the extras column
+COLUMN_ATTRIBUTES = {"identifier", "issuer", "receiver", "rules", "valid_from", "valid_untill", "db_name"}
+
+
+class EvidenceLink(NamedTuple):
+    """
+    Reference to a piece of evidence, stored in the extras in place of the previous evidence a delegation links to.
+    """
+
+    db_name: str
+    identifier: object
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    rowid INTEGER PRIMARY KEY,
+    identifier UNIQUE NOT NULL,
+    issuer TEXT NOT NULL,
+    receiver TEXT NOT NULL,
+    valid_from REAL NOT NULL,
+    valid_untill REAL NOT NULL,
+    db_name TEXT,
+    kind TEXT NOT NULL,
+    extras BLOB
+);
+CREATE TABLE IF NOT EXISTS rules (
+    evidence_rowid INTEGER NOT NULL REFERENCES evidence (rowid),
+    position INTEGER NOT NULL,
+    object_ids TEXT NOT NULL,
+    actions TEXT NOT NULL,
+    PRIMARY KEY (evidence_rowid, position)
+);
+CREATE TABLE IF NOT EXISTS links (
+    db_name TEXT,
+    identifier NOT NULL,
+    kind TEXT NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (db_name, identifier)
+);
+CREATE TABLE IF NOT EXISTS revocations (
+    identifier PRIMARY KEY,
+    revoked_at REAL
+);
+CREATE INDEX IF NOT EXISTS evidence_receiver ON evidence (receiver, valid_untill, valid_from);
+CREATE INDEX IF NOT EXISTS evidence_issuer ON evidence (issuer);
+"""
+
+# The statements below are compiled once per connection and reused from the sqlite3 statement cache
+INSERT_EVIDENCE = """
+INSERT INTO evidence (identifier, issuer, receiver, valid_from, valid_untill, db_name, kind, extras)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_RULE = "INSERT INTO rules (evidence_rowid, position, object_ids, actions) VALUES (?, ?, ?, ?)"
+INSERT_REVOCATION = "INSERT OR IGNORE INTO revocations (identifier, revoked_at) VALUES (?, ?)"
+SELECT_EVIDENCE = """
+SELECT e.rowid, e.identifier, e.issuer, e.receiver, e.valid_from, e.valid_untill, e.db_name, e.kind, e.extras,
+       r.object_ids, r.actions
+FROM evidence e LEFT JOIN rules r ON r.evidence_rowid = e.rowid
+"""
+SELECT_BY_IDENTIFIER = SELECT_EVIDENCE + "WHERE e.identifier = ? ORDER BY r.position"
+NOT_REVOKED = "NOT EXISTS (SELECT 1 FROM revocations v WHERE v.identifier = e.identifier)"
+SELECT_BY_RECEIVER = SELECT_EVIDENCE + f"WHERE e.receiver = ? AND {NOT_REVOKED} ORDER BY e.rowid, r.position"
+# Evidence revoked after the requested time was still valid at that time, revocations without a time always count
+NOT_REVOKED_AT = (
+    "NOT EXISTS (SELECT 1 FROM revocations v WHERE v.identifier = e.identifier "
+    + "AND (v.revoked_at IS NULL OR v.revoked_at <= ?))"
+)
+SELECT_BY_RECEIVER_AT = (
+    SELECT_EVIDENCE
+    + "WHERE e.receiver = ? AND e.valid_untill >= ? AND e.valid_from <= ? "
+    + f"AND {NOT_REVOKED_AT} ORDER BY e.rowid, r.position"
+)
+SELECT_AT = (
+    SELECT_EVIDENCE
+    + f"WHERE e.valid_untill >= ? AND e.valid_from <= ? AND {NOT_REVOKED_AT} ORDER BY e.rowid, r.position"
+)
+INSERT_LINK = "INSERT OR IGNORE INTO links (db_name, identifier, kind, state) VALUES (?, ?, ?, ?)"
+SELECT_LINK = "SELECT kind, state FROM links WHERE db_name IS ? AND identifier = ?"
+SELECT_RECEIVER = "SELECT receiver FROM evidence WHERE identifier = ?"
+SELECT_EXISTS = "SELECT 1 FROM evidence WHERE identifier = ?"
+SELECT_PARTIES = f"SELECT DISTINCT receiver FROM evidence e WHERE {NOT_REVOKED}"
+SELECT_HAS_PARTY = f"SELECT 1 FROM evidence e WHERE e.receiver = ? AND {NOT_REVOKED} LIMIT 1"
+SELECT_REVOCATIONS = "SELECT identifier FROM revocations ORDER BY rowid"
+SELECT_REVOKED_AT = "SELECT revoked_at FROM revocations WHERE identifier = ?"
+SELECT_MAX_IDENTIFIER = "SELECT COALESCE(MAX(identifier), 0) FROM evidence WHERE typeof(identifier) = 'integer'"
+
+
+class RevocationStore(database.RevocationStore):
+    """
+    Revocation store that writes every revocation through to the revocations table.
+    Membership checks are answered from the in-memory set, which is loaded when the database is opened.
+    The time of every revocation is stored with it, for as-of queries.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, clock: Callable[[], float] = time.time):
+        self.connection = connection
+        self.clock = clock
+        super().__init__()
+
+        self.feed = [row[0] for row in connection.execute(SELECT_REVOCATIONS)]
+        self.identifiers.update(self.feed)
+        self.epoch = len(self.feed)
+
+    def add(self, identifier):
+        if identifier in self.identifiers:
+            return
+
+        with self.connection:
+            self.connection.execute(INSERT_REVOCATION, (identifier, self.clock()))
+        super().add(identifier)
+
+    def add_many(self, identifiers):
+        identifiers = [identifier for identifier in dict.fromkeys(identifiers) if identifier not in self.identifiers]
+
+        # Write all revocations in a single transaction
+        revoked_at = self.clock()
+        with self.connection:
+            self.connection.executemany(INSERT_REVOCATION, ((identifier, revoked_at) for identifier in identifiers))
+        self.identifiers.update(identifiers)
+        self.feed.extend(identifiers)
+        self.epoch += len(identifiers)
+
+
+class Database(database.Database):
+    """
+    Database storing evidence, rules and revocations in SQLite, so delegations survive a restart.
+    Inherits from the base Database class, and can be used in its place by the DatabaseBroker and all services
+    that store their evidence in the base Database.
+    """
+
+    # Lookups of single evidence query the connection, which also sees the rows of a writer before they are committed,
+    # so they hold the lock for reading as well
+    READ_LOCKED_METHODS = database.Database.READ_LOCKED_METHODS + (
+        "get_evidence",
+        "get_evidence_many",
+        "lookup",
+        "was_revoked",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        clock: Callable[[], float] = time.time,
+        path: str = ":memory:",
+        link_cache_size: int = 4096,
+        thread_safe: bool = False,
+    ):
+        """
+        Initialize the Database.
+
+        Params:
+            name: the name of the database.
+            clock: a function returning the current time in seconds, used to determine the validity of evidence.
+            path: the path of the SQLite database file, defaults to an in-memory database.
+            link_cache_size: the maximum number of resolved links to previous evidence to keep in memory.
+            thread_safe: whether the database is used by multiple threads at once, see enable_locking.
+        """
+        super().__init__(name, clock=clock)
+
+        self.path = path
+        self.connection = sqlite3.connect(path, cached_statements=256, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+        self.revocations = RevocationStore(self.connection, clock)
+        self.id_counter = self.connection.execute(SELECT_MAX_IDENTIFIER).fetchone()[0]
+        self.evidence_classes = {}
+        self.link_cache_size = link_cache_size
+        self.resolved_links = OrderedDict(
+            # EvidenceLink: the evidence it refers to, least recently used first
+        )
+        self.link_lock = threading.Lock()  # Guards the resolved links, as concurrent readers all update them
+
+        if thread_safe:
+            self.enable_locking()
+
+    def close(self):
+        """
+        Close the connection to the SQLite database.
+        """
+        super().close()
+        self.connection.close()
+
+    def add_evidence(self, evidence):
+        """
+        Add evidence to the database.
+
+        Params:
+            evidence: the evidence object to be added.
+        """
+        self.add_evidence_many([evidence])
+
+    def add_evidence_many(self, evidences: List[base_evidence.Evidence]):
+        """
+        Add multiple pieces of evidence to the database, in a single transaction.
+
+        Params:
+            evidences: the evidence objects to be added.
+        """
+        with self.connection:
+            for evidence in evidences:
+                identifier = evidence.identifier
+                if self.connection.execute(SELECT_EXISTS, (identifier,)).fetchone():
+                    raise ValueError(f"Evidence with ID {identifier} already exists.")
+
+                extras = {
+                    key: self._link(value) for key, value in vars(evidence).items() if key not in COLUMN_ATTRIBUTES
+                }
+                kind = self._kind(evidence)
+
+                cursor = self.connection.execute(
+                    INSERT_EVIDENCE,
+                    (
+                        identifier,
+                        evidence.issuer,
+                        evidence.receiver,
+                        evidence.valid_from,
+                        evidence.valid_untill,
+                        evidence.db_name,
+                        kind,
+                        pickle.dumps(extras) if extras else None,
+                    ),
+                )
+                self.connection.executemany(
+                    INSERT_RULE,
+                    [
+                        (cursor.lastrowid, position, json.dumps(rule.object_ids), json.dumps(rule.actions))
+                        for position, rule in enumerate(evidence.rules)
+                    ],
+                )
+
+        for evidence in evidences:
+            self.batch_cache.pop(evidence.receiver, None)
+        self._notify(database.EVENT_ADD, [evidence.receiver for evidence in evidences])
+
+    def get_parties(self) -> List[str]:
+        """
+        Retrieve all parties that have non-revoked evidence in the database.
+
+        Returns:
+            A list of party IDs.
+        """
+        return [row[0] for row in self.connection.execute(SELECT_PARTIES)]
+
+    def has_evidence_for_party(self, party_id: str) -> bool:
+        """
+        Check if the database has non-revoked evidence for a party, regardless of its validity period.
+
+        Params:
+            party_id: the ID of the party.
+
+        Returns:
+            True if the database holds non-revoked evidence for the party, False otherwise.
+        """
+        return self.connection.execute(SELECT_HAS_PARTY, (party_id,)).fetchone() is not None
+
+    @staticmethod
+    def _kind(evidence) -> str:
+        return f"{type(evidence).__module__}:{type(evidence).__qualname__}"
+
+    @staticmethod
+    def _reference(value, found: list):
+        """
+        Replace evidence, or a list of evidence, in the value of an extra attribute by EvidenceLinks.
+
+        Params:
+            value: the value of the extra attribute.
+            found: a list the replaced evidence objects are appended to.
+
+        Returns:
+            The EvidenceLink or list of EvidenceLinks for evidence or a list of evidence, the value otherwise.
+        """
+        if isinstance(value, list) and value and all(isinstance(item, base_evidence.Evidence) for item in value):
+            found.extend(value)
+            return [EvidenceLink(item.db_name, item.identifier) for item in value]
+        if isinstance(value, base_evidence.Evidence):
+            found.append(value)
+            return EvidenceLink(value.db_name, value.identifier)
+        return value
+
+    @staticmethod
+    def _dereference(value, resolved: dict):
+        """
+        Replace the EvidenceLinks in the stored value of an extra attribute by the evidence they refer to, see
+        _reference.
+
+        Params:
+            value: the stored value of the extra attribute.
+            resolved: the evidence per EvidenceLink.
+
+        Returns:
+            The evidence or list of evidence for EvidenceLinks, the value otherwise.
+        """
+        if isinstance(value, list) and value and isinstance(value[0], EvidenceLink):
+            return [resolved[item] for item in value]
+        if isinstance(value, EvidenceLink):
+            return resolved[value]
+        return value
+
+    def _link(self, value):
+        """
+        Replace the previous evidence a delegation links to by EvidenceLinks, so every row only stores references
+        instead of the whole chain. Linked evidence that is not stored in this database is stored once in the links
+        table, with its own links replaced as well. The chain is walked iteratively, so its length is not bounded by
+        the recursion limit.
+
+        Params:
+            value: the value of an extra attribute of the evidence.
+
+        Returns:
+            The EvidenceLink or list of EvidenceLinks for evidence or a list of evidence, the value otherwise.
+        """
+        pending = []
+        value = self._reference(value, pending)
+        while pending:
+            evidence = pending.pop()
+            link = EvidenceLink(evidence.db_name, evidence.identifier)
+            if evidence.db_name == self.name and self.connection.execute(SELECT_EXISTS, (link.identifier,)).fetchone():
+                continue
+            if self.connection.execute(SELECT_LINK, link).fetchone() is not None:
+                continue
+
+            state = {key: self._reference(item, pending) for key, item in vars(evidence).items()}
+            self.connection.execute(INSERT_LINK, (*link, self._kind(evidence), pickle.dumps(state)))
+        return value
+
+    def _load(self, link: EvidenceLink) -> tuple:
+        """
+        Load the evidence an EvidenceLink refers to, without resolving its own links.
+
+        Params:
+            link: the EvidenceLink.
+
+        Returns:
+            A tuple with the evidence and the stored values of the attributes that may hold links, or (None, {}) if
+            the evidence is not found.
+        """
+        row = self.connection.execute(SELECT_LINK, link).fetchone()
+        if row is not None:
+            evidence_class = self._evidence_class(row[0])
+            return evidence_class.__new__(evidence_class), pickle.loads(row[1])
+
+        loaded = self._build(self.connection.execute(SELECT_BY_IDENTIFIER, (link.identifier,)))
+        return loaded[0] if loaded else (None, {})
+
+    def _resolve(self, states: List[dict]):
+        """
+        Resolve the EvidenceLinks in the stored extra attributes of evidence, see _link.
+        Links that are not cached are resolved from the oldest evidence in the chain up, without recursion.
+
+        Params:
+            states: the stored values of the extra attributes, per evidence.
+
+        Returns:
+            The values of the extra attributes with the links replaced by evidence, per evidence.
+        """
+        resolved = {
+            # EvidenceLink: evidence, for the links used by this call
+        }
+        loaded = {
+            # EvidenceLink: (evidence, stored state) of the links waiting for the links they depend on
+        }
+
+        def links(state):
+            for value in state.values():
+                if isinstance(value, EvidenceLink):
+                    yield value
+                elif isinstance(value, list) and value and isinstance(value[0], EvidenceLink):
+                    yield from value
+
+        stack = [link for state in states for link in links(state)]
+        while stack:
+            link = stack[-1]
+            if link not in resolved:
+                with self.link_lock:
+                    if link in self.resolved_links:
+                        self.resolved_links.move_to_end(link)
+                        resolved[link] = self.resolved_links[link]
+            if link in resolved:
+                stack.pop()
+                continue
+
+            if link not in loaded:
+                loaded[link] = self._load(link)
+            evidence, state = loaded[link]
+            missing = [dependency for dependency in links(state) if dependency not in resolved]
+            if missing:
+                stack.extend(missing)
+                continue
+
+            stack.pop()
+            del loaded[link]
+            if evidence is not None:
+                evidence.__dict__.update({key: self._dereference(value, resolved) for key, value in state.items()})
+            resolved[link] = evidence
+
+            # Evidence is immutable once added, so resolved links can be shared between reads
+            with self.link_lock:
+                self.resolved_links[link] = evidence
+                if len(self.resolved_links) > self.link_cache_size:
+                    self.resolved_links.popitem(last=False)
+
+        return [{key: self._dereference(value, resolved) for key, value in state.items()} for state in states]
+
+    def _evidence_class(self, kind: str):
+        """
+        Resolve the evidence class stored in the kind column.
+
+        Params:
+            kind: the module and qualified name of the class, separated by a colon.
+
+        Returns:
+            The evidence class.
+        """
+        if kind not in self.evidence_classes:
+            module_name, class_name = kind.split(":")
+            self.evidence_classes[kind] = getattr(importlib.import_module(module_name), class_name)
+        return self.evidence_classes[kind]
+
+    def _build(self, rows) -> List[tuple]:
+        """
+        Build evidence objects from the rows of a select query, which contain one row per rule, without resolving the
+        links to previous evidence.
+
+        Params:
+            rows: the rows of the select query, ordered by evidence.
+
+        Returns:
+            A list of (evidence, stored extra attributes) tuples, in the order of the rows.
+        """
+        built = []
+        current_rowid = None
+        for (
+            rowid,
+            identifier,
+            issuer,
+            receiver,
+            valid_from,
+            valid_untill,
+            db_name,
+            kind,
+            extras,
+            objects,
+            actions,
+        ) in rows:
+            if rowid != current_rowid:
+                current_rowid = rowid
+
+                # Bypass __init__, as the evidence subclasses do not share a constructor signature
+                evidence_class = self._evidence_class(kind)
+                evidence = evidence_class.__new__(evidence_class)
+                evidence.identifier = identifier
+                evidence.valid_from = valid_from
+                evidence.valid_untill = valid_untill
+                evidence.issuer = issuer
+                evidence.receiver = receiver
+                evidence.rules = []
+                evidence.db_name = db_name
+                built.append((evidence, {} if extras is None else pickle.loads(extras)))
+
+            if objects is not None:
+                evidence.rules.append(base_evidence.Rule(object_ids=json.loads(objects), actions=json.loads(actions)))
+
+        return built
+
+    def _materialize(self, rows) -> List[base_evidence.Evidence]:
+        """
+        Build evidence objects from the rows of a select query, with the links to previous evidence resolved.
+
+        Params:
+            rows: the rows of the select query, ordered by evidence.
+
+        Returns:
+            A list of evidence objects, in the order of the rows.
+        """
+        built = self._build(rows)
+        for (evidence, _), extras in zip(built, self._resolve([state for _, state in built])):
+            evidence.__dict__.update(extras)
+        return [evidence for evidence, _ in built]
+
+    def get_evidence(self, identifier: int):
+        """
+        Retrieve evidence from the database.
+
+        Params:
+            identifier: the ID of the evidence to be retrieved.
+
+        Returns:
+            The evidence object if found, otherwise None.
+        """
+        evidences = self._materialize(self.connection.execute(SELECT_BY_IDENTIFIER, (identifier,)))
+        return evidences[0] if evidences else None
+
+    def get_evidence_by_party(self, party_id: str, at: float = None) -> List[base_evidence.Evidence]:
+        """
+        Retrieve all currently relevant evidence for a specific party, see Database.get_evidence_by_party.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be retrieved.
+            at: an optional timestamp to retrieve the evidence that was valid at that time, defaults to now.
+
+        Returns:
+            A list of the evidence objects for the specified party that were not revoked at the given time.
+        """
+        at = self.clock() if at is None else at
+        return self._materialize(self.connection.execute(SELECT_BY_RECEIVER_AT, (party_id, at, at, at)))
+
+    def get_evidence_batch_by_party(self, party_id: str) -> EvidenceBatch:
+        """
+        Retrieve all non-revoked evidence for a specific party as a batch, for vectorized evaluation.
+        The batch is not filtered on validity, pass the time to the evaluation instead.
+
+        Params:
+            party_id: the ID of the party whose evidence is to be retrieved.
+
+        Returns:
+            An EvidenceBatch over the evidence for the specified party.
+        """
+        batch = self.batch_cache.get(party_id)
+        if batch is None:
+            batch = EvidenceBatch(self._materialize(self.connection.execute(SELECT_BY_RECEIVER, (party_id,))))
+            self.batch_cache[party_id] = batch
+        return batch
+
+    def get_evidence_at(self, at: float = None) -> List[base_evidence.Evidence]:
+        """
+        Retrieve all evidence that was valid and not yet revoked at a specific time, e.g. to audit who had access at
+        that time. Evidence revoked after that time is included.
+
+        Params:
+            at: the timestamp to retrieve the valid evidence for, defaults to now.
+
+        Returns:
+            A list of evidence objects valid at the given time.
+        """
+        at = self.clock() if at is None else at
+        return self._materialize(self.connection.execute(SELECT_AT, (at, at, at)))
+
+    def was_revoked(self, evidence_id: int, at: float) -> bool:
+        """
+        Check if evidence was revoked at a specific time, see Database.was_revoked.
+
+        Params:
+            evidence_id: the ID of the evidence.
+            at: the timestamp to check the revocation at.
+
+        Returns:
+            True if the evidence was revoked at or before the given time, False otherwise.
+        """
+        if evidence_id not in self.revocations:
+            return False
+        row = self.connection.execute(SELECT_REVOKED_AT, (evidence_id,)).fetchone()
+        return row[0] is None or row[0] <= at
+
+    def revoke(self, evidence_id: int):
+        """
+        Revoke evidence by its ID.
+
+        Params:
+            evidence_id: the ID of the evidence to be revoked.
+        """
+        self.revocations.add(evidence_id)
+
+        row = self.connection.execute(SELECT_RECEIVER, (evidence_id,)).fetchone()
+        if row is not None:
+            self.batch_cache.pop(row[0], None)
+            self._notify(database.EVENT_REVOKE, [row[0]])
+
+    def revoke_many(self, evidence_ids: List[int]):
+        """
+        Revoke multiple pieces of evidence by their IDs, in a single transaction.
+
+        Params:
+            evidence_ids: the IDs of the evidence to be revoked.
+        """
+        self.revocations.add_many(evidence_ids)
+
+        receivers = set()
+        for evidence_id in evidence_ids:
+            row = self.connection.execute(SELECT_RECEIVER, (evidence_id,)).fetchone()
+            if row is not None:
+                self.batch_cache.pop(row[0], None)
+                receivers.add(row[0])
+        self._notify(database.EVENT_REVOKE, receivers)
@@ -1,6 +1,97 @@
+import asyncio
+import copy
+import gc
 import time
 import inspect
 import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+from models.base import database as base_database
+from models.base.async_broker import AsyncDatabaseBroker, LatencyModel
+from models.base.cache import EvidenceCache
+from models.base.instrumentation import LatencyHistogram, uninstrument
+from models.base.interning import Interner
+from models.base.locking import ReadWriteLock
+from models.base.persistence import LOG_ADD, RECORD_HEADER
+from models.base.process_broker import ProcessDatabaseBroker
+from models.base.routing import ConsistentHashBroker
+from models.base.socket_broker import SocketDatabaseBroker
+from models.base.vectorized import VECTORIZE_THRESHOLD, EvidenceBatch
+from models.base import evidence as base_evidence
+from models.columnar import database as columnar_database
+from models.oracle import database as oracle_database
+from models.prev_party import service as prev_party_service
+from models.sqlite import database as sqlite_database
+
+
+def print_test_results(results, title: str) -> None:
+    """
+    Print the test results of a report in a formatted table.
+
+    Params:
+        results: A report, with a dictionary of the test results per category under the "tests" key.
+        title: The title to print above the table.
+    """
+    CHECK = "✓"
+    CROSS = "✗"
+
+    results = results["tests"]
+
+    print(f"Test Results: {title}")
+
+    longest_cat_name = max(len(name) for name in results.keys())
+    longest_test_name = max(max(len(test_name) for test_name in cat_results.keys()) for cat_results in results.values())
+    print(f"| {'Category':<{longest_cat_name}} | {'Test Name':<{longest_test_name}} | Result |")
+    print("-" * (longest_cat_name + longest_test_name + 16))
+    for category, cat_results in results.items():
+
+        for name, result in cat_results.items():
+            result_symbol = CHECK if result else CROSS
+            print(f"| {category:<{longest_cat_name}} | {name:<{longest_test_name}} | {result_symbol}      |")
+
+    print("-" * (longest_cat_name + longest_test_name + 16))
+    print("")
+
+
+def get_memory_per_delegation(db_class, number_of_delegations=10000):
+    """
+    Measure the memory used per delegation when storing evidence in a database of the given class.
+
+    Params:
+        db_class: the database class to measure.
+        number_of_delegations: the number of delegations to store.
+
+    Returns:
+        The number of bytes used per delegation, including the indexes of the database.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start_memory, _ = tracemalloc.get_traced_memory()
+
+    db = db_class("memory")
+    for i in range(number_of_delegations):
+        db.add_evidence(
+            base_evidence.Evidence(
+                identifier=db.get_next_identifier(),
+                issuer=f"party{i}",
+                receiver=f"party{i + 1}",
+                rules=[base_evidence.Rule([f"object{i % 100}", "object_shared"], ["read", "write"])],
+                valid_from=0,
+                valid_untill=time.time() + 1000000,
+                db_name="memory",
+            )
+        )
+
+    gc.collect()
+    end_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (end_memory - start_memory) // number_of_delegations
 
 
 class DelegationModelTests:
@@ -103,6 +194,87 @@ class DelegationModelTests:
         performance_related_additional_parties = self.get_performance_values_related_additional_parties()
         results["performance_related_additional_parties"] = performance_related_additional_parties
 
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_party_lookup = self.get_performance_values_party_lookup()
+        results["performance_party_lookup"] = performance_party_lookup
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_revocations = self.get_performance_values_revocations()
+        results["performance_revocations"] = performance_revocations
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_expired_evidence = self.get_performance_values_expired_evidence()
+        results["performance_expired_evidence"] = performance_expired_evidence
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_large_rules = self.get_performance_values_large_rules()
+        results["performance_large_rules"] = performance_large_rules
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_incoming_delegations = self.get_performance_values_incoming_delegations()
+        results["performance_incoming_delegations"] = performance_incoming_delegations
+
+        performance_dense_graph = self.get_performance_values_dense_graph()
+        if performance_dense_graph is not None:
+            results["performance_dense_graph"] = performance_dense_graph
+
+        performance_filtered_adjacency = self.get_performance_values_filtered_adjacency()
+        if performance_filtered_adjacency is not None:
+            results["performance_filtered_adjacency"] = performance_filtered_adjacency
+
+        performance_reachability_cache = self.get_performance_values_reachability_cache()
+        if performance_reachability_cache is not None:
+            results["performance_reachability_cache"] = performance_reachability_cache
+
+        performance_bridge_index = self.get_performance_values_bridge_index()
+        if performance_bridge_index is not None:
+            results["performance_bridge_index"] = performance_bridge_index
+
+        performance_revocation_throughput = self.get_performance_values_revocation_throughput()
+        if performance_revocation_throughput is not None:
+            results["performance_revocation_throughput"] = performance_revocation_throughput
+
+        results["ingestion_throughput"] = self.get_ingestion_throughput()
+
+        performance_simulated_latency = self.get_performance_values_simulated_latency()
+        if performance_simulated_latency is not None:
+            results["performance_simulated_latency"] = performance_simulated_latency
+
+        results["performance_evidence_cache"] = self.get_performance_values_evidence_cache()
+
+        results["round_trips"] = self.get_round_trips()
+
+        results["instrumentation"] = self.get_instrumentation()
+
+        performance_concurrent_access = self.get_performance_values_concurrent_access()
+        if performance_concurrent_access is not None:
+            results["performance_concurrent_access"] = performance_concurrent_access
+
+        performance_local_servers = self.get_performance_values_local_servers()
+        if performance_local_servers is not None:
+            results["performance_local_servers"] = performance_local_servers
+
+        performance_process_shards = self.get_performance_values_process_shards()
+        if performance_process_shards is not None:
+            results["performance_process_shards"] = performance_process_shards
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_database_fanout = self.get_performance_values_database_fanout()
+        results["performance_database_fanout"] = performance_database_fanout
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+        performance_access_batches = self.get_performance_values_access_batches()
+        results["performance_access_batches"] = performance_access_batches
+
+        results["memory_per_delegation"] = {"current": get_memory_per_delegation(self.db_class)}
+
         # Add a summary per category
         results["summary"] = {}
         for category, test_results in results["tests"].items():
@@ -159,27 +331,7 @@ class DelegationModelTests:
         Params:
             results: A dictionary with the test names as keys and the results as values.
         """
-        CHECK = "✓"
-        CROSS = "✗"
-
-        results = results["tests"]
-
-        print(f"Test Results: {self.service.__class__.__name__}")
-
-        longest_cat_name = max(len(name) for name in results.keys())
-        longest_test_name = max(
-            max(len(test_name) for test_name in cat_results.keys()) for cat_results in results.values()
-        )
-        print(f"| {'Category':<{longest_cat_name}} | {'Test Name':<{longest_test_name}} | Result |")
-        print("-" * (longest_cat_name + longest_test_name + 16))
-        for category, cat_results in results.items():
-
-            for name, result in cat_results.items():
-                result_symbol = CHECK if result else CROSS
-                print(f"| {category:<{longest_cat_name}} | {name:<{longest_test_name}} | {result_symbol}      |")
-
-        print("-" * (longest_cat_name + longest_test_name + 16))
-        print("")
+        print_test_results(results, self.service.__class__.__name__)
 
     def test_single_delegation(self):
         """
@@ -549,6 +701,84 @@ class DelegationModelTests:
             self.service.has_access("party4", "owner1", "object1", "write", "base", evid5) == True
         ), "party4 should have write access to object1 in DO->p1->p3->p4 in base"
 
+    def test_evidence_at_around_revocation(self):
+        """
+        Test the as-of queries of a database around the revocation and the expiry of evidence.
+        Evidence is returned for the times at which it was valid and not yet revoked, also after it was revoked.
+        """
+        now = [1000.0]
+        database = self.db_class("as_of", clock=lambda: now[0])
+        database.add_evidence_many(
+            [
+                base_evidence.Evidence(
+                    identifier=identifier,
+                    issuer="owner1",
+                    receiver=f"party{identifier}",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=1000,
+                    valid_untill=valid_untill,
+                    db_name="as_of",
+                )
+                for identifier, valid_untill in [(1, 5000), (2, 5000), (3, 1500)]
+            ]
+        )
+
+        now[0] = 2000.0
+        database.revoke(1)
+        now[0] = 3000.0
+        database.revoke_many([2])
+
+        def valid_at(at):
+            return sorted(item.identifier for item in database.get_evidence_at(at))
+
+        assert valid_at(1200) == [1, 2, 3], "All evidence should be valid before the expiry and the revocations"
+        assert valid_at(1800) == [1, 2], "Expired evidence should not be valid after its expiry"
+        assert valid_at(2500) == [2], "Evidence should not be valid after its revocation"
+        assert valid_at(3500) == [], "Evidence revoked in bulk should not be valid after its revocation"
+        assert valid_at(None) == [], "Revoked evidence should not be valid now"
+        assert database.was_revoked(1, 2000) and not database.was_revoked(1, 1999), "The revocation time was not kept"
+
+        def relevant_at(party_id, at):
+            return [item.identifier for item in database.get_evidence_by_party(party_id, at=at)]
+
+        assert relevant_at("party2", 1200) == [2], "Evidence should be relevant before its revocation"
+        assert relevant_at("party1", 2500) == [], "Evidence should not be relevant after its revocation"
+        assert relevant_at("party2", 3500) == [], "Evidence revoked in bulk should not be relevant after its revocation"
+        assert relevant_at("party2", None) == [], "Revoked evidence should not be relevant now"
+        for at in [1200, 1800, 2500, 3500, None]:
+            assert sorted(
+                identifier for party_id in ["party1", "party2", "party3"] for identifier in relevant_at(party_id, at)
+            ) == valid_at(at), "The as-of queries disagree about the same time"
+
+    def test_has_access_many_matches_has_access(self):
+        """
+        Test that checking a batch of access requests with has_access_many gives the same results as checking every
+        request with has_access, for granted, denied, revoked and repeated requests sharing delegations:
+        data_owner -> party1 -> party2 -> party3, and data_owner -> party4, where party4 is revoked.
+        """
+        expiry = time.time() + 1000000
+        evid1 = self.service.add_delegation("owner1", "party1", ["object1"], ["read", "write"], expiry, "base")
+        evid2 = self.service.add_delegation("party1", "party2", ["object1"], ["read"], expiry, "base", evidence=evid1)
+        evid3 = self.service.add_delegation("party2", "party3", ["object1"], ["read"], expiry, "base", evidence=evid2)
+        evid4 = self.service.add_delegation("owner1", "party4", ["object1"], ["read"], expiry, "base")
+        self.service.revoke_delegation(evid4.identifier, "base")
+
+        requests = [
+            ("party1", "owner1", "object1", "read", "base", evid1),
+            ("party2", "owner1", "object1", "read", "base", evid2),
+            ("party3", "owner1", "object1", "read", "base", evid3),
+            ("party3", "owner1", "object1", "write", "base", evid3),
+            ("party3", "owner1", "object2", "read", "base", evid3),
+            ("party4", "owner1", "object1", "read", "base", evid4),
+            ("party2", "owner1", "object1", "read", "base", evid2),
+            ("party1", "owner1", "object1", "write", "base", evid1),
+        ]
+        expected = [self.service.has_access(*request) for request in requests]
+
+        assert expected[0], "party1 should have read access to object1 in DO->p1"
+        assert self.service.has_access_many(requests) == expected, "The batch results differ from has_access"
+        assert self.service.has_access_many([]) == [], "An empty batch should give no results"
+
     def get_performance_values(self):
         """
         Test the performance of the delegation model with a growing number of parties and delegations.
@@ -767,3 +997,2358 @@ class DelegationModelTests:
             times_taken.append(format(elapsed_avg, ".6f"))
 
         return dict(zip(additional_delegations, times_taken))
+
+    def get_performance_values_party_lookup(self):
+        """
+        Test the performance of the evidence lookup by party, with a growing amount of unrelated evidence.
+        The lookup time should stay flat, as only the evidence of the requested party is visited.
+        """
+        db = self.service.db_broker.get_database("base")
+
+        for _ in range(5):
+            db.add_evidence(
+                base_evidence.Evidence(
+                    identifier=db.get_next_identifier(),
+                    issuer="party0",
+                    receiver="party1",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name="base",
+                )
+            )
+
+        numbers_of_unrelated_evidence = [0, 1000, 10000, 100000]
+        times_taken = []
+
+        for idx, number_of_unrelated_evidence in enumerate(numbers_of_unrelated_evidence):
+            number_to_add = number_of_unrelated_evidence - (numbers_of_unrelated_evidence[idx - 1] if idx > 0 else 0)
+
+            for i in range(number_to_add):
+                db.add_evidence(
+                    base_evidence.Evidence(
+                        identifier=db.get_next_identifier(),
+                        issuer="party0",
+                        receiver=f"unrelated{i % 1000}",
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=time.time() + 1000000,
+                        db_name="base",
+                    )
+                )
+
+            elapsed_avg = 0
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                evidences = db.get_evidence_by_party("party1")
+                end_time = time.time()
+                elapsed_avg += end_time - start_time
+
+            elapsed_avg /= self.performance_test_count
+
+            assert len(evidences) == 5, "Performance test failed, as 5 pieces of evidence were expected."
+
+            times_taken.append(format(elapsed_avg, ".6f"))
+
+        return dict(zip(numbers_of_unrelated_evidence, times_taken))
+
+    def get_performance_values_revocations(self):
+        """
+        Test the performance of the delegation model with a growing number of unrelated revocations.
+        This task focusses on the cost of the revocation checks done by the has_access method.
+        """
+        self.service.add_parties(self.PARTIES, "base")
+
+        evid1 = self.service.add_delegation("owner1", "party1", ["object1"], ["read"], time.time() + 1000000, "base")
+        evid2 = self.service.add_delegation(
+            "party1", "party2", ["object1"], ["read"], time.time() + 1000000, "base", evidence=evid1
+        )
+        evid3 = self.service.add_delegation(
+            "party2", "party3", ["object1"], ["read"], time.time() + 1000000, "base", evidence=evid2
+        )
+
+        numbers_of_revocations = [10000, 100000, 1000000]
+        database = self.service.db_broker.get_database("base")
+        times_taken = []
+
+        for idx, number_of_revocations in enumerate(numbers_of_revocations):
+            # Use identifiers that can not collide with the identifiers of the delegations
+            start = 10**9 + (numbers_of_revocations[idx - 1] if idx > 0 else 0)
+            database.revoke_many(list(range(start, 10**9 + number_of_revocations)))
+
+            elapsed_avg = 0
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                success = self.service.has_access("party3", "owner1", "object1", "read", "base", evid3)
+                end_time = time.time()
+                elapsed_avg += end_time - start_time
+
+            elapsed_avg /= self.performance_test_count
+
+            assert success, "Performance test failed, as access was expected, but failed."
+
+            times_taken.append(format(elapsed_avg, ".6f"))
+
+        return dict(zip(numbers_of_revocations, times_taken))
+
+    def get_performance_values_expired_evidence(self):
+        """
+        Test the performance of the evidence lookup by party, with a growing amount of expired evidence for that party.
+        The lookup time should stay flat, as expired evidence is not visited.
+        """
+        db = self.service.db_broker.get_database("base")
+
+        for _ in range(5):
+            db.add_evidence(
+                base_evidence.Evidence(
+                    identifier=db.get_next_identifier(),
+                    issuer="party0",
+                    receiver="party1",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name="base",
+                )
+            )
+
+        numbers_of_expired_evidence = [0, 1000, 10000, 50000]
+        times_taken = []
+
+        for idx, number_of_expired_evidence in enumerate(numbers_of_expired_evidence):
+            number_to_add = number_of_expired_evidence - (numbers_of_expired_evidence[idx - 1] if idx > 0 else 0)
+
+            for i in range(number_to_add):
+                db.add_evidence(
+                    base_evidence.Evidence(
+                        identifier=db.get_next_identifier(),
+                        issuer="party0",
+                        receiver="party1",
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=i,
+                        db_name="base",
+                    )
+                )
+
+            elapsed_avg = 0
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                evidences = db.get_evidence_by_party("party1")
+                end_time = time.time()
+                elapsed_avg += end_time - start_time
+
+            elapsed_avg /= self.performance_test_count
+
+            assert len(evidences) == 5, "Performance test failed, as 5 pieces of evidence were expected."
+
+            times_taken.append(format(elapsed_avg, ".6f"))
+
+        return dict(zip(numbers_of_expired_evidence, times_taken))
+
+    def get_performance_values_large_rules(self):
+        """
+        Test the performance of the delegation model with a delegation chain whose rules contain a growing number of objects.
+        The requested object is the last object of every rule.
+        """
+        numbers_of_objects = [10, 100, 1000, 10000]
+        number_of_delegations = 50
+        times_taken = []
+
+        for number_of_objects in numbers_of_objects:
+            self.service.db_broker.add_database("base", self.service.db_class("base"))
+            self.service.add_parties([f"party{i}" for i in range(number_of_delegations + 1)], "base")
+
+            objects = [f"object{i}" for i in range(number_of_objects)]
+            prev_delegation = None
+            for i in range(number_of_delegations):
+                prev_delegation = self.service.add_delegation(
+                    f"party{i}",
+                    f"party{i + 1}",
+                    objects,
+                    ["read"],
+                    time.time() + 1000000,
+                    "base",
+                    evidence=prev_delegation,
+                )
+
+            # Warm up, so the one-off compilation of the rules is not part of the measurement
+            self.service.has_access(
+                f"party{number_of_delegations}", "party0", objects[-1], "read", "base", prev_delegation
+            )
+
+            elapsed_avg = 0
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                success = self.service.has_access(
+                    f"party{number_of_delegations}", "party0", objects[-1], "read", "base", prev_delegation
+                )
+                end_time = time.time()
+                elapsed_avg += end_time - start_time
+
+            elapsed_avg /= self.performance_test_count
+
+            assert success, "Performance test failed, as access was expected, but failed."
+
+            times_taken.append(format(elapsed_avg, ".6f"))
+
+        return dict(zip(numbers_of_objects, times_taken))
+
+    def get_performance_values_incoming_delegations(self):
+        """
+        Test the performance of selecting the evidence that covers a request, for a party with a growing number of
+        incoming delegations. Compares evaluating every evidence in Python with the vectorized batch evaluation.
+        """
+        db = self.service.db_broker.get_database("base")
+
+        numbers_of_delegations = [100, 1000, 10000]
+        times_taken = {}
+
+        for idx, number_of_delegations in enumerate(numbers_of_delegations):
+            number_to_add = number_of_delegations - (numbers_of_delegations[idx - 1] if idx > 0 else 0)
+
+            for i in range(number_to_add):
+                db.add_evidence(
+                    base_evidence.Evidence(
+                        identifier=db.get_next_identifier(),
+                        issuer=f"party{i}",
+                        receiver="party1",
+                        rules=[base_evidence.Rule([f"object{i % 50}"], ["read"])],
+                        valid_from=0,
+                        valid_untill=time.time() + 1000000,
+                        db_name="base",
+                    )
+                )
+
+            batch = db.get_evidence_batch_by_party("party1")
+            revocations = {"base": db.revocations}
+            batch.mask("object1", "read", revocations=revocations, at=time.time())  # Build the arrays once
+
+            elapsed_python = 0
+            elapsed_vectorized = 0
+            for _ in range(self.performance_test_count):
+                now = time.time()
+
+                start_time = time.time()
+                expected = [
+                    evidence
+                    for evidence in batch.evidences
+                    if evidence.valid_from <= now <= evidence.valid_untill
+                    and evidence.identifier not in db.revocations
+                    and evidence.covers("object1", "read")
+                ]
+                elapsed_python += time.time() - start_time
+
+                start_time = time.time()
+                selected = batch.select("object1", "read", revocations=revocations, at=now)
+                elapsed_vectorized += time.time() - start_time
+
+                assert selected == expected, "Performance test failed, as the vectorized selection differs."
+
+            times_taken[number_of_delegations] = {
+                "python": format(elapsed_python / self.performance_test_count, ".6f"),
+                "vectorized": format(elapsed_vectorized / self.performance_test_count, ".6f"),
+            }
+
+        return times_taken
+
+    def get_performance_values_dense_graph(self, numbers_of_edges=(1000, 10000, 100000), width=10):
+        """
+        Test the scaling of the search for a valid path within the graph of an AR, for a dense layered graph where
+        every party delegates to every party in the next layer, so the number of paths grows exponentially with the
+        number of layers. Between every two parties there are two parallel edges, only the second of which delegates
+        the requested resource, and the requested delegations from the second party of every layer are revoked.
+
+        Params:
+            numbers_of_edges: the numbers of edges in the graph to measure.
+            width: the number of parties per layer.
+
+        Returns:
+            The search time for a granted and a denied request per number of edges, or None if the model does not keep
+            a graph per AR.
+        """
+        if not hasattr(self.db_class, "add_edges"):
+            return None
+
+        times_taken = {}
+        for number_of_edges in numbers_of_edges:
+            database = self.db_class("dense")
+            layers = number_of_edges // (2 * width * width) + 1
+            database.add_parties([f"p{layer}_{i}" for layer in range(layers) for i in range(width)])
+
+            edges = [
+                (f"p{layer}_{i}", f"p{layer + 1}_{j}", objects, ["read"])
+                for layer in range(layers - 1)
+                for i in range(width)
+                for j in range(width)
+                for objects in (["object2"], ["object1"])
+            ]
+            evidences = database.add_edges(edges, "dense")
+            database.revoke_many(
+                [
+                    evidence.identifier
+                    for evidence, edge in zip(evidences, edges)
+                    if edge[0].endswith("_1") and edge[2] == ["object1"]
+                ]
+            )
+
+            # The party of the denied request is not reachable, so the search visits the whole graph
+            times_taken[len(edges)] = {}
+            for case, party, expected in [("granted", f"p{layers - 1}_{width - 1}", True), ("denied", "p0_1", False)]:
+                elapsed_avg = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    success = database._in_graph_path_valid("p0_0", party, "object1", "read")
+                    elapsed_avg += time.time() - start_time
+
+                    assert success == expected, f"Performance test failed, as the {case} request was not {case}."
+
+                times_taken[len(edges)][case] = format(elapsed_avg / self.performance_test_count, ".6f")
+
+        return times_taken
+
+    def get_performance_values_filtered_adjacency(
+        self, numbers_of_objects=(1, 10, 100), number_of_parties=1000, number_of_edges=20000
+    ):
+        """
+        Test the search for the parties reachable from an owner for object0/read in a random graph, where a fixed
+        number of delegations grant object0/read and the other delegations are spread over a growing number of
+        distinct objects and two actions. The search over the adjacency lists of object0/read is compared to a search
+        over the full graph that checks the attributes of every edge, and the memory of the adjacency lists is
+        compared to the memory of the graph.
+
+        Params:
+            numbers_of_objects: the numbers of distinct objects to measure.
+            number_of_parties: the number of parties in the graph.
+            number_of_edges: the number of delegations in the graph, a fifth of which grant object0/read.
+
+        Returns:
+            The search times and the memory in bytes per number of objects, or None if the model does not keep a
+            graph per AR.
+        """
+        if not hasattr(self.db_class, "add_edges"):
+            return None
+
+        def search_full_graph(database, owner_id, resource, action):
+            reachable = {owner_id}
+            stack = [owner_id]
+            while stack:
+                for v, edges in database.graph.adj[stack.pop()].items():
+                    if v not in reachable and any(
+                        edge["id"] not in database.revocations
+                        and resource in edge["objects"]
+                        and action in edge["rights"]
+                        for edge in edges.values()
+                    ):
+                        reachable.add(v)
+                        stack.append(v)
+            return reachable
+
+        def measure_memory(value):
+            tracemalloc.start()
+            value = copy.deepcopy(value)
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return size
+
+        rng = random.Random(0)
+        parties = [f"party{i}" for i in range(number_of_parties)]
+        results = {}
+        for number_of_objects in numbers_of_objects:
+            database = self.db_class("filtered")
+            database.add_parties(parties)
+            permissions = [(f"object{i}", action) for i in range(number_of_objects) for action in ["read", "write"]]
+            edges = []
+            for i in range(number_of_edges):
+                resource, action = permissions[0] if i % 5 == 0 else rng.choice(permissions[1:])
+                edges.append((rng.choice(parties), rng.choice(parties), [resource], [action]))
+            database.add_edges(edges, "filtered")
+
+            times_taken = {"filtered": 0, "full_graph": 0}
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                reachable = database._search_reachable("party0", "object0", "read")
+                times_taken["filtered"] += time.time() - start_time
+
+                start_time = time.time()
+                expected = search_full_graph(database, "party0", "object0", "read")
+                times_taken["full_graph"] += time.time() - start_time
+
+                assert reachable == expected, "Performance test failed, as the searches found different parties."
+
+            results[number_of_objects] = {
+                "reachable": len(reachable),
+                **{
+                    search: format(elapsed / self.performance_test_count, ".6f")
+                    for search, elapsed in times_taken.items()
+                },
+                "speedup": round(times_taken["full_graph"] / max(times_taken["filtered"], 1e-9), 1),
+                "index_bytes": measure_memory(database.permitted),
+                "graph_bytes": measure_memory(database.graph),
+            }
+
+        return results
+
+    def get_performance_values_reachability_cache(
+        self, write_ratios=(0, 0.01, 0.1), number_of_parties=1000, number_of_edges=3000, number_of_operations=2000
+    ):
+        """
+        Test the reachability cache of the graph of an AR under a mixed workload of access checks and writes on a
+        random graph, where every write adds a delegation or revokes a random one. Every access check is answered from
+        the cache and compared to an uncached search of the graph.
+
+        Params:
+            write_ratios: the fractions of the operations that are writes.
+            number_of_parties: the number of parties in the graph.
+            number_of_edges: the number of delegations in the graph before the workload.
+            number_of_operations: the number of access checks and writes per workload.
+
+        Returns:
+            The latency of the cached and uncached access checks and of the writes, and the size and counters of the
+            cache, per write ratio, or None if the model does not keep a graph per AR.
+        """
+        if not hasattr(self.db_class, "add_edges"):
+            return None
+
+        rng = random.Random(0)
+        parties = [f"party{i}" for i in range(number_of_parties)]
+        owners = parties[:10]
+        results = {}
+        for write_ratio in write_ratios:
+            database = self.db_class("reachability")
+            database.add_parties(parties)
+            edges = [(rng.choice(parties), rng.choice(parties), ["object1"], ["read"]) for _ in range(number_of_edges)]
+            identifiers = [evidence.identifier for evidence in database.add_edges(edges, "reachability")]
+
+            times_taken = {"cached": 0, "uncached": 0, "write": 0}
+            number_of_checks = number_of_writes = 0
+            for _ in range(number_of_operations):
+                if rng.random() < write_ratio:
+                    start_time = time.time()
+                    if rng.random() < 0.5:
+                        evidence = database.add_edge(
+                            rng.choice(parties), rng.choice(parties), ["object1"], ["read"], "x"
+                        )
+                        identifiers.append(evidence.identifier)
+                    else:
+                        database.remove_edge(identifiers.pop(rng.randrange(len(identifiers))))
+                    times_taken["write"] += time.time() - start_time
+                    number_of_writes += 1
+                    continue
+
+                owner_id, party_id = rng.choice(owners), rng.choice(parties)
+                start_time = time.time()
+                cached = party_id in database._reachable_in_graph(owner_id, "object1", "read")
+                times_taken["cached"] += time.time() - start_time
+
+                start_time = time.time()
+                uncached = database._in_graph_path_valid(owner_id, party_id, "object1", "read")
+                times_taken["uncached"] += time.time() - start_time
+
+                assert cached == uncached, "Performance test failed, as the cache returned a wrong result."
+                number_of_checks += 1
+
+            stats = database.get_reachability_stats()
+            results[write_ratio] = {
+                "cached": format(times_taken["cached"] / number_of_checks, ".6f"),
+                "uncached": format(times_taken["uncached"] / number_of_checks, ".6f"),
+                "write": format(times_taken["write"] / max(number_of_writes, 1), ".6f"),
+                "hit_rate": round(stats["hits"] / max(stats["hits"] + stats["misses"], 1), 3),
+                **stats,
+            }
+
+        return results
+
+    def get_performance_values_bridge_index(self, numbers_of_bridges=(100, 1000, 10000), number_of_databases=5):
+        """
+        Test the bridge lookups of an access check across multiple ARs, where the access is granted through a chain of
+        bridges that passes through every AR, and every AR holds a growing number of other bridges to random parties.
+        The indexed lookup of the bridges to a party is compared to a scan over all bridges of the AR.
+
+        Params:
+            numbers_of_bridges: the numbers of other bridges per AR to measure.
+            number_of_databases: the number of ARs in the chain.
+
+        Returns:
+            The latency of a granted and a denied access check and of the indexed and scanned bridge lookups per number
+            of bridges, or None if the model does not keep a graph per AR.
+        """
+        if not hasattr(self.db_class, "add_edges"):
+            return None
+
+        def scan_bridges_to(database, node):
+            return any(
+                bridge.to_node == node and source != node
+                for source, bridges in database.outgoing_bridges.items()
+                for bridge in bridges
+            )
+
+        rng = random.Random(0)
+        results = {}
+        for number_of_bridges in numbers_of_bridges:
+            broker = self.database_broker_class()
+            hops = [f"hop{i}" for i in range(number_of_databases)]
+            for i in range(number_of_databases):
+                db_name = f"bridges{i}"
+                parties = [f"{db_name}_party{j}" for j in range(100)]
+                database = self.db_class(db_name)
+                database.add_parties(["owner1", hops[i], *parties] if i == 0 else [hops[i], *parties])
+                broker.add_database(db_name, database)
+                if i == 0:
+                    broker.add_link(db_name, "owner1", hops[0], ["object1"], ["read"])
+                broker.add_links(
+                    db_name,
+                    [
+                        (rng.choice(parties), f"remote{rng.randrange(number_of_bridges)}", ["object1"], ["read"])
+                        for _ in range(number_of_bridges)
+                    ],
+                )
+                if i + 1 < number_of_databases:
+                    # The next hop is not a party of this AR, so the link is a bridge, added last so a scan is slowest
+                    broker.add_link(db_name, hops[i], hops[i + 1], ["object1"], ["read"])
+
+            last_db = f"bridges{number_of_databases - 1}"
+            times_taken = {}
+            for case, owner_id, expected in [("granted", "owner1", True), ("denied", "owner2", False)]:
+                elapsed_avg = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    success = broker.has_access(hops[-1], owner_id, "object1", "read", last_db, None)
+                    elapsed_avg += time.time() - start_time
+
+                    assert success == expected, f"Performance test failed, as the {case} request was not {case}."
+
+                times_taken[case] = format(elapsed_avg / self.performance_test_count, ".6f")
+
+            database = broker.databases["bridges0"]
+            for case, lookup in [("indexed_lookup", database.has_bridges_to), ("scanned_lookup", None)]:
+                elapsed_avg = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    success = lookup(hops[1]) if lookup else scan_bridges_to(database, hops[1])
+                    elapsed_avg += time.time() - start_time
+
+                    assert success, "Performance test failed, as the bridge to the next hop was not found."
+
+                times_taken[case] = format(elapsed_avg / self.performance_test_count, ".6f")
+
+            results[number_of_bridges] = times_taken
+
+        return results
+
+    def get_performance_values_revocation_throughput(
+        self, numbers_of_edges=(1000, 10000, 100000), number_of_revocations=1000, number_of_parties=1000
+    ):
+        """
+        Test the throughput of revoking delegations of an AR by their IDs, for a random graph where a tenth of the
+        delegations are bridges to parties of other ARs. The delegations are revoked one at a time and in bulk, and
+        finding a delegation through the index of the IDs is compared to a scan over the edges and bridges.
+
+        Params:
+            numbers_of_edges: the numbers of delegations in the graph to measure.
+            number_of_revocations: the number of delegations to revoke one at a time, and again in bulk, at most a third
+                of the delegations.
+            number_of_parties: the number of parties in the graph.
+
+        Returns:
+            The number of revocations per second one at a time and in bulk, and the latency of the indexed and scanned
+            lookup of a delegation per number of delegations, or None if the model does not keep a graph per AR.
+        """
+        if not hasattr(self.db_class, "add_edges"):
+            return None
+
+        def scan_edge(database, edge_id):
+            for u, v, key, data in database.graph.edges(keys=True, data=True):
+                if data["id"] == edge_id:
+                    return u, v, key
+            for bridges in database.outgoing_bridges.values():
+                for bridge in bridges:
+                    if bridge.id == edge_id:
+                        return bridge
+            return None
+
+        rng = random.Random(0)
+        parties = [f"party{i}" for i in range(number_of_parties)]
+        results = {}
+        for number_of_edges in numbers_of_edges:
+            database = self.db_class("revocations")
+            database.add_parties(parties)
+            edges = [
+                (rng.choice(parties), rng.choice(parties) if i % 10 else f"remote{i}", ["object1"], ["read"])
+                for i in range(number_of_edges)
+            ]
+            identifiers = [evidence.identifier for evidence in database.add_edges(edges, "revocations")]
+            rng.shuffle(identifiers)
+            # Keep a third of the delegations to look up afterwards
+            count = min(number_of_revocations, number_of_edges // 3)
+            single, bulk = identifiers[:count], identifiers[count : 2 * count]
+
+            times_taken = {}
+            start_time = time.time()
+            removed = [database.remove_edge(identifier) for identifier in single]
+            times_taken["single"] = round(len(single) / (time.time() - start_time))
+
+            start_time = time.time()
+            removed += database.remove_edges(bulk)
+            times_taken["bulk"] = round(len(bulk) / (time.time() - start_time))
+
+            assert all(removed), "Performance test failed, as a delegation was not revoked."
+            assert not database.remove_edge(single[0]), "Performance test failed, as a delegation was revoked twice."
+
+            # Look up the delegations added last, which a scan reaches last
+            lookups = [identifier for identifier in identifiers[::-1] if identifier in database.edges]
+            lookups = lookups[: self.performance_test_count]
+            for case, lookup in [("indexed_lookup", database.edges.get), ("scanned_lookup", None)]:
+                elapsed_avg = 0
+                for identifier in lookups:
+                    start_time = time.time()
+                    location = lookup(identifier) if lookup else scan_edge(database, identifier)
+                    elapsed_avg += time.time() - start_time
+
+                    assert location is not None, "Performance test failed, as a delegation was not found."
+
+                times_taken[case] = format(elapsed_avg / len(lookups), ".6f")
+
+            results[number_of_edges] = times_taken
+
+        return results
+
+    def get_performance_values_access_batches(self, number_of_parties=100):
+        """
+        Test the performance of checking a growing batch of access requests against the same owner, where all
+        delegations are based on the same delegation: owner1 -> party1 -> party{i}.
+        Compares checking every request with has_access to checking the batch with has_access_many.
+
+        Params:
+            number_of_parties: the number of parties party1 delegates to.
+
+        Returns:
+            The time taken per batch size, per checking mode.
+        """
+        parties = [f"party{i}" for i in range(2, number_of_parties + 2)]
+        expiry = time.time() + 1000000
+        self.service.add_parties(["owner1", "party1"] + parties, "base")
+
+        evid1 = self.service.add_delegation("owner1", "party1", ["object1"], ["read"], expiry, "base")
+        evids = self.service.add_delegations(
+            [("party1", party, ["object1"], ["read"], expiry, evid1) for party in parties], "base"
+        )
+
+        batch_sizes = [1, 10, 100, 1000, 10000]
+        times_taken = {}
+
+        for batch_size in batch_sizes:
+            requests = [
+                (parties[i % number_of_parties], "owner1", "object1", "read", "base", evids[i % number_of_parties])
+                for i in range(batch_size)
+            ]
+
+            start_time = time.time()
+            expected = [self.service.has_access(*request) for request in requests]
+            elapsed_single = time.time() - start_time
+
+            start_time = time.time()
+            results = self.service.has_access_many(requests)
+            elapsed_batch = time.time() - start_time
+
+            assert all(expected), "Performance test failed, as access was expected, but failed."
+            assert results == expected, "Performance test failed, as the batch results differ."
+
+            times_taken[batch_size] = {
+                "single": format(elapsed_single, ".6f"),
+                "batch": format(elapsed_batch, ".6f"),
+            }
+
+        return times_taken
+
+    def get_performance_values_database_fanout(self):
+        """
+        Test the performance of the delegation model with a growing number of databases, each holding evidence for
+        an unrelated party. Compares the evidence lookup across all databases using the routes of the broker with
+        scanning every database, and measures the has_access method.
+        """
+        self.service.add_parties(self.PARTIES, "base")
+
+        evid1 = self.service.add_delegation("owner1", "party1", ["object1"], ["read"], time.time() + 1000000, "base")
+        evid2 = self.service.add_delegation(
+            "party1", "party2", ["object1"], ["read"], time.time() + 1000000, "base", evidence=evid1
+        )
+        evid3 = self.service.add_delegation(
+            "party2", "party3", ["object1"], ["read"], time.time() + 1000000, "base", evidence=evid2
+        )
+
+        broker = self.service.db_broker
+        numbers_of_databases = [1, 10, 100, 1000]
+        times_taken = {}
+
+        for idx, number_of_databases in enumerate(numbers_of_databases):
+            for i in range(numbers_of_databases[idx - 1] if idx > 0 else 0, number_of_databases):
+                db = self.service.db_class(f"ar{i}")
+                db.add_evidence(
+                    base_evidence.Evidence(
+                        identifier=db.get_next_identifier(),
+                        issuer=f"ar_owner{i}",
+                        receiver=f"ar_party{i}",
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=time.time() + 1000000,
+                        db_name=f"ar{i}",
+                    )
+                )
+                broker.add_database(f"ar{i}", db)
+
+            elapsed_routed = 0
+            elapsed_scan = 0
+            elapsed_access = 0
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                routed = broker.get_all_evidence_by_party("party3")
+                elapsed_routed += time.time() - start_time
+
+                start_time = time.time()
+                scanned = [
+                    (db_name, evidence)
+                    for db_name, db in broker.databases.items()
+                    for evidence in db.get_evidence_by_party("party3")
+                ]
+                elapsed_scan += time.time() - start_time
+
+                start_time = time.time()
+                success = self.service.has_access("party3", "owner1", "object1", "read", "base", evid3)
+                elapsed_access += time.time() - start_time
+
+                assert [(db_name, evidence.identifier) for db_name, evidence in routed] == [
+                    (db_name, evidence.identifier) for db_name, evidence in scanned
+                ], "Performance test failed, as the routed lookup differs from the scan."
+                assert success, "Performance test failed, as access was expected, but failed."
+
+            times_taken[number_of_databases] = {
+                "routed": format(elapsed_routed / self.performance_test_count, ".6f"),
+                "scan": format(elapsed_scan / self.performance_test_count, ".6f"),
+                "has_access": format(elapsed_access / self.performance_test_count, ".6f"),
+            }
+
+        for i in range(numbers_of_databases[-1]):
+            broker.remove_database(f"ar{i}")
+
+        return times_taken
+
+    def add_chain_across_ars(self, depth: int):
+        """
+        Add a chain of delegations where every delegation is stored in a different AR:
+        owner1 -> party0 (ar0) -> party1 (ar0) -> ... -> party{depth} (ar{depth - 1}).
+
+        Params:
+            depth: the number of ARs in the chain.
+
+        Returns:
+            A tuple with the names of the databases of the ARs, and the access request of the last party.
+        """
+        db_names = [f"ar{i}" for i in range(depth)]
+        for i, db_name in enumerate(db_names):
+            self.service.db_broker.add_database(db_name, self.service.db_class(db_name))
+            self.service.add_parties((["owner1"] if i == 0 else []) + [f"party{i}"], db_name)
+
+        expiry = time.time() + 1000000
+        evidence = self.service.add_delegation("owner1", "party0", ["object1"], ["read"], expiry, "ar0")
+        for i, db_name in enumerate(db_names):
+            evidence = self.service.add_delegation(
+                f"party{i}", f"party{i + 1}", ["object1"], ["read"], expiry, db_name, evidence=evidence
+            )
+        return db_names, (f"party{depth}", "owner1", "object1", "read", db_names[-1], evidence)
+
+    def get_performance_values_simulated_latency(self, depth=3):
+        """
+        Test the wall-clock latency of the has_access_async method under a simulated round-trip time per AR, for a
+        chain of delegations where every delegation is stored in a different AR:
+        owner1 -> party0 (ar0) -> party1 (ar0) -> ... -> party{depth} (ar{depth - 1}).
+        Compares sending independent lookups concurrently with a client sending one lookup at a time.
+
+        Params:
+            depth: the number of ARs in the chain.
+
+        Returns:
+            The wall-clock latency and number of round trips per round-trip time and client, or None if the model
+            has no asynchronous access check.
+        """
+        broker = self.service.db_broker
+        db_names, request = self.add_chain_across_ars(depth)
+
+        round_trip_times = [0.001, 0.005, 0.01]
+        times_taken = {}
+        try:
+            for round_trip_time in round_trip_times:
+                times_taken[round_trip_time] = {}
+                for client, concurrency in [("concurrent", None), ("sequential", 1)]:
+                    async_broker = AsyncDatabaseBroker(
+                        broker,
+                        latency=LatencyModel(round_trip_time, round_trip_time / 5, seed=0),
+                        concurrency=concurrency,
+                    )
+
+                    elapsed_avg = 0
+                    for _ in range(self.performance_test_count):
+                        start_time = time.time()
+                        success = asyncio.run(self.service.has_access_async(*request, async_broker))
+                        elapsed_avg += time.time() - start_time
+
+                        assert success, "Performance test failed, as access was expected, but failed."
+
+                    times_taken[round_trip_time][client] = {
+                        "latency": format(elapsed_avg / self.performance_test_count, ".6f"),
+                        "round_trips": async_broker.round_trips // self.performance_test_count,
+                    }
+        except NotImplementedError:
+            times_taken = None
+        finally:
+            for db_name in db_names:
+                broker.remove_database(db_name)
+
+        return times_taken
+
+    def get_performance_values_evidence_cache(self, depth=3):
+        """
+        Test the effect of the evidence cache of the broker on the has_access method and on evidence lookups across
+        all ARs, for a chain of delegations where every delegation is stored in a different AR:
+        owner1 -> party0 (ar0) -> party1 (ar0) -> ... -> party{depth} (ar{depth - 1}).
+        Afterwards, the last delegation is revoked to check that the cached lookups are invalidated.
+
+        Params:
+            depth: the number of ARs in the chain.
+
+        Returns:
+            The time taken per lookup with and without the cache, and the statistics of the cache.
+        """
+        broker = self.service.db_broker
+        db_names, request = self.add_chain_across_ars(depth)
+
+        cache = EvidenceCache(max_size=1024, ttl=60)
+        times_taken = {}
+        try:
+            for mode, mode_cache in [("uncached", None), ("cached", cache)]:
+                broker.cache = mode_cache
+
+                elapsed_access = 0
+                elapsed_lookup = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    success = self.service.has_access(*request)
+                    elapsed_access += time.time() - start_time
+
+                    start_time = time.time()
+                    for i in range(depth + 1):
+                        broker.get_all_evidence_by_party(f"party{i}")
+                    elapsed_lookup += time.time() - start_time
+
+                    assert success, "Performance test failed, as access was expected, but failed."
+
+                times_taken[mode] = {
+                    "has_access": format(elapsed_access / self.performance_test_count, ".6f"),
+                    "lookup": format(elapsed_lookup / self.performance_test_count, ".6f"),
+                }
+
+            evidence = request[-1]
+            self.service.revoke_delegation(evidence.identifier, db_names[-1])
+            assert all(
+                (db_name, item.identifier) != (db_names[-1], evidence.identifier)
+                for db_name, item in broker.get_all_evidence_by_party(f"party{depth}")
+            ), "Performance test failed, as revoked evidence was returned from the cache."
+        finally:
+            broker.cache = None
+            for db_name in db_names:
+                broker.remove_database(db_name)
+
+        times_taken["cache"] = cache.get_stats()
+        return times_taken
+
+    def get_round_trips(self, depth=3):
+        """
+        Count the round trips to the ARs and the entries fetched by a single access check, for a chain of delegations
+        where every delegation is stored in a different AR:
+        owner1 -> party0 (ar0) -> party1 (ar0) -> ... -> party{depth} (ar{depth - 1}).
+        Compares sending every lookup separately with coalescing the lookups of a resolution step per AR.
+
+        Params:
+            depth: the number of ARs in the chain.
+
+        Returns:
+            The number of round trips and entries fetched, and the time taken, per lookup mode.
+        """
+        broker = self.service.db_broker
+        db_names, request = self.add_chain_across_ars(depth)
+
+        round_trips = {}
+        try:
+            for mode, coalesce in [("per_lookup", False), ("coalesced", True)]:
+                broker.coalesce = coalesce
+
+                start_time = time.time()
+                with broker.count_lookups() as counter:
+                    success = self.service.has_access(*request)
+                elapsed = time.time() - start_time
+
+                assert success, "Round trip test failed, as access was expected, but failed."
+                round_trips[mode] = {
+                    "round_trips": counter.round_trips,
+                    "entries_fetched": counter.entries_fetched,
+                    "time": format(elapsed, ".6f"),
+                }
+        finally:
+            broker.coalesce = False
+            for db_name in db_names:
+                broker.remove_database(db_name)
+
+        return round_trips
+
+    def get_instrumentation(self, depth=3):
+        """
+        Instrument the databases for repeated access checks on a chain of delegations where every delegation is stored
+        in a different AR, see add_chain_across_ars. Measures the overhead of the instrumentation as well.
+
+        Params:
+            depth: the number of ARs in the chain.
+
+        Returns:
+            The time taken per access check with and without instrumentation, and the instrumentation snapshot.
+        """
+        broker = self.service.db_broker
+        db_names, request = self.add_chain_across_ars(depth)
+
+        times_taken = {}
+        try:
+            for mode in ["disabled", "enabled"]:
+                if mode == "enabled":
+                    instrumentation = broker.enable_instrumentation()
+                    instrumentation.instrument_access(self.service)
+
+                elapsed_avg = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    success = self.service.has_access(*request)
+                    elapsed_avg += time.time() - start_time
+
+                    assert success, "Performance test failed, as access was expected, but failed."
+                times_taken[mode] = format(elapsed_avg / self.performance_test_count, ".6f")
+
+            snapshot = instrumentation.snapshot()
+        finally:
+            broker.disable_instrumentation()
+            uninstrument(self.service)
+            for db_name in db_names:
+                broker.remove_database(db_name)
+
+        return {"has_access": times_taken, "snapshot": snapshot}
+
+    def get_performance_values_process_shards(self, number_of_requests=10000):
+        """
+        Test the access check throughput with the databases sharded over worker processes, one AR per worker.
+        Every AR holds a chain of delegations owner1 -> party1 -> party2 -> party3, and the requests are spread evenly
+        over the ARs and evaluated by the workers with ProcessDatabaseBroker.evaluate_many.
+        The throughput can only grow with the number of workers up to the number of available cores.
+
+        Params:
+            number_of_requests: the number of access checks per measurement.
+
+        Returns:
+            The number of CPU cores, and the number of access checks per second per number of workers, or None if the
+            model needs a broker of its own.
+        """
+        if self.database_broker_class is not base_database.DatabaseBroker:
+            return None
+
+        numbers_of_workers = [1, 2, 4]
+        throughput = {"cpu_count": os.cpu_count()}
+        for number_of_workers in numbers_of_workers:
+            broker = ProcessDatabaseBroker()
+            service = type(self.service)(self.db_class, broker)
+            expiry = time.time() + 1000000
+
+            requests = []
+            for i in range(number_of_workers):
+                db_name = f"shard{i}"
+                broker.add_database(db_name, self.db_class(db_name))
+                service.add_parties(self.PARTIES, db_name)
+
+                evidence = None
+                for delegator, delegatee in [("owner1", "party1"), ("party1", "party2"), ("party2", "party3")]:
+                    evidence = service.add_delegation(
+                        delegator, delegatee, ["object1"], ["read"], expiry, db_name, evidence=evidence
+                    )
+                requests.append(("party3", "owner1", "object1", "read", db_name, evidence))
+
+            requests = [requests[i % number_of_workers] for i in range(number_of_requests)]
+            try:
+                # Warm up the services in the workers
+                broker.evaluate_many(type(self.service), requests[:number_of_workers])
+
+                elapsed_avg = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    results = broker.evaluate_many(type(self.service), requests)
+                    elapsed_avg += time.time() - start_time
+
+                    assert all(results), "Performance test failed, as access was expected, but failed."
+            finally:
+                broker.close()
+
+            throughput[number_of_workers] = round(number_of_requests * self.performance_test_count / elapsed_avg)
+
+        return throughput
+
+    def get_performance_values_local_servers(self, number_of_servers=3, number_of_lookups=100):
+        """
+        Run the tests with every database served by a local AR server over TCP, and test the latency of the access
+        checks including serialization and real socket round trips. The latency is measured for a chain of
+        delegations where every delegation is stored on a different server, and compared to the same chain in
+        process. The lookups of evidence are sent to a server one at a time and pipelined on one connection.
+
+        Params:
+            number_of_servers: the number of AR servers in the chain.
+            number_of_lookups: the number of evidence lookups per measurement.
+
+        Returns:
+            The test results, and the latency per access check and per lookup, or None if the model needs a broker
+            of its own.
+        """
+        if self.database_broker_class is not base_database.DatabaseBroker:
+            return None
+
+        tests = DelegationModelTests(
+            self.db_class,
+            SocketDatabaseBroker,
+            type(self.service),
+            self.performance_time_limit,
+            self.performance_test_count,
+        )
+        broker = tests.service.db_broker
+        results = {"servers": number_of_servers, "tests": {}}
+        try:
+            for name, test_method in inspect.getmembers(tests, predicate=inspect.ismethod):
+                if not name.startswith("test_"):
+                    continue
+                broker.add_database("base", tests.service.db_class("base"))
+                tests.service.add_parties(tests.PARTIES, "base")
+                try:
+                    test_method()
+                    results["tests"][name] = True
+                except Exception:
+                    results["tests"][name] = False
+
+            results["access_latency"] = {}
+            for client in [self, tests]:
+                db_names, request = client.add_chain_across_ars(number_of_servers)
+                elapsed_avg = 0
+                for _ in range(self.performance_test_count):
+                    start_time = time.time()
+                    success = client.service.has_access(*request)
+                    elapsed_avg += time.time() - start_time
+
+                    assert success, "Performance test failed, as access was expected, but failed."
+
+                results["access_latency"]["sockets" if client is tests else "in_process"] = format(
+                    elapsed_avg / self.performance_test_count, ".6f"
+                )
+                if client is self:
+                    for db_name in db_names:
+                        self.service.db_broker.remove_database(db_name)
+
+            remote = broker.get_database(db_names[-1])
+            evidence = request[5]
+            if remote.get_evidence(evidence.identifier) is None:
+                # The model does not store its evidence in the database, store it to measure the same lookups
+                remote.add_evidence(evidence)
+            lookups = [("call", ("get_evidence", (evidence.identifier,), {}))] * number_of_lookups
+            assert all(
+                item is not None and item.identifier == evidence.identifier
+                for item in [remote.request(*lookups[0])] + remote.pipeline(lookups)
+            ), "Performance test failed, as the evidence was not found on the server."
+            times_taken = {"sequential": 0, "pipelined": 0}
+            for _ in range(self.performance_test_count):
+                start_time = time.time()
+                for kind, payload in lookups:
+                    remote.request(kind, payload)
+                times_taken["sequential"] += time.time() - start_time
+
+                start_time = time.time()
+                remote.pipeline(lookups)
+                times_taken["pipelined"] += time.time() - start_time
+
+            results["lookup_latency"] = {
+                client: format(elapsed / (self.performance_test_count * number_of_lookups), ".6f")
+                for client, elapsed in times_taken.items()
+            }
+        finally:
+            broker.close()
+
+        return results
+
+    def get_performance_values_concurrent_access(
+        self, number_of_readers=4, number_of_writers=2, number_of_checks=1000, number_of_writes=100
+    ):
+        """
+        Stress test the access checks on a thread-safe database from multiple threads, while other threads add and
+        revoke delegations on the same database. Every reader checks a chain of delegations
+        owner1 -> party1 -> party2 -> party3 that is not changed, and every writer adds and revokes delegations
+        owner1 -> party4. Checks that no thread fails, that every access check succeeds and that the identifiers
+        allocated by the writers are unique, and measures the read throughput without and with the writers.
+
+        Params:
+            number_of_readers: the number of threads checking access.
+            number_of_writers: the number of threads adding and revoking delegations.
+            number_of_checks: the number of access checks per reader.
+            number_of_writes: the number of delegations added and revoked per writer.
+
+        Returns:
+            The number of access checks per second without and with the writers, or None if the database of the model
+            can not be made thread-safe.
+        """
+        try:
+            database = self.db_class("concurrent", thread_safe=True)
+        except TypeError:
+            return None
+
+        service = type(self.service)(self.db_class, self.database_broker_class())
+        service.db_broker.add_database("concurrent", database)
+        service.add_parties(self.PARTIES, "concurrent")
+        expiry = time.time() + 1000000
+
+        evidence = None
+        for delegator, delegatee in [("owner1", "party1"), ("party1", "party2"), ("party2", "party3")]:
+            evidence = service.add_delegation(
+                delegator, delegatee, ["object1"], ["read"], expiry, "concurrent", evidence=evidence
+            )
+        request = ("party3", "owner1", "object1", "read", "concurrent", evidence)
+
+        errors = []
+
+        def read(results):
+            try:
+                for _ in range(number_of_checks):
+                    results.append(service.has_access(*request))
+            except Exception as error:
+                errors.append(error)
+
+        def write(identifiers):
+            try:
+                for _ in range(number_of_writes):
+                    item = service.add_delegation("owner1", "party4", ["object2"], ["read"], expiry, "concurrent")
+                    identifiers.append(item.identifier)
+                    service.revoke_delegation(item.identifier, "concurrent")
+            except Exception as error:
+                errors.append(error)
+
+        throughput = {}
+        for load, number_of_writer_threads in [("without_writers", 0), ("with_writers", number_of_writers)]:
+            results = [[] for _ in range(number_of_readers)]
+            identifiers = [[] for _ in range(number_of_writer_threads)]
+            threads = [threading.Thread(target=read, args=(reader_results,)) for reader_results in results]
+            threads += [threading.Thread(target=write, args=(writer_ids,)) for writer_ids in identifiers]
+
+            start_time = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - start_time
+
+            assert not errors, f"Performance test failed, as a thread raised {errors[0]!r}."
+            assert all(
+                all(reader_results) for reader_results in results
+            ), "Performance test failed, as access was expected, but failed."
+            allocated = [identifier for writer_ids in identifiers for identifier in writer_ids]
+            assert len(set(allocated)) == len(allocated), "Performance test failed, as an identifier was reused."
+
+            throughput[load] = round(number_of_readers * number_of_checks / elapsed)
+
+        return {"readers": number_of_readers, "writers": number_of_writers, "checks_per_second": throughput}
+
+    def get_ingestion_throughput(self, number_of_delegations=10000):
+        """
+        Test the ingestion throughput of the delegation model, adding a star of delegations from a single owner
+        one at a time with add_delegation and in a single call with add_delegations.
+
+        Params:
+            number_of_delegations: the number of delegations to add.
+
+        Returns:
+            The number of delegations added per second, per ingestion mode.
+        """
+        parties = [f"party{i}" for i in range(number_of_delegations)]
+        expiry = time.time() + 1000000
+        delegations = [("owner1", party, ["object1"], ["read"], expiry) for party in parties]
+
+        throughput = {}
+        for mode in ["single", "bulk"]:
+            # Reset database
+            self.service.db_broker.add_database("base", self.service.db_class("base"))
+            self.service.add_parties(["owner1"] + parties, "base")
+            gc.collect()
+
+            start_time = time.time()
+            if mode == "single":
+                for delegation in delegations:
+                    self.service.add_delegation(*delegation, "base")
+            else:
+                self.service.add_delegations(delegations, "base")
+            end_time = time.time()
+
+            throughput[mode] = format(number_of_delegations / (end_time - start_time), ".1f")
+
+        # Reset database
+        self.service.db_broker.add_database("base", self.service.db_class("base"))
+
+        return throughput
+
+
+class DatabaseTests:
+    """
+    Tests and benchmarks of the databases that do not depend on the delegation model, run once instead of per model.
+    """
+
+    def generate_report(self, filename: str, verbose=False) -> dict:
+        """
+        Generate a report of the test results and save it to a json file.
+
+        Params:
+            filename: The name of the file to save the report to.
+
+        Returns:
+            A dictionary with the test results, including performance and summary.
+        """
+        results = {"tests": {"other": {}}}
+        for name, test_method in inspect.getmembers(self, predicate=inspect.ismethod):
+            if not name.startswith("test_"):
+                continue
+
+            try:
+                test_method()
+                results["tests"]["other"][name] = True
+                print(f"Test {name} passed.") if verbose else None
+            except Exception as e:
+                results["tests"]["other"][name] = False
+                print(f"Test {name} failed: {e}") if verbose else None
+
+        results["startup_time"] = self.get_startup_times()
+
+        results["performance_consistent_hashing"] = self.get_performance_values_consistent_hashing()
+
+        results["performance_revocation_feed"] = {
+            "base": self.get_performance_values_revocation_feed(base_database.Database),
+            "sqlite": self.get_performance_values_revocation_feed(sqlite_database.Database),
+        }
+
+        results["memory_per_delegation"] = {
+            "base": get_memory_per_delegation(base_database.Database),
+            "columnar": get_memory_per_delegation(columnar_database.Database),
+        }
+
+        # Add a summary per category
+        results["summary"] = {}
+        for category, test_results in results["tests"].items():
+            results["summary"][category] = all(test_results.values())
+
+        with open(filename, "w") as f:
+            json.dump(results, f, indent=4)
+
+        return results
+
+    def print_test_results(self, results) -> None:
+        """
+        Print the test results in a formatted table.
+
+        Params:
+            results: A dictionary with the test names as keys and the results as values.
+        """
+        print_test_results(results, self.__class__.__name__)
+
+    def test_restore_round_trip(self):
+        """
+        Test restoring persisted databases from a snapshot and the log written after it.
+        Every database is restored into its own evidence store, and evidence of the snapshot is only unpickled once.
+        """
+        for db_class in [base_database.Database, columnar_database.Database]:
+            with tempfile.TemporaryDirectory() as directory:
+                db = db_class("restore", log_directory=directory)
+                evidences = [
+                    base_evidence.Evidence(
+                        identifier=db.get_next_identifier(),
+                        issuer="owner1",
+                        receiver=f"party{i % 2}",
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=time.time() + 1000000,
+                        db_name="restore",
+                    )
+                    for i in range(4)
+                ]
+                db.add_evidence_many(evidences[:3])
+                db.snapshot()
+                db.add_evidence(evidences[3])
+                db.revoke(evidences[0].identifier)
+                db.close()
+
+                for _ in range(2):  # Restore from the log tail, then from a snapshot written by a restored database
+                    db = db_class("restore", log_directory=directory)
+                    name = db_class.__module__
+
+                    assert isinstance(
+                        db.evidence.store, type(db._new_evidence_store())
+                    ), f"{name} was not restored into its own evidence store"
+                    assert len(db.evidence) == 4, f"{name} did not restore all evidence"
+                    assert [item.identifier for item in db.get_evidence_by_party("party1")] == [
+                        evidences[1].identifier,
+                        evidences[3].identifier,
+                    ], f"{name} did not restore the evidence per party"
+                    assert [item.identifier for item in db.get_evidence_by_party("party0")] == [
+                        evidences[2].identifier
+                    ], f"{name} did not restore the revocation"
+                    if db_class is base_database.Database:
+                        assert db.get_evidence(2) is db.get_evidence(2), f"{name} unpickled evidence more than once"
+
+                    db.snapshot()
+                    db.close()
+
+    def test_restore_torn_record(self):
+        """
+        Test restoring a database whose log ends in a partially written record, e.g. after a crash during an append.
+        The torn record is ignored, and records appended after the restore can be restored again.
+        """
+
+        def add_evidence(db, count):
+            for _ in range(count):
+                db.add_evidence(
+                    base_evidence.Evidence(
+                        identifier=db.get_next_identifier(),
+                        issuer="owner1",
+                        receiver="party1",
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=time.time() + 1000000,
+                        db_name="torn",
+                    )
+                )
+
+        # A record with a torn payload, and a torn header
+        for torn in [RECORD_HEADER.pack(LOG_ADD, 500) + b"x" * 20, b"\x01\x02"]:
+            with tempfile.TemporaryDirectory() as directory:
+                db = base_database.Database("torn", log_directory=directory)
+                add_evidence(db, 2)
+                db.close()
+                with open(os.path.join(directory, "torn.log"), "ab") as log:
+                    log.write(torn)
+
+                db = base_database.Database("torn", log_directory=directory)
+                assert len(db.evidence) == 2, "The complete records were not restored"
+                add_evidence(db, 5)
+                db.close()
+
+                db = base_database.Database("torn", log_directory=directory)
+                assert sorted(db.evidence) == list(range(1, 8)), "Records appended after a torn record were lost"
+                db.close()
+
+    def test_columnar_compiled_rules(self):
+        """
+        Test that the columnar store materializes evidence with the same rules and extras as were added, and compiles
+        every distinct rule only once, instead of on every retrieval.
+        """
+        db = columnar_database.Database("columnar")
+        for i in range(4):
+            evidence = base_evidence.Evidence(
+                identifier=db.get_next_identifier(),
+                issuer="owner1",
+                receiver="party1",
+                rules=[
+                    base_evidence.Rule(["object1", "object2"], ["read"]),
+                    base_evidence.Rule([f"object{i % 2 + 3}"], ["read", "write"]),
+                ],
+                valid_from=0,
+                valid_untill=time.time() + 1000000,
+                db_name="columnar",
+            )
+            evidence.prev_db_name = "columnar"
+            db.add_evidence(evidence)
+
+        for _ in range(2):
+            for item in db.get_evidence_by_party("party1"):
+                assert item.covers("object2", "read") and not item.covers("object2", "write"), "Wrong first rule"
+                assert item.covers(f"object{(item.identifier - 1) % 2 + 3}", "write"), "Wrong second rule"
+                assert item.prev_db_name == "columnar", "The extra attributes were not materialized"
+
+        assert len(db.evidence.compiled_rules) == 3, "Every distinct rule should be compiled once"
+        first, second = db.get_evidence(1), db.get_evidence(3)
+        assert first is not second and first.rules[1] is not second.rules[1], "Materialized rules should not be shared"
+        assert first.rules[1].compiled is second.rules[1].compiled, "The compiled rule should be shared"
+
+    def test_action_mask_fallback(self):
+        """
+        Test that evidence batches give the same results as evaluating the rules directly, also for actions whose
+        interned id does not fit in the 64-bit mask columns of the batch.
+        The actions are interned in a separate interner, so the ids of the other tests are not affected.
+        """
+        actions = base_evidence.ACTIONS
+        base_evidence.ACTIONS = Interner()
+        try:
+            names = [f"action{i}" for i in range(80)]
+            base_evidence.ACTIONS.intern_many(names)  # action64 and later do not fit in the mask columns
+            evidences = [
+                base_evidence.Evidence(
+                    identifier=i,
+                    issuer="owner1",
+                    receiver="party1",
+                    rules=[
+                        base_evidence.Rule(["object1"], names[i % 7 :: 7]),
+                        base_evidence.Rule([f"object{i % 3}"], [names[i % 80], names[-1 - i % 5]]),
+                    ],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name="masks",
+                )
+                for i in range(2 * VECTORIZE_THRESHOLD)
+            ]
+            batch = EvidenceBatch(evidences)
+
+            for object_ids, requested in [
+                (["object1"], ["action0"]),
+                (["object1"], ["action70"]),
+                (["object1", "object2"], ["action3", "action79"]),
+                (["object0"], [names[-1]]),
+                (["object2"], ["action5", "action12"]),
+            ]:
+                expected = [item for item in evidences if item.covers_all(object_ids, requested)]
+                assert batch.select_all(object_ids, requested) == expected, f"Wrong batch result for {requested}"
+        finally:
+            base_evidence.ACTIONS = actions
+
+    def test_evidence_cache_invalidation(self):
+        """
+        Test that the evidence cache of the broker is invalidated per database when evidence is revoked or added, also
+        when another database holds evidence with the same identifier for the same party.
+        """
+
+        def add_evidence(database, db_name, identifier):
+            database.add_evidence(
+                base_evidence.Evidence(
+                    identifier=identifier,
+                    issuer="owner1",
+                    receiver="party1",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name=db_name,
+                )
+            )
+
+        broker = base_database.DatabaseBroker(cache=EvidenceCache(max_size=16))
+        for db_name in ["ar0", "ar1"]:
+            broker.add_database(db_name, base_database.Database(db_name))
+            add_evidence(broker.get_database(db_name), db_name, 1)
+
+        def cached_lookups():
+            return sorted((db_name, item.identifier) for db_name, item in broker.get_all_evidence_by_party("party1"))
+
+        assert cached_lookups() == [("ar0", 1), ("ar1", 1)], "The evidence of both databases should be found"
+        assert broker.get_database_entry("ar0", 1) is not None, "The evidence should be found by identifier"
+        hits = broker.cache.hits
+        assert cached_lookups() == [("ar0", 1), ("ar1", 1)], "The cached evidence should be unchanged"
+        assert broker.cache.hits > hits, "Repeated lookups should be served from the cache"
+
+        broker.get_database("ar0").revoke(1)
+        assert cached_lookups() == [("ar1", 1)], "Revoked evidence should not be returned from the cache"
+        assert broker.get_database_entry("ar1", 1) is not None, "Evidence of another database should stay cached"
+
+        add_evidence(broker.get_database("ar0"), "ar0", 2)
+        assert cached_lookups() == [("ar0", 2), ("ar1", 1)], "Added evidence should be returned after a cached lookup"
+        assert broker.cache.get_stats()["invalidations"] > 0, "The cached lookups were not invalidated"
+
+    def test_read_write_lock_stress(self, number_of_readers=8, number_of_writers=4, number_of_iterations=2000):
+        """
+        Stress test the reader/writer lock with concurrent readers and writers, and a thread-safe database with
+        concurrent lookups and additions. No reader may hold the lock while a writer does, and every lookup must see
+        a consistent database.
+        """
+        lock = ReadWriteLock()
+        state = {"readers": 0, "writers": 0}
+        state_lock = threading.Lock()
+        violations = []
+
+        def enter(role, other):
+            with state_lock:
+                state[role] += 1
+                if state[other] or state["writers"] > 1:
+                    violations.append(dict(state))
+
+        def leave(role):
+            with state_lock:
+                state[role] -= 1
+
+        def read():
+            for _ in range(number_of_iterations):
+                with lock.read():
+                    enter("readers", "writers")
+                    with lock.read():  # Nested reads must not deadlock with waiting writers
+                        pass
+                    leave("readers")
+
+        def write():
+            for _ in range(number_of_iterations // 10):
+                with lock.write():
+                    enter("writers", "readers")
+                    with lock.read():  # A writer may read again
+                        pass
+                    leave("writers")
+
+        database = base_database.Database("stress", thread_safe=True)
+        expiry = time.time() + 1000000
+
+        def add_evidence(party):
+            for _ in range(number_of_iterations // 10):
+                database.add_evidence(
+                    base_evidence.Evidence(
+                        identifier=database.get_next_identifier(),
+                        issuer="owner1",
+                        receiver=party,
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=expiry,
+                        db_name="stress",
+                    )
+                )
+
+        def lookup(party):
+            seen = 0
+            for _ in range(number_of_iterations // 10):
+                evidences = database.get_evidence_by_party(party)
+                if len(evidences) < seen or any(item.receiver != party for item in evidences):
+                    violations.append(party)
+                seen = len(evidences)
+
+        threads = [threading.Thread(target=read) for _ in range(number_of_readers)]
+        threads += [threading.Thread(target=write) for _ in range(number_of_writers)]
+        threads += [threading.Thread(target=add_evidence, args=(f"party{i}",)) for i in range(number_of_writers)]
+        threads += [threading.Thread(target=lookup, args=(f"party{i}",)) for i in range(number_of_writers)]
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads as often as possible, to interleave the lock operations
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert not violations, f"Readers and writers held the lock at once: {violations[:5]}"
+        assert not lock.reads and lock.writer is None and not lock.waiting_writers, "The lock was not released"
+        assert len(database.evidence) == number_of_writers * (number_of_iterations // 10), "Evidence was lost"
+
+    def test_thread_safe_stores(self, number_of_threads=4, number_of_evidences=200):
+        """
+        Test concurrent lookups of single evidence while evidence is added, on the thread-safe databases with stores
+        that are not a plain dict: the SQLite database with a small cache of resolved links, the columnar store, and a
+        database restored from a snapshot. Every lookup must see complete evidence, linking to its previous evidence.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            restored = base_database.Database("snapshot", log_directory=directory)
+            restored.add_evidence_many(
+                [
+                    base_evidence.Evidence(
+                        identifier=restored.get_next_identifier(),
+                        issuer="owner1",
+                        receiver="party0",
+                        rules=[base_evidence.Rule(["object1"], ["read"])],
+                        valid_from=0,
+                        valid_untill=time.time() + 1000000,
+                        db_name="snapshot",
+                    )
+                    for _ in range(number_of_evidences)
+                ]
+            )
+            restored.snapshot()
+            restored.close()
+
+            for database in [
+                sqlite_database.Database("sqlite", link_cache_size=8, thread_safe=True),
+                columnar_database.Database("columnar", thread_safe=True),
+                base_database.Database("snapshot", log_directory=directory, thread_safe=True),
+            ]:
+                added = set(range(1, len(database.get_evidence_at()) + 1))
+                previous = {
+                    # identifier: identifier of the previous evidence it links to
+                }
+                violations = []
+
+                def add_evidence(party):
+                    prev_evidence = None
+                    for _ in range(number_of_evidences // number_of_threads):
+                        item = base_evidence.Evidence(
+                            identifier=database.get_next_identifier(),
+                            issuer="owner1",
+                            receiver=party,
+                            rules=[base_evidence.Rule(["object1"], ["read"])],
+                            valid_from=0,
+                            valid_untill=time.time() + 1000000,
+                            db_name=database.name,
+                        )
+                        item.prev_evidence = prev_evidence
+                        if prev_evidence is not None:
+                            previous[item.identifier] = prev_evidence.identifier
+                        database.add_evidence(item)
+                        added.add(item.identifier)
+                        prev_evidence = item
+
+                def lookup():
+                    random_generator = random.Random(threading.get_ident())
+                    for _ in range(number_of_evidences * 2):
+                        # Also look up the evidence that is being added, which is either missing or complete
+                        identifier = random_generator.randint(1, max(database.id_counter, 1))
+                        try:
+                            completed = identifier in added
+                            item = database.get_evidence(identifier)
+                            (found,), _ = database.lookup([identifier])
+                            if item is None or found is None:
+                                if completed:
+                                    violations.append((identifier, "missing"))
+                            elif item.identifier != identifier:
+                                violations.append((identifier, "identifier"))
+                            elif not item.covers("object1", "read"):
+                                violations.append((identifier, "rules"))
+                            elif identifier in previous and item.prev_evidence.identifier != previous[identifier]:
+                                violations.append((identifier, "link"))
+                        except Exception as e:
+                            violations.append((identifier, repr(e)))
+
+                threads = [threading.Thread(target=add_evidence, args=(f"party{i}",)) for i in range(number_of_threads)]
+                threads += [threading.Thread(target=lookup) for _ in range(number_of_threads)]
+
+                switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(1e-6)  # Switch threads as often as possible, to interleave the lookups
+                try:
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                finally:
+                    sys.setswitchinterval(switch_interval)
+
+                name = database.__class__.__module__
+                assert not violations, f"{name} returned incomplete evidence: {violations[:5]}"
+                assert len(database.get_evidence_at()) == len(added), f"{name} lost evidence"
+                if database.name == "snapshot":
+                    assert len(database.evidence) == len(added), f"{name} counted evidence of the snapshot twice"
+                database.close()
+
+    def test_read_write_lock_writer_handoff(self):
+        """
+        Test that a reader is not admitted while a writer stops waiting and takes the lock, by running a reader at the
+        moment the writer stops counting as a waiting writer.
+        """
+        admitted = []
+
+        class HandoffLock(ReadWriteLock):
+            def __init__(self):
+                self.hook = None
+                super().__init__()
+
+            @property
+            def waiting_writers(self):
+                return self._waiting_writers
+
+            @waiting_writers.setter
+            def waiting_writers(self, value):
+                self._waiting_writers = value
+                if self.hook is not None and value == 0:
+                    self.hook()
+
+        def read():
+            lock.acquire_read()
+            admitted.append(lock.writer)
+            lock.release_read()
+
+        def run_reader():
+            reader = threading.Thread(target=read, daemon=True)
+            reader.start()
+            reader.join(0.1)  # The reader either got the lock right away, or waits for the writer
+            readers.append(reader)
+
+        lock = HandoffLock()
+        readers = []
+        lock.hook = run_reader
+        with lock.write():
+            lock.hook = None
+            assert not admitted, "A reader was admitted while the writer took the lock"
+        for reader in readers:
+            reader.join()
+        assert admitted == [None], "The reader was not admitted after the writer released the lock"
+
+    def test_oracle_roots_parallel_edges(self):
+        """
+        Test that the roots of an oracle database are found through a delegator when any of the parallel edges from it
+        delegates the action, also when another parallel edge delegates something else or is revoked.
+        """
+        broker = oracle_database.DatabaseBroker()
+        for db_name in ["ar0", "ar1"]:
+            broker.add_database(db_name, oracle_database.Database(db_name))
+        broker.get_database("ar0").add_parties(["owner1"])
+        broker.get_database("ar1").add_parties(["party1", "party2"])
+
+        broker.add_link("ar0", "owner1", "party1", ["object1"], ["read"])
+        read = broker.add_link("ar1", "party1", "party2", ["object1"], ["read"])
+        broker.add_link("ar1", "party1", "party2", ["object2"], ["write"])
+        request = ("party2", "owner1", "object1", "read", "ar1", read)
+
+        database = broker.get_database("ar1")
+        assert database._build_recursive_graph("party2", "object1", "read") == [
+            "party1"
+        ], "A parallel edge delegating something else should not hide the delegator"
+        assert broker.has_access(*request) and broker.has_access_many([request]) == [True], "Access through bridge"
+
+        parallel = broker.add_link("ar1", "party1", "party2", ["object1"], ["read"])
+        database.revoke(read.identifier)
+        assert broker.has_access(*request), "A revoked parallel edge should not hide a valid one"
+
+        database.revoke(parallel.identifier)
+        assert database._build_recursive_graph("party2", "object1", "read") == [
+            "party2"
+        ], "A delegator should not be followed when all its edges are revoked"
+        assert not broker.has_access(*request), "Access should be denied after all parallel edges are revoked"
+
+    def test_prev_party_batch_without_evidence(self):
+        """
+        Test that the previous party model denies access in a batch to a party that presents no evidence and has none,
+        without affecting the other requests in the batch.
+        """
+        service = prev_party_service.PrevPartyService(base_database.Database, base_database.DatabaseBroker())
+        service.db_broker.add_database("base", base_database.Database("base"))
+        evid1 = service.add_delegation("owner1", "party1", ["object1"], ["read"], time.time() + 1000000, "base")
+        evid2 = service.add_delegation(
+            "party1", "party2", ["object1"], ["read"], time.time() + 1000000, "base", evidence=evid1
+        )
+
+        requests = [
+            ("party2", "owner1", "object1", "read", "base", evid2),
+            ("party3", "owner1", "object1", "read", "base", None),
+            ("party1", "owner1", "object1", "read", "base", None),
+        ]
+        expected = [service.has_access(*request) for request in requests]
+        assert expected == [True, False, True], "Access without presented evidence was not checked"
+        assert service.has_access_many(requests) == expected, "The batch results differ from has_access"
+
+    def test_oracle_deep_chain(self):
+        """
+        Test that the roots of an oracle database are found for a delegation chain that is longer than the recursion
+        limit, both for a complete chain and for a chain whose first delegation is revoked.
+        """
+        length = sys.getrecursionlimit() + 100
+        parties = [f"party{i}" for i in range(length + 1)]
+        database = oracle_database.Database("deep")
+        database.add_parties(parties)
+        edges = database.add_edges(
+            [(parties[i], parties[i + 1], ["object1"], ["read"]) for i in range(length)], database.name
+        )
+
+        assert database.has_access(parties[-1], parties[0], "object1", "read"), "The complete chain was not found"
+        assert database._build_recursive_graph(parties[-1], "object1", "read") == [parties[0]], "Wrong root"
+
+        database.revoke(edges[0].identifier)
+        assert database.has_access(parties[-1], parties[0], "object1", "read") == [
+            parties[1]
+        ], "The chain should end at the first party after the revoked delegation"
+
+    def test_instrumentation(self):
+        """
+        Test that the instrumentation of a broker records the calls and the evidence items retrieved per database,
+        including databases added later, counts nested access checks once, and is removed again without touching the
+        locked methods of a thread-safe database.
+        """
+        histogram = LatencyHistogram()
+        for nanoseconds in range(1, 1001):
+            histogram.record(nanoseconds)
+        summary = histogram.as_dict()
+        assert summary["count"] == 1000 and summary["min"] == 1 and summary["max"] == 1000, "Values were not recorded"
+        assert 0.875 * 500 <= summary["p50"] <= 500, "The median is not within the error bound of its bucket"
+
+        broker = base_database.DatabaseBroker()
+        broker.add_database("ar0", base_database.Database("ar0", thread_safe=True))
+        instrumentation = broker.enable_instrumentation()
+        broker.add_database("ar1", base_database.Database("ar1"))
+
+        for db_name in ["ar0", "ar1"]:
+            database = broker.get_database(db_name)
+            database.add_evidence(
+                base_evidence.Evidence(
+                    identifier=database.get_next_identifier(),
+                    issuer="owner1",
+                    receiver="party1",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name=db_name,
+                )
+            )
+        broker.get_evidence_by_party("ar0", "party1")
+        broker.get_evidence_by_party("ar1", "party1")
+        broker.get_evidence_by_party("ar1", "party2")
+
+        class Checker:
+            def has_access(self, depth):
+                broker.get_evidence_by_party(f"ar{depth % 2}", "party1")
+                return depth == 0 or self.has_access(depth - 1)
+
+        checker = Checker()
+        instrumentation.instrument_access(checker)
+        checker.has_access(2)
+
+        snapshot = instrumentation.snapshot()
+        databases = snapshot["databases"]
+        assert databases["ar0"]["methods"]["get_evidence_by_party"]["calls"] == 3, "Calls to ar0 were not counted"
+        assert databases["ar1"]["methods"]["get_evidence_by_party"]["calls"] == 3, "A database added later was missed"
+        assert databases["ar0"]["scanned"] == 3 and databases["ar1"]["scanned"] == 2, "Retrieved items miscounted"
+        assert snapshot["access_checks"]["ars_touched"] == {"2": 1}, "A nested access check was counted separately"
+
+        broker.disable_instrumentation()
+        uninstrument(checker)
+        locked = broker.get_database("ar0").get_evidence_by_party
+        assert getattr(locked, "locked", False), "The locked method of a thread-safe database was removed"
+        assert "get_evidence_by_party" not in vars(broker.get_database("ar1")), "The instrumentation was not removed"
+        assert "has_access" not in vars(checker), "The instrumentation of the access checks was not removed"
+
+    def test_consistent_hash_routing(self):
+        """
+        Test that a ConsistentHashBroker places every database and route on the node it belongs to on the hash ring,
+        only moves the databases and routes that change owner when nodes are added and removed, and keeps routing
+        the parties to their databases meanwhile.
+        """
+        broker = ConsistentHashBroker([f"node{i}" for i in range(5)])
+        for i in range(200):
+            database = base_database.Database(f"ar{i}")
+            database.add_evidence(
+                base_evidence.Evidence(
+                    identifier=database.get_next_identifier(),
+                    issuer="owner1",
+                    receiver=f"party{i}",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name=f"ar{i}",
+                )
+            )
+            broker.add_database(f"ar{i}", database)
+
+        def placement():
+            return {
+                **{db_name: node.name for node in broker.nodes.values() for db_name in node.databases},
+                **{party_id: node.name for node in broker.nodes.values() for party_id in node.routes},
+            }
+
+        def check_placement():
+            for key, name in placement().items():
+                owner = broker.get_database_node(key) if key.startswith("ar") else broker.get_party_node(key)
+                assert owner.name == name, f"{key} is placed on {name} instead of {owner.name}"
+            assert all(broker.get_routes(f"party{i}") == [f"ar{i}"] for i in range(200)), "A route was lost"
+
+        check_placement()
+        before = placement()
+        moved = broker.add_node("node_added")
+        after = placement()
+        check_placement()
+
+        changed = [key for key in before if before[key] != after[key]]
+        assert all(after[key] == "node_added" for key in changed), "Keys moved between the existing nodes"
+        assert moved == {
+            "databases": sum(key.startswith("ar") for key in changed),
+            "routes": sum(key.startswith("party") for key in changed),
+        }, "The moved databases and routes were miscounted"
+        assert 0 < len(changed) < len(before) / 2, "The new node should take over a fraction of the keys"
+
+        broker.remove_node("node_added")
+        check_placement()
+        assert placement() == before, "Removing the node should restore the previous placement"
+
+        broker.remove_database("ar0")
+        assert broker.get_routes("party0") == [], "The routes of a removed database were kept"
+        for node in broker.nodes.values():
+            assert "ar0" not in node.databases, "A removed database is still placed on a node"
+
+    def test_revocation_feed(self):
+        """
+        Test that a subscription to the revocation feeds of a broker returns every revocation once, in the order of the
+        revocations within every database, including databases added later and databases replaced under the same name.
+        """
+        for db_class in [base_database.Database, sqlite_database.Database]:
+            name = db_class.__module__
+
+            def new_database(db_name):
+                database = db_class(db_name)
+                database.add_evidence_many(
+                    [
+                        base_evidence.Evidence(
+                            identifier=identifier,
+                            issuer="owner1",
+                            receiver="party1",
+                            rules=[base_evidence.Rule(["object1"], ["read"])],
+                            valid_from=0,
+                            valid_untill=time.time() + 1000000,
+                            db_name=db_name,
+                        )
+                        for identifier in database.get_next_identifiers(5)
+                    ]
+                )
+                return database
+
+            broker = base_database.DatabaseBroker()
+            broker.add_database("ar0", new_database("ar0"))
+            broker.get_database("ar0").revoke(1)
+            subscription = broker.subscribe_revocations()
+            replay = broker.subscribe_revocations(from_start=True)
+
+            broker.get_database("ar0").revoke(3)
+            broker.get_database("ar0").revoke(3)
+            broker.get_database("ar0").revoke_many([2, 1, 4])
+            assert subscription.poll() == [("ar0", 3), ("ar0", 2), ("ar0", 4)], f"{name} polled revocations wrongly"
+            assert subscription.poll() == [], f"{name} polled revocations twice"
+            assert replay.poll() == [("ar0", 1), ("ar0", 3), ("ar0", 2), ("ar0", 4)], f"{name} did not replay"
+
+            broker.add_database("ar1", new_database("ar1"))
+            broker.get_database("ar1").revoke(5)
+            assert subscription.poll() == [("ar1", 5)], f"{name} missed a database added later"
+
+            broker.add_database("ar0", new_database("ar0"))
+            broker.get_database("ar0").revoke(2)
+            assert subscription.poll() == [("ar0", 2)], f"{name} did not poll a replaced database from the start"
+
+            database = broker.get_database("ar0")
+            assert database.get_revocations_since(0) == ([2], 1), f"{name} has the wrong feed"
+            assert database.get_revocations_since(1) == ([], 1), f"{name} returned old revocations"
+
+    def test_revocation_store_mutation(self):
+        """
+        Test that the revocation stores can only be changed through the database, so every revocation advances the
+        epoch that the cached masks of evidence batches depend on, and updates the indexes of the database.
+        """
+        for db_class in [base_database.Database, sqlite_database.Database]:
+            name = db_class.__module__
+            database = db_class("ar0")
+            evidences = [
+                base_evidence.Evidence(
+                    identifier=identifier,
+                    issuer="owner1",
+                    receiver="party1",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=time.time() + 1000000,
+                    db_name="ar0",
+                )
+                for identifier in database.get_next_identifiers(4)
+            ]
+            database.add_evidence_many(evidences)
+
+            for mutator in ["append", "extend"]:
+                assert not hasattr(database.revocations, mutator), f"{name} revocations still have {mutator}"
+
+            batch = EvidenceBatch(evidences)
+            revocations = {"ar0": database.revocations}
+            assert batch.mask("object1", "read", revocations=revocations).all(), f"{name} masked valid evidence"
+
+            epoch = database.revocations.epoch
+            database.revoke(2)
+            database.revoke_many([3, 4])
+            assert database.revocations.epoch == epoch + 3, f"{name} did not advance the epoch"
+            assert list(batch.mask("object1", "read", revocations=revocations)) == [
+                True,
+                False,
+                False,
+                False,
+            ], f"{name} used a stale revocation mask"
+            assert [e.identifier for e in database.get_evidence_by_party("party1")] == [
+                1
+            ], f"{name} did not unindex the revoked evidence"
+
+    def _check_oracle_indexes(self, database):
+        """
+        Check that the indexes of an oracle database match the edges of its graph and its bridges.
+
+        Params:
+            database: the oracle database.
+        """
+        permitted = {}
+        edges = {}
+        for u, v, key, data in database.graph.edges(keys=True, data=True):
+            edges[data["id"]] = (u, v, key)
+            for resource in set(data["objects"] or ()):
+                for action in set(data["rights"] or ()):
+                    permitted.setdefault((resource, action), {}).setdefault(u, {}).setdefault(v, set()).add(data["id"])
+        assert database.permitted == permitted, "The (object, action) adjacency lists are out of sync with the graph"
+
+        bridges = [bridge for bridge in database.edges.values() if isinstance(bridge, oracle_database.Bridge)]
+        edges.update({bridge.id: bridge for bridge in bridges})
+        assert database.edges == edges, "The index of the edges by ID is out of sync with the graph"
+
+        def group(keys_of):
+            groups = {}
+            for bridge in bridges:
+                for key in keys_of(bridge):
+                    groups.setdefault(key, set()).add(bridge.id)
+            return groups
+
+        def indexed(index):
+            return {key: {bridge.id for bridge in items} for key, items in index.items() if items}
+
+        assert indexed(database.outgoing_bridges) == group(lambda bridge: [bridge.from_node]), "Outgoing bridges"
+        assert indexed(database.incoming_bridges) == group(lambda bridge: [bridge.to_node]), "Incoming bridges"
+        assert indexed(database.permitted_bridges) == group(
+            lambda bridge: [
+                (bridge.to_node, resource, action)
+                for resource in set(bridge.objects or ())
+                for action in set(bridge.rights or ())
+            ]
+        ), "The bridges per (node, object, action) are out of sync"
+
+    def test_oracle_adjacency_index(self):
+        """
+        Test that the (object, action) adjacency lists of an oracle database stay in sync with its graph while edges
+        are added, removed and revoked, including parallel edges and edges repeating objects or actions, and that the
+        search over the adjacency lists finds the same paths as a search over the edges of the graph.
+        """
+        rng = random.Random(0)
+        parties = [f"party{i}" for i in range(20)]
+        database = oracle_database.Database("adjacency")
+        database.add_parties(parties)
+
+        def has_path(owner_id, party_id, resource, action):
+            reachable = {owner_id}
+            queue = [owner_id]
+            while queue:
+                u = queue.pop()
+                for _, v, data in database.graph.out_edges(u, data=True):
+                    if (
+                        v not in reachable
+                        and data["id"] not in database.revocations
+                        and resource in data["objects"]
+                        and action in data["rights"]
+                    ):
+                        reachable.add(v)
+                        queue.append(v)
+            return party_id in reachable
+
+        identifiers = []
+        for _ in range(1000):
+            operation = rng.random()
+            if operation < 0.4:
+                objects = rng.sample(["object1", "object2", "object1"], rng.randint(1, 3))
+                rights = rng.sample(["read", "write", "read"], rng.randint(1, 3))
+                edge = database.add_edge(rng.choice(parties), rng.choice(parties), objects, rights, "adjacency")
+                identifiers.append(edge.identifier)
+            elif operation < 0.5:
+                edges = [(rng.choice(parties), rng.choice(parties), ["object1"], ["read"]) for _ in range(3)]
+                identifiers.extend(edge.identifier for edge in database.add_edges(edges, "adjacency"))
+            elif operation < 0.6 and identifiers:
+                database.revoke(rng.choice(identifiers))
+            elif operation < 0.7 and identifiers:
+                assert database.remove_edge(identifiers.pop(rng.randrange(len(identifiers)))), "Edge not removed"
+            else:
+                request = (rng.choice(parties), rng.choice(parties), rng.choice(["object1", "object2"]), "read")
+                assert database._in_graph_path_valid(*request) == has_path(*request), f"Wrong path for {request}"
+            self._check_oracle_indexes(database)
+
+    def test_oracle_reachability_cache(self):
+        """
+        Test that the cached reachable parties of an oracle database follow the graph as edges are added, revoked and
+        removed: a revoked edge only cuts a path once all its parallel edges are revoked, and an edge delegating
+        another action does not restore it.
+        """
+        database = oracle_database.Database("reachability")
+        database.add_parties(["owner1", "party1", "party2", "party3"])
+
+        def reachable(owner_id="owner1", action="read"):
+            cached = database._reachable_in_graph(owner_id, "object1", action)
+            assert cached == database._search_reachable(owner_id, "object1", action), "The cache is out of date"
+            return cached
+
+        def add_edge(u, v, action="read"):
+            return database.add_edge(u, v, ["object1"], [action], "reachability").identifier
+
+        first = add_edge("owner1", "party1")
+        second = add_edge("owner1", "party1")
+        third = add_edge("party1", "party2")
+        assert reachable() == {"owner1", "party1", "party2"}, "The parties along the edges should be reachable"
+        reachable("party1")
+        hits = database.get_reachability_stats()["hits"]
+        assert reachable() == {"owner1", "party1", "party2"}, "The cached parties should be unchanged"
+        assert database.get_reachability_stats()["hits"] > hits, "The reachable parties were not cached"
+
+        add_edge("party2", "party3")
+        assert reachable() == {"owner1", "party1", "party2", "party3"}, "A new edge should extend the cache"
+
+        database.revoke(first)
+        assert reachable() == {"owner1", "party1", "party2", "party3"}, "A valid parallel edge should keep the path"
+
+        database.revoke(second)
+        assert reachable() == {"owner1"}, "Revoking all parallel edges should cut the path"
+        assert reachable("party1") == {"party1", "party2", "party3"}, "Paths of other owners should stay cached"
+
+        add_edge("owner1", "party1", action="write")
+        assert reachable() == {"owner1"}, "An edge delegating another action should not restore the path"
+        assert reachable(action="write") == {"owner1", "party1"}, "The edge should delegate the other action"
+
+        restored = add_edge("owner1", "party1")
+        assert reachable() == {"owner1", "party1", "party2", "party3"}, "A new parallel edge should restore the path"
+
+        database.remove_edge(third)
+        assert reachable() == {"owner1", "party1"}, "Removing an edge should cut the path"
+
+        database.revoke_many([restored])
+        assert reachable() == {"owner1"}, "Revoking edges in bulk should cut the path"
+
+    def test_oracle_bridge_index(self):
+        """
+        Test that the bridges of an oracle database are indexed by target node and by (object, action) as bridges are
+        added one at a time and in bulk, and removed, and that the roots are only found through the bridges delegating
+        the requested action on the object.
+        """
+        database = oracle_database.Database("ar0")
+        database.add_parties(["owner1", "party1"])
+
+        first = database.add_edge("owner1", "remote1", ["object1"], ["read"], "ar0")
+        second, _ = database.add_edges(
+            [("party1", "remote1", ["object2"], ["write"]), ("owner1", "remote2", ["object1"], ["read", "write"])],
+            "ar0",
+        )
+        self._check_oracle_indexes(database)
+
+        assert database.has_bridges_to("remote1") and not database.has_bridges_to("party1"), "Bridges not indexed"
+        assert database.get_bridged_nodes(["remote1", "remote2", "remote3", "party1"]) == {
+            "remote1",
+            "remote2",
+        }, "The bridged nodes should be the targets of the bridges"
+        assert database._build_recursive_graph("remote1", "object1", "read") == ["owner1"], "Root through a bridge"
+        assert database._build_recursive_graph("remote1", "object2", "write") == ["party1"], "Root through a bridge"
+        assert database._build_recursive_graph("remote1", "object2", "read") == [
+            "remote1"
+        ], "A bridge delegating another action should not be followed"
+
+        assert database.remove_edge(first.identifier), "The bridge should be removed"
+        self._check_oracle_indexes(database)
+        assert database._build_recursive_graph("remote1", "object1", "read") == ["remote1"], "A removed bridge was used"
+        assert database.has_bridges_to("remote1"), "The other bridge to the node should be kept"
+
+        assert database.remove_edges([second.identifier, second.identifier, -1]) == [True, True, False], "Bulk removal"
+        self._check_oracle_indexes(database)
+        assert not database.has_bridges_to("remote1"), "All bridges to the node were removed"
+        assert not database.remove_edge(first.identifier), "A bridge can only be removed once"
+
+    def test_oracle_edge_removal(self):
+        """
+        Test that edges of an oracle database are removed and revoked by their ID: removing one of parallel edges keeps
+        the others and their data, and revoking an edge only invalidates the cached reachable parties of the
+        (object, action) pairs it delegates, while revoking a bridge or an unknown ID invalidates nothing.
+        """
+        database = oracle_database.Database("removal")
+        database.add_parties(["owner1", "party1", "party2"])
+
+        first = database.add_edge("owner1", "party1", ["object1"], ["read"], "removal").identifier
+        second = database.add_edge("owner1", "party1", ["object2"], ["read"], "removal").identifier
+        assert database.remove_edge(first) and not database.remove_edge(first), "An edge can only be removed once"
+
+        third = database.add_edge("owner1", "party1", ["object1"], ["read"], "removal").identifier
+        self._check_oracle_indexes(database)
+        assert {data["id"] for _, _, data in database.graph.edges(data=True)} == {second, third}, "Wrong edge removed"
+        assert database.graph.edges[database.edges[second]]["objects"] == ["object2"], "The parallel edge changed"
+
+        fourth = database.add_edge("party1", "party2", ["object1"], ["read"], "removal").identifier
+        bridge = database.add_edge("party2", "remote1", ["object1"], ["read"], "removal").identifier
+        for resource in ["object1", "object2"]:
+            database._reachable_in_graph("owner1", resource, "read")
+
+        invalidations = database.get_reachability_stats()["invalidations"]
+        database.revoke(bridge)
+        database.revoke(-1)
+        assert database.get_reachability_stats()["invalidations"] == invalidations, "A bridge invalidated the cache"
+
+        database.revoke(fourth)
+        assert database.get_reachability_stats()["invalidations"] == invalidations + 1, "Only object1 is invalidated"
+        assert database._reachable_in_graph("owner1", "object1", "read") == {"owner1", "party1"}, "Edge not revoked"
+        assert database._reachable_in_graph("owner1", "object2", "read") == {"owner1", "party1"}, "object2 changed"
+
+        assert database.remove_edges([fourth, bridge, second]) == [True, True, True], "The edges should be removed"
+        self._check_oracle_indexes(database)
+        assert database._reachable_in_graph("owner1", "object2", "read") == {"owner1"}, "A removed edge was followed"
+        assert set(database.edges) == {third}, "Only the remaining edge should be indexed by ID"
+
+    def get_startup_times(self):
+        """
+        Measure the time it takes to restart a persisted database, with a growing number of delegations.
+        Compares restoring from a snapshot plus a short log tail, with replaying the full log.
+        """
+        numbers_of_delegations = [1000, 10000, 50000]
+        tail_length = 100
+        times_taken = {}
+
+        for number_of_delegations in numbers_of_delegations:
+            times_taken[number_of_delegations] = {}
+
+            for mode in ["snapshot", "log_replay"]:
+                with tempfile.TemporaryDirectory() as directory:
+                    db = base_database.Database("startup", log_directory=directory)
+                    for i in range(number_of_delegations):
+                        if mode == "snapshot" and i == number_of_delegations - tail_length:
+                            db.snapshot()
+
+                        db.add_evidence(
+                            base_evidence.Evidence(
+                                identifier=db.get_next_identifier(),
+                                issuer=f"party{i}",
+                                receiver=f"party{i + 1}",
+                                rules=[base_evidence.Rule(["object1"], ["read"])],
+                                valid_from=0,
+                                valid_untill=time.time() + 1000000,
+                                db_name="startup",
+                            )
+                        )
+                    db.close()
+
+                    start_time = time.time()
+                    db = base_database.Database("startup", log_directory=directory)
+                    end_time = time.time()
+
+                    assert (
+                        len(db.get_evidence_by_party(f"party{number_of_delegations}")) == 1
+                    ), "Startup test failed, as the last delegation was not restored."
+                    db.close()
+
+                times_taken[number_of_delegations][mode] = format(end_time - start_time, ".6f")
+
+        return times_taken
+
+    def get_performance_values_consistent_hashing(self, number_of_databases=1000):
+        """
+        Test the routing of a ConsistentHashBroker with a growing number of AR nodes. Every database holds evidence for
+        a party of its own, so the broker holds a route per database. Measures the lookup of the node and routes of a
+        database and party, and the cost of adding and removing a node.
+
+        Params:
+            number_of_databases: the number of databases placed on the nodes.
+
+        Returns:
+            The time taken per lookup, and the time taken and the fraction of the databases and routes moved when
+            adding and removing a node, per number of nodes.
+        """
+        numbers_of_nodes = [10, 100, 1000]
+        expiry = time.time() + 1000000
+        databases = []
+        for i in range(number_of_databases):
+            db = base_database.Database(f"ar{i}")
+            db.add_evidence(
+                base_evidence.Evidence(
+                    identifier=db.get_next_identifier(),
+                    issuer=f"ar_owner{i}",
+                    receiver=f"ar_party{i}",
+                    rules=[base_evidence.Rule(["object1"], ["read"])],
+                    valid_from=0,
+                    valid_untill=expiry,
+                    db_name=f"ar{i}",
+                )
+            )
+            databases.append(db)
+
+        times_taken = {}
+        for number_of_nodes in numbers_of_nodes:
+            broker = ConsistentHashBroker([f"node{i}" for i in range(number_of_nodes)])
+            for i, db in enumerate(databases):
+                broker.add_database(f"ar{i}", db)
+
+            start_time = time.time()
+            for i in range(number_of_databases):
+                broker.get_database_node(f"ar{i}")
+                routes = broker.get_routes(f"ar_party{i}")
+            elapsed_lookup = time.time() - start_time
+
+            assert routes == [f"ar{number_of_databases - 1}"], "Performance test failed, as the routes are incorrect."
+
+            start_time = time.time()
+            moved_add = broker.add_node("node_added")
+            elapsed_add = time.time() - start_time
+
+            start_time = time.time()
+            moved_remove = broker.remove_node("node_added")
+            elapsed_remove = time.time() - start_time
+
+            for i in range(number_of_databases):
+                broker.remove_database(f"ar{i}")
+
+            times_taken[number_of_nodes] = {
+                "lookup": format(elapsed_lookup / number_of_databases, ".6f"),
+                "add_node": format(elapsed_add, ".6f"),
+                "remove_node": format(elapsed_remove, ".6f"),
+                "moved_on_add": {key: moved / number_of_databases for key, moved in moved_add.items()},
+                "moved_on_remove": {key: moved / number_of_databases for key, moved in moved_remove.items()},
+            }
+
+        return times_taken
+
+    def get_performance_values_revocation_feed(self, db_class, number_of_evidences=10000, number_of_rounds=100):
+        """
+        Test keeping a cache up to date with the revocation feed. A database holds evidence for a party, and evidence
+        for other parties that is revoked one at a time. After every revocation, the revoked mask of the batch of the
+        party is updated with only the new revocations, compared with rescanning the batch, and a subscription polls
+        the new revocations of the broker.
+
+        Params:
+            db_class: the database class to test.
+            number_of_evidences: the number of evidences for the party, and the number of evidences to revoke.
+            number_of_rounds: the number of revocations to measure.
+
+        Returns:
+            The time taken per update of the revoked mask, incremental and rescanning, and per poll.
+        """
+        db = db_class("feed")
+        broker = base_database.DatabaseBroker()
+        broker.add_database("feed", db)
+
+        expiry = time.time() + 1000000
+        evidences = [
+            base_evidence.Evidence(
+                identifier=identifier,
+                issuer="owner1",
+                receiver="party1" if identifier % 2 == 0 else "party2",
+                rules=[base_evidence.Rule(["object1"], ["read"])],
+                valid_from=0,
+                valid_untill=expiry,
+                db_name="feed",
+            )
+            for identifier in db.get_next_identifiers(2 * number_of_evidences)
+        ]
+        db.add_evidence_many(evidences)
+
+        batch = db.get_evidence_batch_by_party("party1")
+        revocations = {"feed": db.revocations}
+        subscription = broker.subscribe_revocations()
+        batch.mask("object1", "read", revocations=revocations)
+
+        elapsed_incremental = 0
+        elapsed_rescan = 0
+        elapsed_poll = 0
+        rounds = min(number_of_rounds, number_of_evidences)
+        for evidence in evidences[1 : 2 * rounds : 2]:
+            db.revoke(evidence.identifier)
+
+            start_time = time.time()
+            incremental = batch.mask("object1", "read", revocations=revocations)
+            elapsed_incremental += time.time() - start_time
+
+            incremental = incremental.copy()
+            batch._revoked = None  # Drop the cached mask, to rescan the batch
+            start_time = time.time()
+            rescanned = batch.mask("object1", "read", revocations=revocations)
+            elapsed_rescan += time.time() - start_time
+
+            start_time = time.time()
+            polled = subscription.poll()
+            elapsed_poll += time.time() - start_time
+
+            assert (incremental == rescanned).all(), "Performance test failed, as the revoked masks differ."
+            assert polled == [("feed", evidence.identifier)], "Performance test failed, as the poll is incorrect."
+
+        return {
+            "incremental": format(elapsed_incremental / rounds, ".6f"),
+            "rescan": format(elapsed_rescan / rounds, ".6f"),
+            "poll": format(elapsed_poll / rounds, ".6f"),
+        }